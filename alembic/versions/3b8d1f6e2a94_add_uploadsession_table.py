@@ -0,0 +1,44 @@
+"""Add upload sessions for resumable uploads
+
+Revision ID: 3b8d1f6e2a94
+Revises: 1ba58426670b
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d1f6e2a94'
+down_revision: Union[str, None] = '1ba58426670b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'uploadsession',
+        sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('guest_id', sa.Integer(), nullable=False),
+        sa.Column('file_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('file_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('guest_device', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('upload_length', sa.Integer(), nullable=False),
+        sa.Column('upload_offset', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id']),
+        sa.ForeignKeyConstraint(['guest_id'], ['guest.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('uploadsession')
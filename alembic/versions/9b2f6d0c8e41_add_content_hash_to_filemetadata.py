@@ -0,0 +1,33 @@
+"""Add content hash to file metadata
+
+Revision ID: 9b2f6d0c8e41
+Revises: 4e7a2c91d3b5
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f6d0c8e41'
+down_revision: Union[str, None] = '4e7a2c91d3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.create_index('ix_filemetadata_content_hash', ['content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.drop_index('ix_filemetadata_content_hash')
+        batch_op.drop_column('content_hash')
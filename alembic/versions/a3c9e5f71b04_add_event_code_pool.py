@@ -0,0 +1,48 @@
+"""Add event code pool and allow longer event codes
+
+Revision ID: a3c9e5f71b04
+Revises: f2a8c4d61e93
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5f71b04'
+down_revision: Union[str, None] = 'f2a8c4d61e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'eventcodepool',
+        sa.Column('code', sqlmodel.sql.sqltypes.AutoString(length=8), nullable=False),
+        sa.Column('length', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('code'),
+    )
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.alter_column(
+            'event_code',
+            existing_type=sqlmodel.sql.sqltypes.AutoString(length=4),
+            type_=sqlmodel.sql.sqltypes.AutoString(length=8),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.alter_column(
+            'event_code',
+            existing_type=sqlmodel.sql.sqltypes.AutoString(length=8),
+            type_=sqlmodel.sql.sqltypes.AutoString(length=4),
+            existing_nullable=False,
+        )
+    op.drop_table('eventcodepool')
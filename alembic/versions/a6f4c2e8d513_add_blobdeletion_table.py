@@ -0,0 +1,36 @@
+"""Add blob deletion queue
+
+Revision ID: a6f4c2e8d513
+Revises: f5d2b8e07a39
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f4c2e8d513'
+down_revision: Union[str, None] = 'f5d2b8e07a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobdeletion',
+        sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('requested_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+    op.create_index(op.f('ix_blobdeletion_requested_at'), 'blobdeletion', ['requested_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blobdeletion_requested_at'), table_name='blobdeletion')
+    op.drop_table('blobdeletion')
@@ -0,0 +1,31 @@
+"""Add media job leases
+
+Revision ID: b7e5d3f19a26
+Revises: a6f4c2e8d513
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e5d3f19a26'
+down_revision: Union[str, None] = 'a6f4c2e8d513'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('mediajob') as batch_op:
+        batch_op.add_column(sa.Column('claimed_by', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('mediajob') as batch_op:
+        batch_op.drop_column('claimed_by')
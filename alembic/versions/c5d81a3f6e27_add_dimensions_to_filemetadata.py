@@ -0,0 +1,32 @@
+"""Add display dimensions to file metadata
+
+Revision ID: c5d81a3f6e27
+Revises: 9b2f6d0c8e41
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d81a3f6e27'
+down_revision: Union[str, None] = '9b2f6d0c8e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
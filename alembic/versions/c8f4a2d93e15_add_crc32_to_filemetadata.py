@@ -0,0 +1,30 @@
+"""Add CRC-32 to file metadata
+
+Revision ID: c8f4a2d93e15
+Revises: b6e1f09d4c27
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2d93e15'
+down_revision: Union[str, None] = 'b6e1f09d4c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.add_column(sa.Column('crc32', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.drop_column('crc32')
@@ -0,0 +1,29 @@
+"""Index revoked tokens by revocation time
+
+Revision ID: d2b6f8a13c47
+Revises: c9a1e4f27d85
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6f8a13c47'
+down_revision: Union[str, None] = 'c9a1e4f27d85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_revokedtoken_revoked_at'), 'revokedtoken', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_revokedtoken_revoked_at'), table_name='revokedtoken')
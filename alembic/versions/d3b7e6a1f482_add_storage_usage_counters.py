@@ -0,0 +1,59 @@
+"""Add storage usage counters
+
+Revision ID: d3b7e6a1f482
+Revises: c8f4a2d93e15
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b7e6a1f482'
+down_revision: Union[str, None] = 'c8f4a2d93e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep one storage row per event before making event_id unique
+    op.execute(
+        "DELETE FROM eventstorage WHERE id NOT IN (SELECT MIN(id) FROM eventstorage GROUP BY event_id)"
+    )
+    with op.batch_alter_table('eventstorage') as batch_op:
+        batch_op.add_column(sa.Column('used_bytes', sa.BigInteger(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('file_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()))
+        batch_op.create_unique_constraint('uq_eventstorage_event_id', ['event_id'])
+    op.create_table(
+        'userstorage',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('used_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('file_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index('ix_uploadsession_event_id', 'uploadsession', ['event_id'], unique=False)
+    # Counters for existing rows start from the files already stored; events
+    # and users without a row get one on their next upload
+    op.execute(
+        "UPDATE eventstorage SET "
+        "used_bytes = (SELECT COALESCE(SUM(file_size), 0) FROM filemetadata WHERE filemetadata.event_id = eventstorage.event_id), "
+        "file_count = (SELECT COUNT(*) FROM filemetadata WHERE filemetadata.event_id = eventstorage.event_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_uploadsession_event_id', table_name='uploadsession')
+    op.drop_table('userstorage')
+    with op.batch_alter_table('eventstorage') as batch_op:
+        batch_op.drop_constraint('uq_eventstorage_event_id', type_='unique')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('file_count')
+        batch_op.drop_column('used_bytes')
@@ -0,0 +1,44 @@
+"""Add indexes for hot-path lookups
+
+Revision ID: d7e3a9c25b18
+Revises: c5d81a3f6e27
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3a9c25b18'
+down_revision: Union[str, None] = 'c5d81a3f6e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, unique)
+INDEXES = [
+    ('ix_user_email', 'user', ['email'], True),
+    ('ix_event_event_code', 'event', ['event_code'], True),
+    ('ix_event_user_id_date', 'event', ['user_id', 'date'], False),
+    ('ix_usersession_session_token', 'usersession', ['session_token'], True),
+    ('ix_usersession_user_id', 'usersession', ['user_id'], False),
+    ('ix_guest_event_id_guest_email', 'guest', ['event_id', 'guest_email'], False),
+    ('ix_filemetadata_event_id_created_date', 'filemetadata', ['event_id', 'created_date'], False),
+    ('ix_mediajob_file_id', 'mediajob', ['file_id'], False),
+    ('ix_mediajob_status_run_after', 'mediajob', ['status', 'run_after'], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Unique indexes fail on existing duplicates; resolve those rows first
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,37 @@
+"""Add object storage keys
+
+Revision ID: e4c1a7f3b926
+Revises: d3b7e6a1f482
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c1a7f3b926'
+down_revision: Union[str, None] = 'd3b7e6a1f482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.add_column(sa.Column('storage_key', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    with op.batch_alter_table('uploadsession') as batch_op:
+        batch_op.add_column(sa.Column('storage_key', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('multipart_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('uploadsession') as batch_op:
+        batch_op.drop_column('multipart_id')
+        batch_op.drop_column('storage_key')
+    with op.batch_alter_table('filemetadata') as batch_op:
+        batch_op.drop_column('storage_key')
@@ -0,0 +1,36 @@
+"""Store event code lengths and index the code pool by length
+
+Revision ID: e4c8a2f61b09
+Revises: d2b6f8a13c47
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c8a2f61b09'
+down_revision: Union[str, None] = 'd2b6f8a13c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.add_column(sa.Column('event_code_length', sa.Integer(), nullable=True))
+    op.execute("UPDATE event SET event_code_length = length(event_code)")
+    op.create_index(op.f('ix_event_event_code_length'), 'event', ['event_code_length'], unique=False)
+    op.create_index('ix_eventcodepool_length_code', 'eventcodepool', ['length', 'code'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_eventcodepool_length_code', table_name='eventcodepool')
+    op.drop_index(op.f('ix_event_event_code_length'), table_name='event')
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('event_code_length')
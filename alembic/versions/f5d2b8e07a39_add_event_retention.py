@@ -0,0 +1,32 @@
+"""Add event retention
+
+Revision ID: f5d2b8e07a39
+Revises: e4c1a7f3b926
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5d2b8e07a39'
+down_revision: Union[str, None] = 'e4c1a7f3b926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.add_column(sa.Column('expired_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_event_expired_at_pricing_id_date', 'event', ['expired_at', 'pricing_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_event_expired_at_pricing_id_date', table_name='event')
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('expired_at')
@@ -1,60 +1,33 @@
-from fastapi import APIRouter, HTTPException, Request, Form, status, Depends
-from fastapi.responses import RedirectResponse, StreamingResponse
-from sqlmodel import select, Session
+from fastapi import APIRouter, HTTPException, Request, Form, Query, status, Depends
+from fastapi.responses import RedirectResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
 from datetime import datetime, timedelta, timezone
-from io import BytesIO
-import random
-import string
 import re
 import time
-import qrcode
 import jwt
-import bcrypt
 
-from app.models import User, Event, UserSession, Pricing
-from app.db.session import SessionLocal, get_session
+from app.models import User, Event, UserSession, UserStorage
+from app.db.session import AsyncSessionLocal, get_async_session
+from app.services.auth import get_logged_in_user, resolve_logged_in_user, user_cache, revocations  # Shared, cached login resolver
+from app.services.passwords import hash_password, verify_password  # bcrypt off the event loop
 from app.utils.token import (
     generate_verification_token,
     verify_verification_token,
 )
-from app.utils.email_utils import send_verification_email
-from app.profanity_filter import PROFANITY_LIST
+from app.utils.email_utils import queue_verification_email
+from app.services.email_outbox import email_outbox  # Background email delivery
+from app.services.event_codes import allocate_event_code  # Pre-screened code pool
+from app.services.event_cache import event_cache  # Hot event lookups by code
+from app.services.qr import QR_DEFAULT_SIZE, qr_response  # Stored, cacheable QR images
+from app.services.quota import drop_event_storage  # Storage usage counters
 from app.core.config import SECRET_KEY, ALGORITHM, TOKEN_EXPIRE_SECONDS
 from app.template_env import templates
 
 auth_router = APIRouter()
 
 
-def get_logged_in_user(request: Request) -> Optional[User]:
-    token = request.cookies.get("session_token")
-    if not token:
-        return None
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-    except jwt.PyJWTError:
-        return None
-
-    with SessionLocal() as session:
-        us = session.exec(
-            select(UserSession).where(UserSession.session_token == token)
-        ).first()
-        if not us:
-            return None
-        # ensure expires_at is TZ‐aware
-        exp = us.expires_at
-        if exp.tzinfo is None:
-            exp = exp.replace(tzinfo=timezone.utc)
-        if exp < datetime.now(timezone.utc):
-            return None
-        user = session.exec(select(User).where(User.id == user_id)).first()
-
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
-    return user
-
-
 def is_valid_password(password: str) -> bool:
     if len(password) < 6:
         return False
@@ -67,19 +40,13 @@ def is_valid_password(password: str) -> bool:
     return True
 
 
-def generate_unique_code(session, length: int = 4) -> str:
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-        if code in PROFANITY_LIST:
-            continue
-        exists = session.exec(select(Event).where(Event.event_code == code)).first()
-        if not exists:
-            return code
+def generate_unique_code(session) -> str:
+    return allocate_event_code(session)
 
 
 @auth_router.get("/login")
 async def login_get(request: Request):
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("login.html", {"request": request, "user": user})
 
 
@@ -89,9 +56,12 @@ async def login_post(
     email: str = Form(...),
     password: str = Form(...),
 ):
-    with SessionLocal() as session:
-        user = session.exec(select(User).where(User.email == email)).first()
-        if not user or not bcrypt.checkpw(password.encode(), user.hashed_password.encode()):
+    async with AsyncSessionLocal() as session:
+        user = (await session.exec(select(User).where(User.email == email))).first()
+        # Hand the connection back to the pool while bcrypt runs; the session
+        # reconnects for the insert below
+        await session.close()
+        if not user or not await verify_password(password, user.hashed_password):
             return templates.TemplateResponse(
                 "login.html", {"request": request, "error": "Invalid email or password."}
             )
@@ -100,7 +70,8 @@ async def login_post(
                 "login.html", {"request": request, "error": "Please verify your email."}
             )
 
-        payload = {"user_id": user.id, "exp": time.time() + TOKEN_EXPIRE_SECONDS}
+        now = time.time()
+        payload = {"user_id": user.id, "iat": now, "exp": now + TOKEN_EXPIRE_SECONDS}
         token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
         us = UserSession(
@@ -112,7 +83,7 @@ async def login_post(
             ip_address=request.client.host if request.client else "",
         )
         session.add(us)
-        session.commit()
+        await session.commit()
 
         response = RedirectResponse(url="/auth/profile", status_code=status.HTTP_303_SEE_OTHER)
         response.set_cookie(
@@ -124,14 +95,16 @@ async def login_post(
 @auth_router.get("/logout")
 async def logout(request: Request):
     token = request.cookies.get("session_token")
-    with SessionLocal() as session:
+    async with AsyncSessionLocal() as session:
         if token:
-            sessions = session.exec(
+            user_cache.invalidate_token(token)
+            await session.run_sync(revocations.revoke_token, token)  # Seen by stateless validation on every worker
+            sessions = (await session.exec(
                 select(UserSession).where(UserSession.session_token == token)
-            ).all()
+            )).all()
             for us in sessions:
-                session.delete(us)
-            session.commit()
+                await session.delete(us)
+            await session.commit()
     response = RedirectResponse(url="/auth/login", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie("session_token")
     return response
@@ -146,14 +119,15 @@ async def register_user(
     password: str = Form(...),
     next: Optional[str] = None,
 ):
-    with SessionLocal() as session:
-        existing = session.exec(select(User).where(User.email == email)).first()
+    async with AsyncSessionLocal() as session:
+        existing = (await session.exec(select(User).where(User.email == email))).first()
         if existing:
             return templates.TemplateResponse(
                 "sign_up.html",
                 {"request": request, "error": "An account with this email already exists."},
             )
-        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        await session.close()  # Don't hold a pooled connection while bcrypt runs
+        hashed = await hash_password(password)
         user = User(
             first_name=first_name,
             last_name=last_name,
@@ -162,10 +136,10 @@ async def register_user(
             verified=False,
         )
         session.add(user)
-        session.commit()
-
         token = generate_verification_token(email)
-        send_verification_email(email, token)
+        await session.run_sync(queue_verification_email, email, token)
+        await session.commit()  # The user and their verification email together
+    email_outbox.notify()
 
     return RedirectResponse(url=next or "/pricing", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -173,21 +147,19 @@ async def register_user(
 @auth_router.get("/profile")
 async def profile(
     request: Request,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     if not user:
-        return RedirectResponse(url="/auth/login", status_code=status.SEE_OTHER)
+        return RedirectResponse(url="/auth/login", status_code=status.HTTP_303_SEE_OTHER)
 
-    # load pricing tier
-    pricing = session.exec(
-        select(Pricing).where(Pricing.id == user.pricing_id)
-    ).first()
+    # pricing tier is loaded with the user by the auth resolver
+    pricing = user.pricing
 
     # load user’s events
-    events = session.exec(
+    events = (await session.exec(
         select(Event).where(Event.user_id == user.id).order_by(Event.date)
-    ).all()
+    )).all()
 
     return templates.TemplateResponse(
         "profile.html",
@@ -205,34 +177,35 @@ async def verify_email(token: str, request: Request):
     email = verify_verification_token(token)
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token.")
-    with SessionLocal() as session:
-        user = session.exec(select(User).where(User.email == email)).first()
+    async with AsyncSessionLocal() as session:
+        user = (await session.exec(select(User).where(User.email == email))).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
         user.verified = True
         session.add(user)
-        session.commit()
+        await session.commit()
+        user_cache.invalidate_user(user.id)
     return templates.TemplateResponse("thank_you_verification.html", {"request": request})
 
 
 @auth_router.get("/event-qr")
-async def event_qr(event_id: int):
-    with SessionLocal() as session:
-        event = session.exec(select(Event).where(Event.id == event_id)).first()
+async def event_qr(
+    request: Request,
+    event_id: int,
+    size: str = QR_DEFAULT_SIZE,
+    fmt: str = Query("png", alias="format"),
+):
+    async with AsyncSessionLocal() as session:
+        event = (await session.exec(select(Event).where(Event.id == event_id))).first()
         if not event:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-        qr_data = f"/upload/{event.event_code}/{event.event_password}"
-        img = qrcode.make(qr_data)
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-        return StreamingResponse(buf, media_type="image/png")
+        return await session.run_sync(lambda sync_session: qr_response(request, sync_session, event, size, fmt))
 
 
 @auth_router.get("/delete-account")
 async def delete_account_get(
     request: Request,
-    user: User = Depends(get_logged_in_user),
+    user: User = Depends(resolve_logged_in_user),
 ):
     if not user:
         return RedirectResponse("/auth/login")
@@ -245,28 +218,39 @@ async def delete_account_get(
 @auth_router.post("/delete-account")
 async def delete_account_post(
     request: Request,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_logged_in_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(resolve_logged_in_user),
 ):
     if not user:
         return RedirectResponse("/auth/login")
+    # the resolved user is a cached snapshot; delete the row itself
+    user_cache.invalidate_user(user.id)
+    user = await session.get(User, user.id)
+    if not user:
+        return RedirectResponse("/auth/login")
+    await session.run_sync(revocations.revoke_user, user.id)
     # delete all user sessions
-    sessions = session.exec(
+    sessions = (await session.exec(
         select(UserSession).where(UserSession.user_id == user.id)
-    ).all()
+    )).all()
     for us in sessions:
-        session.delete(us)
+        await session.delete(us)
 
     # delete all user events
-    events = session.exec(
+    events = (await session.exec(
         select(Event).where(Event.user_id == user.id)
-    ).all()
+    )).all()
     for ev in events:
-        session.delete(ev)
+        await session.run_sync(drop_event_storage, ev)
+        await session.delete(ev)
+    user_storage = await session.get(UserStorage, user.id)
+    if user_storage:
+        await session.delete(user_storage)
+    event_cache.invalidate(*(ev.event_code for ev in events))
 
     # finally delete the user
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await session.commit()
     resp = RedirectResponse("/", status_code=303)
     resp.delete_cookie("session_token")
     return resp
\ No newline at end of file
@@ -1,19 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, Form, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Request, Form, File, UploadFile, Query
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timezone, date
 from sqlmodel import Session, select
-import random, string
-import os
-from fastapi.responses import StreamingResponse
-from io import BytesIO
-import qrcode
+import asyncio, os
 
 from app.models import Event, User, Pricing, EventType
 from app.core.config import STORAGE_ROOT
 from app.db.session import engine, get_session
 from app.api.v1.auth import get_logged_in_user as get_current_user
+from app.services.event_codes import allocate_event_code, random_code
+from app.services.event_cache import event_cache
+from app.services.qr import QR_DEFAULT_SIZE, qr_response, qr_url
+from app.services.quota import drop_event_storage
+from app.services.object_store import object_store
+from app.services.storage import banner_key
 
 # ─── Pydantic Schemas ────────────────────────────────────────────────────────
 class EventUpdate(BaseModel):
@@ -23,10 +25,6 @@ class EventUpdate(BaseModel):
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
-
-def generate_code(length: int = 4) -> str:
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-
 # ─── CREATE PAGE (static) ──────────────────────────────────────────────────
 @router.get("/events/create")
 def create_event_page(
@@ -74,6 +72,7 @@ def get_event(
             "event":       evt,
             "user":        user,
             "event_types": event_types,
+            "qr_url":      qr_url,
             # avoid Jinja undefined errors
             "field_errors": {},
             "error":        None,
@@ -83,16 +82,17 @@ def get_event(
 
 # ─── EVENT QR CODE ─────────────────────────────────────────────────────────
 @router.get("/events/{event_id}/qr")
-def event_qr(event_id: int, session: Session = Depends(get_session)):
+def event_qr(
+    request: Request,
+    event_id: int,
+    size: str = QR_DEFAULT_SIZE,
+    fmt: str = Query("png", alias="format"),
+    session: Session = Depends(get_session),
+):
     evt = session.exec(select(Event).where(Event.id == event_id)).first()
     if not evt:
         raise HTTPException(404, "Event not found")
-    data = f"/upload/{evt.event_code}/{evt.event_password}"
-    img = qrcode.make(data)
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return StreamingResponse(buf, media_type="image/png")
+    return qr_response(request, session, evt, size, fmt)
 
 
 @router.put("/events/{event_id}")
@@ -113,6 +113,7 @@ def update_event(
 
     session.add(evt)
     session.commit()
+    event_cache.invalidate(evt.event_code)
     session.refresh(evt)
     return {"message": "Event updated", "event": evt}
 
@@ -122,8 +123,10 @@ def delete_event(event_id: int, session: Session = Depends(get_session)):
     evt = session.exec(select(Event).where(Event.id == event_id)).first()
     if not evt:
         raise HTTPException(404, "Event not found")
+    drop_event_storage(session, evt)
     session.delete(evt)
     session.commit()
+    event_cache.invalidate(evt.event_code)
     return {"message": "Event deleted"}
 
 
@@ -141,8 +144,8 @@ def create_event(
     # enforce limits …
     # check_event_limit(user, session)
 
-    code = generate_code()
-    password = generate_code(4)
+    code = allocate_event_code(session)  # Committed (or returned to the pool) with the event
+    password = random_code(4)
     # prepare a storage directory for this event (must be non-null)
     event_storage_dir = os.path.join(STORAGE_ROOT, code)
     os.makedirs(event_storage_dir, exist_ok=True)
@@ -160,6 +163,7 @@ def create_event(
     )
     session.add(new_event)
     session.commit()
+    event_cache.invalidate(code)  # Drop a cached "no such code" from earlier probing
     session.refresh(new_event)
 
     return templates.TemplateResponse(
@@ -202,20 +206,19 @@ async def update_event_form(
     # only if it's really an UploadFile and has a filename
     if hasattr(banner_file, "filename") and banner_file.filename:
         from pathlib import Path
-        import aiofiles
 
-        upload_dir = Path(evt.storage_path) / "customisation"
-        upload_dir.mkdir(parents=True, exist_ok=True)
         ext = Path(banner_file.filename).suffix
         banner_name = f"banner{ext}"
-        dest = upload_dir / banner_name
-        async with aiofiles.open(dest, "wb") as out:
-            await out.write(await banner_file.read())
+        # served publicly as /uploads/<key>, from disk or the bucket
+        await asyncio.to_thread(
+            object_store().put_bytes, banner_key(evt, banner_name), await banner_file.read(), banner_file.content_type
+        )
         evt.banner_filename = banner_name
 
     # commit & render…
     session.add(evt)
     session.commit()
+    event_cache.invalidate(evt.event_code)
     session.refresh(evt)
 
     # re-fetch types for template
@@ -228,6 +231,7 @@ async def update_event_form(
             "event":       evt,
             "user":        user,
             "event_types": event_types,
+            "qr_url":      qr_url,
             "field_errors": {},
             "error":        None,
             "success":      True,
@@ -1,25 +1,262 @@
-from fastapi import APIRouter, HTTPException  # FastAPI utilities
-from sqlmodel import Session, select  # ORM for database queries
-from app.models import Event  # Database model for events
-from app.db.session import engine  # Database engine for creating sessions
+import base64  # Opaque pagination cursors
+from datetime import datetime  # Cursor timestamps
+from typing import Optional  # Type hints
+from fastapi import APIRouter, HTTPException, Query, Request  # FastAPI utilities
+from sqlalchemy import or_, tuple_  # Media type filter and keyset comparison
+from sqlmodel import select  # ORM for database queries
+from sqlmodel.ext.asyncio.session import AsyncSession  # Non-blocking sessions
+from app.models import Event, FileMetadata, MediaJob  # Database models
+from app.db.session import AsyncSessionLocal  # Async session factory
+from app.services.media import RENDITION_SIZES, RENDITION_FORMATS  # Preview sizes and formats
+from app.services.object_store import object_store  # Durable file storage
+from app.services.media_delivery import file_response, immutable_cache, sign_url, verify_signature  # Signed, cacheable media
+from app.services.storage import original_key, derived_folder  # Storage layout helpers
+from app.services.auth import resolve_logged_in_user  # Shared, cached login resolver
+from app.services.event_cache import event_cache  # Event lookups by code
+from app.api.v1.upload import find_event  # Guest access by code and password
+from app.services.zip_stream import archive_response, downloads_allowed, event_archive  # Streaming ZIP downloads
 
 # Initialize the router for gallery-related endpoints
 gallery_router = APIRouter()
 
-@gallery_router.get("/photos/{event_id}")
-async def get_photos(event_id: int):
+# ─── Photo Listing ──────────────────────────────────────────────────────────
+
+PHOTO_PAGE_DEFAULT = 20
+PHOTO_PAGE_MAX = 100
+
+def encode_cursor(created_date: datetime, file_id: int) -> str:
+    """
+    Opaque cursor for the position just after (created_date, file_id).
+    """
+    raw = f"{created_date.isoformat()}|{file_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Inverse of `encode_cursor`; raises a 400 for anything malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created, file_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created), int(file_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def host_event(request: Request, event_code: str) -> Event:
+    """
+    The logged-in user's event with this code, or a 404.
+    """
+    user = await resolve_logged_in_user(request)
+    event = await event_cache.get(event_code)
+    if not event or not user or event.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+@gallery_router.get("/photos/{event_code}")
+async def get_host_photos(
+    request: Request,
+    event_code: str,
+    cursor: Optional[str] = None,
+    size: int = Query(default=PHOTO_PAGE_DEFAULT, ge=1, le=PHOTO_PAGE_MAX),
+):
+    """
+    A page of the event's gallery (see `photo_page`), for its host.
+    """
+    return await photo_page((await host_event(request, event_code)).id, cursor, size)
+
+@gallery_router.get("/photos/{event_code}/{event_password}")
+async def get_guest_photos(
+    event_code: str,
+    event_password: str,
+    cursor: Optional[str] = None,
+    size: int = Query(default=PHOTO_PAGE_DEFAULT, ge=1, le=PHOTO_PAGE_MAX),
+):
+    """
+    A page of the event's gallery (see `photo_page`), for its guests.
+    """
+    return await photo_page((await find_event(event_code, event_password)).id, cursor, size)
+
+async def photo_page(event_id: int, cursor: Optional[str], size: int) -> dict:
+    """
+    List an event's photos and videos, newest first, one page at a time.
+    - Galleries are found by event code plus the host's session or the
+      event password; ids are not accepted, so they cannot be counted
+      through. Preview and download links are only signed after that check.
+    - Keyset pagination on (created_date, id): pass the previous page's
+      `next_cursor` as `cursor`. Each page seeks straight to its start, so
+      deep pages cost the same as the first one.
+    - `next_cursor` is null on the last page.
+    """
+    async with AsyncSessionLocal() as session:
+        query = (
+            select(
+                FileMetadata.id,
+                FileMetadata.file_name,
+                FileMetadata.file_type,
+                FileMetadata.width,
+                FileMetadata.height,
+                FileMetadata.capture_time,
+                FileMetadata.created_date,
+            )
+            .where(FileMetadata.event_id == event_id)
+            .where(or_(FileMetadata.file_type.like("image/%"), FileMetadata.file_type.like("video/%")))
+            .order_by(FileMetadata.created_date.desc(), FileMetadata.id.desc())
+            .limit(size + 1)  # One extra row tells us whether another page exists
+        )
+        if cursor:
+            query = query.where(tuple_(FileMetadata.created_date, FileMetadata.id) < tuple_(*decode_cursor(cursor)))
+        rows = (await session.exec(query)).all()
+
+    page = rows[:size]
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "type": "video" if row.file_type.startswith("video/") else "image",
+                "caption": row.file_name,
+                "thumb_url": preview_url(row, "grid"),
+                "viewer_url": preview_url(row, "viewer"),
+                "download_url": download_url(row),
+                "width": row.width,
+                "height": row.height,
+                "capture_time": row.capture_time.isoformat() if row.capture_time else None,
+            }
+            for row in page
+        ],
+        "next_cursor": encode_cursor(page[-1].created_date, page[-1].id) if len(rows) > size else None,
+    }
+
+@gallery_router.get("/photos/{event_code}/{file_id}/jobs")
+async def get_host_file_jobs(request: Request, event_code: str, file_id: int):
+    """
+    Processing status of one of the event's files (see `file_jobs`), for its host.
+    """
+    return await file_jobs((await host_event(request, event_code)).id, file_id)
+
+@gallery_router.get("/photos/{event_code}/{event_password}/{file_id}/jobs")
+async def get_guest_file_jobs(event_code: str, event_password: str, file_id: int):
+    """
+    Processing status of one of the event's files (see `file_jobs`), for its guests.
+    """
+    return await file_jobs((await find_event(event_code, event_password)).id, file_id)
+
+async def file_jobs(event_id: int, file_id: int) -> list[dict]:
+    """
+    Report the status of the background processing jobs for an uploaded file.
+    - Only for a file of the event the caller was let into; any other id is a 404.
+    - Errors stay in the server log: they can hold tool output and file paths.
+    """
+    async with AsyncSessionLocal() as session:
+        meta = await session.get(FileMetadata, file_id)
+        if not meta or meta.event_id != event_id:
+            raise HTTPException(status_code=404, detail="File not found")
+        jobs = (await session.exec(
+            select(MediaJob).where(MediaJob.file_id == file_id).order_by(MediaJob.id)
+        )).all()
+        return [
+            {
+                "id": job.id,
+                "kind": job.kind,
+                "status": job.status,
+                "attempts": job.attempts,
+                "updated_at": job.updated_at.isoformat(),
+            }
+            for job in jobs
+        ]
+
+# ─── Previews & Downloads ───────────────────────────────────────────────────
+
+def preview_url(meta: FileMetadata, size: str) -> str:
+    """
+    Signed URL of a gallery preview ("grid" or "viewer") for a file.
+    """
+    return sign_url(f"/api/files/{meta.id}/preview/{size}")
+
+def download_url(meta: FileMetadata) -> str:
+    """
+    Signed URL of the original file, served as an attachment.
+    """
+    return sign_url(f"/api/files/{meta.id}/download")
+
+async def load_file(session: AsyncSession, file_id: int) -> tuple[FileMetadata, Event]:
+    """
+    Fetch a file and its event or raise a 404.
+    """
+    meta = await session.get(FileMetadata, file_id)
+    event = await session.get(Event, meta.event_id) if meta else None
+    if not meta or not event:
+        raise HTTPException(status_code=404, detail="File not found")
+    return meta, event
+
+@gallery_router.api_route("/files/{file_id}/preview/{size}", methods=["GET", "HEAD"])
+async def get_file_preview(request: Request, file_id: int, size: str):
+    """
+    Serve a downsized, watermarked preview of a file.
+    - Only through a signed link from the photo listing (403 otherwise).
+    - Picks the smallest format the browser accepts (AVIF, WebP, then JPEG).
+    - Videos get their browser-playable transcode, seekable with Range.
+    - Cached until the link expires; falls back to the original, revalidated
+      on every use, until the preview has been generated (from the object
+      store: a redirect to a presigned URL on S3).
+    """
+    remaining = verify_signature(request)
+    if size not in RENDITION_SIZES:
+        raise HTTPException(status_code=404, detail="Unknown preview size")
+    async with AsyncSessionLocal() as session:
+        meta, event = await load_file(session, file_id)
+        folder = derived_folder(event, meta)
+        original = original_key(event, meta)
+        file_type = meta.file_type or "application/octet-stream"
+
+    headers = {"Cache-Control": immutable_cache(remaining), "Vary": "Accept"}
+    if file_type.startswith("image/"):
+        accept = request.headers.get("accept", "")
+        for ext, _, content_type in RENDITION_FORMATS:
+            path = folder / f"{size}.{ext}"
+            if (content_type == "image/jpeg" or content_type in accept) and path.exists():
+                return file_response(request, path, content_type, headers=headers)
+    elif file_type.startswith("video/") and (folder / "video.mp4").exists():
+        return file_response(request, folder / "video.mp4", "video/mp4", headers=headers)
+
+    return object_store().response(original, file_type, headers={"Cache-Control": "no-cache"}, request=request)
+
+@gallery_router.api_route("/files/{file_id}/download", methods=["GET", "HEAD"])
+async def download_file(request: Request, file_id: int):
+    """
+    Serve the original upload as a download.
+    - Only through a signed link from the photo listing (403 otherwise).
+    - Originals never change, so they are cached until the link expires.
+    - With object storage, redirects to a presigned URL so the bytes come
+      straight from the bucket.
+    """
+    remaining = verify_signature(request)
+    async with AsyncSessionLocal() as session:
+        meta, event = await load_file(session, file_id)
+    return object_store().response(
+        original_key(event, meta),
+        meta.file_type or "application/octet-stream",
+        filename=meta.file_name,
+        headers={"Cache-Control": immutable_cache(remaining)},
+        request=request,
+    )
+
+# ─── Event Archives ─────────────────────────────────────────────────────────
+
+@gallery_router.api_route("/events/{event_id}/download", methods=["GET", "HEAD"])
+async def download_event(request: Request, event_id: int, guest_id: Optional[int] = None):
     """
-    Retrieve photos for a specific event by its ID.
-    - Checks if the event exists in the database.
-    - Returns a placeholder message for now (actual photo retrieval logic can be added later).
+    Download an event's originals as one ZIP, one folder per guest.
+    - Only for the event's host, on a plan that includes downloads.
+    - `guest_id` limits the archive to one guest's uploads.
+    - Built while it streams (no temp files, constant memory); supports
+      Range and If-Range so an interrupted download can be resumed.
     """
-    # Open a database session
-    with Session(engine) as session:
-        # Query the database for the event with the given ID
-        event = session.exec(select(Event).where(Event.id == event_id)).first()
-        if not event:
-            # Raise an HTTP exception if the event is not found
+    user = await resolve_logged_in_user(request)
+    async with AsyncSessionLocal() as session:
+        event = await session.get(Event, event_id)
+        if not event or not user or event.user_id != user.id:
             raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Return a placeholder message (replace with actual photo retrieval logic)
-    return {"message": f"Photos for event {event_id}"}
\ No newline at end of file
+        if not await downloads_allowed(session, event):
+            raise HTTPException(status_code=403, detail="Downloads are not included in this event's plan")
+        archive = await event_archive(session, event, guest_id)
+    return archive_response(request, archive, f"{event.name or event.event_code}.zip")
@@ -4,11 +4,11 @@ from app.template_env import templates  # Jinja2 template environment
 from fastapi.responses import RedirectResponse  # For HTTP redirects
 from app.models import User, Event  # Database models
 from app.db.session import SessionLocal, engine  # Database session utilities
+from app.services.auth import resolve_logged_in_user  # Shared, cached login resolver
+from app.services.event_cache import event_cache  # Hot event lookups by code
 from sqlmodel import select, Session  # ORM for database queries
-import jwt  # For decoding JWT tokens
-import smtplib  # For sending emails
-from email.mime.text import MIMEText  # For constructing email messages
-from app.core.config import EMAIL_FROM, EMAIL_PASSWORD, WEBSITE_NAME, SECRET_KEY, ALGORITHM  # Config variables
+from app.services.email_outbox import enqueue_email, email_outbox  # Background email delivery
+from app.core.config import EMAIL_FROM, WEBSITE_NAME  # Config variables
 from datetime import datetime  # For date and time handling
 from app.models.models import Pricing  # Pricing model
 
@@ -16,24 +16,6 @@ from app.models.models import Pricing  # Pricing model
 page_router = APIRouter()
 auth_router = APIRouter()
 
-# ─── Helper Functions ───────────────────────────────────────────────────────
-
-def get_logged_in_user(request: Request):
-    """
-    Retrieve the currently logged-in user based on the session token in cookies.
-    """
-    token = request.cookies.get("session_token")
-    if not token:
-        return None
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-    except Exception:
-        return None
-    with SessionLocal() as session:
-        user = session.exec(select(User).where(User.id == user_id)).first()
-    return user
-
 # ─── Page Endpoints ─────────────────────────────────────────────────────────
 
 @page_router.get("/how-it-works")
@@ -41,7 +23,7 @@ async def how_it_works(request: Request):
     """
     Render the "How It Works" page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse(
         "how_it_works.html",
         {
@@ -57,7 +39,7 @@ async def pricing_page(request: Request):
     """
     Render the pricing page with available plans.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     with SessionLocal() as session:
         pricing = session.exec(select(Pricing)).all()
     return templates.TemplateResponse("pricing.html", {"request": request, "pricing": pricing, "user": user})
@@ -67,7 +49,7 @@ async def guest_login(request: Request):
     """
     Render the guest login page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("guest_login.html", {"request": request, "user": user})
 
 @page_router.post("/guest-login")
@@ -79,28 +61,25 @@ async def guest_login_post(
     """
     Handle guest login by validating event code and password.
     """
-    with SessionLocal() as session:
-        event = session.exec(
-            select(Event).where(Event.event_code == guest_code, Event.event_password == password)
-        ).first()
-        if event:
-            # Redirect to the upload page for this event
-            return RedirectResponse(
-                url=f"/upload/{event.event_code}/{event.event_password}", status_code=303
-            )
-        else:
-            user = get_logged_in_user(request)
-            return templates.TemplateResponse(
-                "guest_login.html",
-                {"request": request, "user": user, "error": "Invalid event code or password."}
-            )
+    event = await event_cache.lookup(guest_code, password)
+    if event:
+        # Redirect to the upload page for this event
+        return RedirectResponse(
+            url=f"/upload/{event.event_code}/{event.event_password}", status_code=303
+        )
+    else:
+        user = await resolve_logged_in_user(request)
+        return templates.TemplateResponse(
+            "guest_login.html",
+            {"request": request, "user": user, "error": "Invalid event code or password."}
+        )
 
 @page_router.get("/sign-up")
 async def sign_up(request: Request):
     """
     Render the sign-up page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("sign_up.html", {"request": request, "user": user})
 
 @page_router.get("/about")
@@ -108,7 +87,7 @@ async def about(request: Request):
     """
     Render the "About Us" page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("about.html", {"request": request, "user": user})
 
 @page_router.get("/help-center")
@@ -116,7 +95,7 @@ async def help_center(request: Request):
     """
     Render the Help Center page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("help_center.html", {"request": request, "user": user})
 
 @page_router.get("/contact-us")
@@ -124,7 +103,7 @@ async def contact_us_get(request: Request):
     """
     Render the Contact Us page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("contact_us.html", {"request": request, "user": user})
 
 @page_router.post("/contact-us")
@@ -137,10 +116,11 @@ async def contact_us_post(
 ):
     """
     Handle Contact Us form submission.
-    - Sends an email to the site owner.
-    - Sends a thank-you email to the user.
+    - Queues an email to the site owner.
+    - Queues a thank-you email to the user.
+    Both are delivered by the background sender, not during the request.
     """
-    # Send email to site owner
+    # Email to the site owner
     owner_subject = f"Contact Us: {topic} from {full_name}"
     owner_body = f"""
     Name: {full_name}
@@ -149,17 +129,8 @@ async def contact_us_post(
     Message:
     {message}
     """
-    msg = MIMEText(owner_body)
-    msg["Subject"] = owner_subject
-    msg["From"] = EMAIL_FROM
-    msg["To"] = EMAIL_FROM
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_FROM, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_FROM, EMAIL_FROM, msg.as_string())
-
-    # Send thank-you email to user
+    # Thank-you email to the user
     thank_subject = "Thank you for contacting Event Snap"
     thank_body = f"""Hi {full_name},
 
@@ -169,17 +140,14 @@ We have received your message and will get back to you as soon as possible.
 Best regards,
 Event Snap Team
 """
-    thank_msg = MIMEText(thank_body)
-    thank_msg["Subject"] = thank_subject
-    thank_msg["From"] = EMAIL_FROM
-    thank_msg["To"] = email
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_FROM, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_FROM, email, thank_msg.as_string())
+    with SessionLocal() as session:
+        enqueue_email(session, EMAIL_FROM, owner_subject, owner_body)
+        enqueue_email(session, email, thank_subject, thank_body)
+        session.commit()
+    email_outbox.notify()
 
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse(
         "contact_us.html",
         {"request": request, "user": user, "success": "Thank you for contacting us! We have received your message."}
@@ -190,7 +158,7 @@ async def terms_and_conditions(request: Request):
     """
     Render the Terms and Conditions page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse(
         "terms_and_conditions.html",
         {
@@ -207,7 +175,7 @@ async def profile(request: Request):
     """
     Render the user's profile page.
     """
-    user = get_logged_in_user(request)
+    user = await resolve_logged_in_user(request)
     if not user:
         return RedirectResponse(url="/auth/login", status_code=303)
     context = {"request": request, "user": user}
@@ -1,14 +1,22 @@
 # Import necessary modules and libraries
-from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Form, Depends  # FastAPI utilities
+from fastapi import APIRouter, HTTPException, Request, Response  # FastAPI utilities
 from fastapi.templating import Jinja2Templates  # For rendering templates
+from pydantic import BaseModel, Field  # Direct upload request bodies
+from sqlalchemy import delete  # Dropping abandoned direct uploads
 from sqlmodel import Session, select  # ORM for database queries
-from app.models import Event, FileMetadata, Guest  # Database models
-from app.db.session import engine, get_session  # Database engine for creating sessions
-from app.utils.token import validate_token  # Token validation utility
+from sqlmodel.ext.asyncio.session import AsyncSession  # Non-blocking sessions
+from app.models import Event, FileMetadata, Guest, UploadSession  # Database models
+from app.db.session import AsyncSessionLocal  # Async session factory
+from app.services.ingest import StreamingMultipartReader, IngestedFile, IngestError, UploadTooLarge, safe_filename  # Streaming upload ingest
+from app.services.media_jobs import enqueue_media_jobs, media_worker  # Background media processing
+from app.services.event_cache import event_cache  # Hot event lookups by code
+from app.services.storage import incoming_path, partial_upload_path, direct_upload_key, store_blob, reuse_blobs, hash_file, find_duplicate  # Blob storage
+from app.services.object_store import ObjectStoreError, object_store  # Durable file storage
+from app.services.zip_stream import archive_response, downloads_allowed, event_archive  # Streaming ZIP downloads
+from app.services.quota import EventQuota, QuotaExceeded, charge, event_quota, release  # Storage limits
 from pathlib import Path  # File path handling
-import aiofiles, os, subprocess, shutil, json  # File and subprocess utilities
-from datetime import datetime  # Date and time handling
-from PIL import Image, ExifTags  # For extracting image metadata
+import aiofiles, asyncio, os, base64, binascii, re, uuid  # File, async and encoding utilities
+from datetime import datetime, timezone  # Date and time handling
 from app.template_env import templates  # Jinja2 template environment
 
 # Initialize the router for upload-related endpoints
@@ -17,73 +25,130 @@ templates = Jinja2Templates(directory="app/templates")
 
 # ─── Helper Functions ───────────────────────────────────────────────────────
 
-def extract_photo_time(path: str) -> datetime | None:
+async def find_event(event_code: str, event_password: str) -> Event:
     """
-    Extract the capture time from an image's EXIF metadata.
+    Look up an event by code and password or raise a 404.
+    - Served from `event_cache`, so a crowd scanning the same QR code costs
+      one query per cache period. The event is a detached snapshot.
+    - Events past their plan's retention window get a 410.
     """
-    try:
-        img = Image.open(path)
-        exif = img._getexif() or {}
-        tag_map = {ExifTags.TAGS.get(k, k): v for k, v in exif.items()}
-        dt = tag_map.get("DateTimeOriginal") or tag_map.get("DateTime")
-        return datetime.strptime(dt, "%Y:%m:%d %H:%M:%S") if dt else None
-    except:
-        return None
+    event = await event_cache.lookup(event_code, event_password)
+    if not event:
+        raise HTTPException(status_code=404, detail="Invalid event code or password")
+    if event.expired_at:
+        raise HTTPException(status_code=410, detail="This event has expired and its uploads have been removed")
+    return event
 
-def extract_video_time(path: str) -> datetime | None:
+def check_file_type(quota: EventQuota, content_type: str):
     """
-    Extract the creation time from a video's metadata using ffprobe.
+    Reject videos on plans without video uploads.
     """
-    if shutil.which("ffprobe") is None:
-        return None
-    try:
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_entries", "format_tags=creation_time", path
-        ]
-        proc = subprocess.run(cmd, capture_output=True, text=True)
-        if proc.returncode != 0:
-            return None
-        info = json.loads(proc.stdout or "{}")
-        ts = info.get("format", {}).get("tags", {}).get("creation_time")
-        if not ts:
-            return None
-        ts = ts.rstrip("Z")
-        return datetime.fromisoformat(ts)
-    except Exception:
-        return None
-
-def transcode_to_mp4(input_path: str, output_path: str) -> bool:
-    """
-    Transcode a video file to MP4 format using ffmpeg.
-    """
-    cmd = [
-        "ffmpeg", "-i", input_path,
-        "-c:v", "libx264", "-c:a", "aac", "-strict", "experimental",
-        "-movflags", "+faststart",
-        "-y",  # Overwrite output
-        output_path
-    ]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return result.returncode == 0
+    if content_type.startswith("video/") and not quota.allow_video:
+        raise HTTPException(status_code=403, detail="Video uploads are not included in this event's plan")
+
+def get_or_create_guest(session: Session, event: Event, guest_email: str) -> Guest:
+    """
+    Find the guest for this event by email, creating the entry if needed.
+    A new guest is only flushed; it is committed with the caller's transaction.
+    """
+    guest = session.exec(
+        select(Guest).where(
+            Guest.guest_email == guest_email,
+            Guest.event_id == event.id
+        )
+    ).first()
+    if not guest:
+        guest = Guest(guest_email=guest_email, event_id=event.id)
+        session.add(guest)
+        session.flush()  # Assign guest.id without ending the transaction
+    return guest
+
+def new_uploads(session: Session, event: Event, files: list[IngestedFile]) -> list[IngestedFile]:
+    """
+    The received files this event does not have yet.
+    - Files whose content the event already has, or that repeat earlier in
+      the batch, are deleted from scratch space.
+    """
+    known = set(session.exec(
+        select(FileMetadata.content_hash).where(
+            FileMetadata.event_id == event.id,
+            FileMetadata.content_hash.in_({f.sha256 for f in files})
+        )
+    ).all())
+
+    new_files = []
+    for f in files:
+        if f.sha256 in known:
+            os.remove(f.path)
+            continue
+        known.add(f.sha256)
+        new_files.append(f)
+    return new_files
+
+async def store_uploads(files: list[IngestedFile]):
+    """
+    Move received files into the blob store, off the event loop and outside
+    any transaction: with object storage this uploads them to the bucket.
+    - Blobs that retention queued for deletion are kept for these files.
+    """
+    if not files:
+        return
+    async with AsyncSessionLocal() as session:
+        await session.run_sync(reuse_blobs, {f.sha256 for f in files})
+        await session.commit()
+    for f in files:
+        await asyncio.to_thread(store_blob, f.path, f.sha256, f.content_type)
+
+def save_uploads(
+    session: Session,
+    event: Event,
+    guest: Guest,
+    files: list[IngestedFile],
+    guest_device: str | None,
+    limit_bytes: int | None = None,
+) -> list[FileMetadata]:
+    """
+    Add metadata rows and processing jobs for stored files (see
+    `new_uploads` and `store_uploads`) to the session as one batch.
+    - The files are charged to the event's storage in the same transaction;
+      if they would take it past `limit_bytes`, QuotaExceeded is raised and
+      nothing is saved. Their blobs stay in the store, where an upload of
+      the same content reuses them.
+    - Nothing is committed here: callers commit once per request, so a
+      150-photo upload costs one transaction instead of 150.
+    - Capture time is filled in later by the media job worker.
+    """
+    charge(session, event, sum(f.size for f in files), len(files), limit_bytes)
+
+    rows = []
+    for f in files:
+        rows.append(FileMetadata(
+            file_name=safe_filename(f.filename),
+            file_type=f.content_type,
+            guest_id=guest.id,
+            event_id=event.id,
+            file_size=f.size,
+            guest_device=guest_device,
+            content_hash=f.sha256,
+        ))
+
+    session.add_all(rows)
+    session.flush()  # One batched INSERT; assigns the ids the jobs need
+    for meta in rows:
+        enqueue_media_jobs(session, meta)
+    return rows
 
 # ─── Upload Endpoints ───────────────────────────────────────────────────────
 
+MULTIPART_SLACK_BYTES = 1024 * 1024  # Allowance for form fields and part headers around the files
+
 @upload_router.get("/{event_code}/{event_password}")
 async def guest_upload_form(request: Request, event_code: str, event_password: str):
     """
     Render the guest upload form for a specific event.
     """
-    with Session(engine) as session:
-        # Validate the event code and password
-        event = session.exec(
-            select(Event).where(
-                Event.event_code == event_code,
-                Event.event_password == event_password
-            )
-        ).first()
-        if not event:
-            raise HTTPException(status_code=404, detail="Invalid event code or password")
+    # Validate the event code and password
+    event = await find_event(event_code, event_password)
     return templates.TemplateResponse(
         "upload_form.html",
         {
@@ -98,77 +163,58 @@ async def guest_upload(
     request: Request,
     event_code: str,
     event_password: str,
-    guest_email: str = Form(...),
-    file_upload: list[UploadFile] = File(...),
-    guest_device: str = Form(None)
 ):
     """
     Handle file uploads from guests for a specific event.
     - Validates the event and guest information.
-    - Saves uploaded files and metadata to the database.
+    - Enforces the event's plan: videos only where allowed, and no more
+      bytes than the storage left. A body that is clearly too big is
+      refused before it is read; otherwise streaming stops as soon as the
+      files pass the space left. The quota is read in a short session of
+      its own, so no connection is held while the body streams in.
+    - Streams each file to scratch space (no in-memory or spooled copy),
+      hashing it on the way so repeat uploads are stored once, then moves
+      the new ones into the blob store.
+    - Saves file metadata to the database, skipping files this event already has.
     """
-    from app.core.config import STORAGE_ROOT
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        quota = await event_quota(session, event)  # Closed again before the body is read
+    remaining = quota.remaining_bytes
+    content_length = request.headers.get("content-length", "")
+    if remaining is not None and content_length.isdigit() and int(content_length) > remaining + MULTIPART_SLACK_BYTES:
+        raise HTTPException(status_code=413, detail="This event does not have enough storage left for the upload")
 
-    with Session(engine) as session:
-        # Validate the event
-        event = session.exec(
-            select(Event).where(
-                Event.event_code == event_code,
-                Event.event_password == event_password
-            )
-        ).first()
-        if not event:
-            raise HTTPException(status_code=404, detail="Invalid event code or password")
-
-        # Find or create a guest entry
-        guest = session.exec(
-            select(Guest).where(
-                Guest.guest_email == guest_email,
-                Guest.event_id == event.id
-            )
-        ).first()
-        if not guest:
-            guest = Guest(guest_email=guest_email, event_id=event.id)
-            session.add(guest)
-            session.commit()
-            session.refresh(guest)
-
-        # Ensure storage directories exist
-        event_folder = Path(STORAGE_ROOT) / event.storage_path
-        event_folder.mkdir(parents=True, exist_ok=True)
-        guest_folder = event_folder / str(guest.id)
-        guest_folder.mkdir(parents=True, exist_ok=True)
-
-        # Process uploaded files
-        for upload in file_upload:
-            dest = guest_folder / upload.filename
-            async with aiofiles.open(dest, "wb") as buf:
-                await buf.write(await upload.read())
-
-            full_path = str(dest)
-            capture_time = None
-            file_name_to_store = upload.filename
-            file_type_to_store = upload.content_type
-
-            # Extract metadata based on file type
-            if upload.content_type.startswith("image/"):
-                capture_time = extract_photo_time(full_path)
-            elif upload.content_type.startswith("video/"):
-                capture_time = extract_video_time(full_path)
-
-            # Save file metadata to the database
-            size = os.path.getsize(full_path)
-            meta = FileMetadata(
-                file_name=file_name_to_store,
-                file_type=file_type_to_store,
-                guest_id=guest.id,
-                event_id=event.id,
-                file_size=size,
-                guest_device=guest_device,
-                capture_time=capture_time
-            )
-            session.add(meta)
-            session.commit()
+    async def resolve_destination(filename: str, content_type: str, fields: dict) -> Path:
+        check_file_type(quota, content_type)
+        return incoming_path(uuid.uuid4().hex)
+
+    reader = StreamingMultipartReader(request, resolve_destination, max_file_bytes=remaining)
+    try:
+        fields, uploads = await reader.read()
+        if not uploads:
+            raise IngestError("No files were uploaded")
+        if not fields.get("guest_email"):
+            raise IngestError("guest_email is required")
+    except IngestError as exc:
+        for upload in reader.files:
+            if upload.path.exists():
+                os.remove(upload.path)
+        raise HTTPException(status_code=413 if isinstance(exc, UploadTooLarge) else 400, detail=str(exc))
+
+    async with AsyncSessionLocal() as session:
+        new_files = await session.run_sync(new_uploads, event, uploads)
+        await store_uploads(new_files)
+        guest = await session.run_sync(get_or_create_guest, event, fields["guest_email"])
+        guest_device = fields.get("guest_device")
+
+        # Save the guest, metadata, jobs and storage charge for every new file in one transaction
+        try:
+            await session.run_sync(save_uploads, event, guest, new_files, guest_device, quota.limit_bytes)
+        except QuotaExceeded as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        await session.commit()
+    media_worker.notify()
 
     return templates.TemplateResponse(
         "upload_form.html",
@@ -180,19 +226,11 @@ async def upload_page(
     request: Request,
     code: str,
     password: str,
-    session: Session = Depends(get_session),
 ):
     """
     Render the upload page for an event, including a welcome message.
     """
-    evt = session.exec(
-        select(Event).where(
-            Event.event_code == code,
-            Event.event_password == password
-        )
-    ).first()
-    if not evt:
-        raise HTTPException(404, "Invalid event code or password")
+    evt = await find_event(code, password)
 
     return templates.TemplateResponse(
         "upload.html",
@@ -201,4 +239,417 @@ async def upload_page(
             "event": evt,
             "welcome_message": evt.welcome_message or "",
         },
-    )
\ No newline at end of file
+    )
+
+@upload_router.api_route("/{event_code}/{event_password}/download", methods=["GET", "HEAD"])
+async def guest_download(request: Request, event_code: str, event_password: str, guest_email: str):
+    """
+    Download a guest's own uploads as one ZIP.
+    - Only on a plan that includes downloads.
+    - Streamed like the host's archive, with Range support for resuming.
+    """
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        if not await downloads_allowed(session, event):
+            raise HTTPException(status_code=403, detail="Downloads are not included in this event's plan")
+        guest = (await session.exec(
+            select(Guest).where(Guest.guest_email == guest_email, Guest.event_id == event.id)
+        )).first()
+        if not guest:
+            raise HTTPException(status_code=404, detail="No uploads found for this guest")
+        archive = await event_archive(session, event, guest.id)
+    return archive_response(request, archive, f"{event.name or event.event_code} - my uploads.zip")
+
+# ─── Resumable Uploads (tus-style) ──────────────────────────────────────────
+#
+# POST  /upload/{code}/{password}/resumable        → create, returns Location
+# HEAD  /upload/{code}/{password}/resumable/{id}   → current Upload-Offset
+# PATCH /upload/{code}/{password}/resumable/{id}   → append bytes at Upload-Offset
+#
+# Bytes are appended to STORAGE_ROOT/<storage_path>/.partial/<id> and the file
+# is moved into the blob store once Upload-Offset reaches Upload-Length.
+
+TUS_VERSION = "1.0.0"
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+def parse_upload_metadata(header: str) -> dict[str, str]:
+    """
+    Decode a tus `Upload-Metadata` header ("key base64,key base64").
+    """
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value).decode("utf-8") if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for '{key}'")
+    return metadata
+
+async def find_upload_session(session: AsyncSession, event: Event, upload_id: str) -> UploadSession:
+    """
+    Look up a resumable upload belonging to this event or raise a 404.
+    """
+    upload = await session.get(UploadSession, upload_id)
+    if not upload or upload.event_id != event.id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+@upload_router.post("/{event_code}/{event_password}/resumable", status_code=201)
+async def create_resumable_upload(request: Request, event_code: str, event_password: str):
+    """
+    Start a resumable upload.
+    - Requires `Upload-Length` and an `Upload-Metadata` header carrying
+      `filename` and `guest_email` (optionally `filetype`, `guest_device`
+      and the file's hex `sha256`).
+    - Returns the upload URL in `Location`.
+    - If `sha256` matches a file this event already has, answers 200 with
+      `Upload-Offset` equal to `Upload-Length` so the client can skip it.
+    - Otherwise `Upload-Length` bytes of the event's storage are reserved
+      up front (413 if they do not fit), so no byte is received for an
+      upload that could not be kept.
+    """
+    try:
+        upload_length = int(request.headers["upload-length"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="A valid Upload-Length header is required")
+    if upload_length < 0:
+        raise HTTPException(status_code=400, detail="A valid Upload-Length header is required")
+
+    metadata = parse_upload_metadata(request.headers.get("upload-metadata", ""))
+    if not metadata.get("filename") or not metadata.get("guest_email"):
+        raise HTTPException(status_code=400, detail="Upload-Metadata must include filename and guest_email")
+
+    content_hash = metadata.get("sha256", "").lower()
+    if content_hash and not SHA256_PATTERN.fullmatch(content_hash):
+        raise HTTPException(status_code=400, detail="Upload-Metadata sha256 must be a hex SHA-256 digest")
+
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        if content_hash and await session.run_sync(find_duplicate, event.id, content_hash):
+            return Response(
+                status_code=200,
+                headers={"Upload-Offset": str(upload_length), "Tus-Resumable": TUS_VERSION},
+            )
+        quota = await event_quota(session, event)
+        check_file_type(quota, metadata.get("filetype", ""))
+        try:
+            await session.run_sync(charge, event, upload_length, 0, quota.limit_bytes)
+        except QuotaExceeded as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        guest = await session.run_sync(get_or_create_guest, event, metadata["guest_email"])
+
+        upload = UploadSession(
+            id=uuid.uuid4().hex,
+            event_id=event.id,
+            guest_id=guest.id,
+            file_name=safe_filename(metadata["filename"]),
+            file_type=metadata.get("filetype") or "application/octet-stream",
+            guest_device=metadata.get("guest_device"),
+            upload_length=upload_length,
+        )
+        partial = partial_upload_path(event, upload.id)
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        partial.touch()
+        session.add(upload)
+        await session.commit()
+
+        location = f"{request.url.path.rstrip('/')}/{upload.id}"
+    return Response(
+        status_code=201,
+        headers={"Location": location, "Upload-Offset": "0", "Tus-Resumable": TUS_VERSION},
+    )
+
+@upload_router.head("/{event_code}/{event_password}/resumable/{upload_id}")
+async def resumable_upload_offset(event_code: str, event_password: str, upload_id: str):
+    """
+    Report how many bytes of a resumable upload the server has stored.
+    """
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        upload = await find_upload_session(session, event, upload_id)
+        return Response(
+            status_code=200,
+            headers={
+                "Upload-Offset": str(upload.upload_offset),
+                "Upload-Length": str(upload.upload_length),
+                "Tus-Resumable": TUS_VERSION,
+                "Cache-Control": "no-store",
+            },
+        )
+
+@upload_router.patch("/{event_code}/{event_password}/resumable/{upload_id}")
+async def resumable_upload_chunk(request: Request, event_code: str, event_password: str, upload_id: str):
+    """
+    Append a chunk to a resumable upload.
+    - `Upload-Offset` must match the stored offset (409 otherwise).
+    - Bytes received before a dropped connection are kept, so the client
+      can ask for the offset with HEAD and carry on from there.
+    - When the last byte arrives the file is moved into the blob store and
+      its metadata is saved (unless the event already has the same content).
+    """
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    try:
+        client_offset = int(request.headers["upload-offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="A valid Upload-Offset header is required")
+
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        upload = await find_upload_session(session, event, upload_id)  # Closed again before the chunk is read
+    if client_offset != upload.upload_offset:
+        raise HTTPException(status_code=409, detail="Upload-Offset does not match the server offset")
+
+    partial = partial_upload_path(event, upload.id)
+    if not partial.exists():
+        raise HTTPException(status_code=410, detail="Upload has expired")
+    # Discard bytes from an earlier request that were written but never acknowledged
+    if partial.stat().st_size != upload.upload_offset:
+        os.truncate(partial, upload.upload_offset)
+
+    received = 0
+    try:
+        async with aiofiles.open(partial, "ab") as out:
+            async for chunk in request.stream():
+                if upload.upload_offset + received + len(chunk) > upload.upload_length:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds Upload-Length")
+                await out.write(chunk)
+                received += len(chunk)
+    finally:
+        # Acknowledge whatever made it to disk, even if the connection dropped
+        async with AsyncSessionLocal() as session:
+            upload.upload_offset += received
+            upload.updated_at = datetime.now(timezone.utc)
+            session.add(upload)
+            await session.commit()
+
+    offset = upload.upload_offset
+    if offset == upload.upload_length:
+        async with AsyncSessionLocal() as session:
+            session.add(upload)
+            guest = await session.get(Guest, upload.guest_id)
+            # Chunks arrived over several requests, so hash the assembled file once here
+            content_hash = await asyncio.to_thread(hash_file, partial)
+            assembled = IngestedFile(
+                "", upload.file_name, upload.file_type, partial, upload.upload_length, content_hash
+            )
+            new_files = await session.run_sync(new_uploads, event, [assembled])
+            await store_uploads(new_files)
+            # Swap the reservation for the stored file in the same transaction
+            quota = await event_quota(session, event)
+            await session.run_sync(release, event, upload.upload_length, 0)
+            try:
+                await session.run_sync(save_uploads, event, guest, new_files, upload.guest_device, quota.limit_bytes)
+            except QuotaExceeded as exc:
+                raise HTTPException(status_code=413, detail=str(exc))
+            await session.delete(upload)
+            await session.commit()
+        media_worker.notify()
+
+    return Response(
+        status_code=204,
+        headers={"Upload-Offset": str(offset), "Tus-Resumable": TUS_VERSION},
+    )
+
+# ─── Direct Uploads (object storage) ────────────────────────────────────────
+#
+# POST /upload/{code}/{password}/direct                → start, returns the upload's status
+# GET  /upload/{code}/{password}/direct/{id}           → status, with fresh URLs for the parts still to send
+# POST /upload/{code}/{password}/direct/{id}/complete  → assemble the parts and save the file
+#
+# With an S3-compatible store the client PUTs each part of the file to a
+# presigned URL, so the bytes go straight to the bucket and never through
+# this server. Without one, starting answers 404 and clients fall back to
+# the resumable upload above.
+
+class DirectUploadStart(BaseModel):
+    filename: str
+    size: int = Field(ge=0)  # Bytes; reserved from the event's storage
+    guest_email: str
+    filetype: str = ""
+    guest_device: str | None = None
+    sha256: str = ""  # Hex SHA-256; lets the server skip a file the event already has
+
+def part_layout(upload: UploadSession) -> tuple[int, int]:
+    """
+    (part size, number of parts) of a direct upload.
+    """
+    part_size = object_store().part_size_for(upload.upload_length)
+    return part_size, max(1, -(-upload.upload_length // part_size))
+
+def direct_upload_status(upload: UploadSession, location: str, done: dict[int, str]) -> dict:
+    """
+    What a client needs to (re)send a direct upload: the parts already
+    stored and a presigned URL for each of the others.
+    """
+    store = object_store()
+    part_size, count = part_layout(upload)
+    return {
+        "url": location,
+        "part_size": part_size,
+        "parts": [
+            {
+                "part_number": n,
+                "etag": done.get(n),
+                "url": None if n in done else store.part_url(upload.storage_key, upload.multipart_id, n),
+            }
+            for n in range(1, count + 1)
+        ],
+    }
+
+async def find_direct_upload(session: AsyncSession, event: Event, upload_id: str) -> UploadSession:
+    """
+    Look up a direct upload belonging to this event or raise a 404.
+    """
+    upload = await find_upload_session(session, event, upload_id)
+    if not upload.multipart_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+def save_direct_upload(session: Session, event: Event, upload: UploadSession) -> FileMetadata:
+    """
+    Add the metadata row and processing jobs for a completed direct upload.
+    Its bytes were reserved when it started, so only the file is counted.
+    - Raises QuotaExceeded if the event's counter row is gone (the event
+      expired or its owner was deleted while the parts were uploading).
+    """
+    charge(session, event, 0, 1, None)
+    meta = FileMetadata(
+        file_name=upload.file_name,
+        file_type=upload.file_type,
+        guest_id=upload.guest_id,
+        event_id=event.id,
+        file_size=upload.upload_length,
+        guest_device=upload.guest_device,
+        storage_key=upload.storage_key,
+    )
+    session.add(meta)
+    session.flush()
+    enqueue_media_jobs(session, meta)
+    return meta
+
+@upload_router.post("/{event_code}/{event_password}/direct", status_code=201)
+async def create_direct_upload(
+    request: Request,
+    response: Response,
+    event_code: str,
+    event_password: str,
+    body: DirectUploadStart,
+):
+    """
+    Start an upload straight to object storage.
+    - 404 when files are kept on this server's disk.
+    - As with a resumable upload, a `sha256` the event already has answers
+      200 with `duplicate`, and `size` bytes of the event's storage are
+      reserved up front (413 if they do not fit).
+    - Returns the status URL, the part size and a presigned URL per part.
+    """
+    store = object_store()
+    if not store.direct_uploads:
+        raise HTTPException(status_code=404, detail="Direct uploads are not available")
+    content_hash = body.sha256.lower()
+    if content_hash and not SHA256_PATTERN.fullmatch(content_hash):
+        raise HTTPException(status_code=400, detail="sha256 must be a hex SHA-256 digest")
+
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        if content_hash and await session.run_sync(find_duplicate, event.id, content_hash):
+            response.status_code = 200
+            return {"duplicate": True}
+        quota = await event_quota(session, event)
+        check_file_type(quota, body.filetype)
+        if quota.remaining_bytes is not None and body.size > quota.remaining_bytes:
+            raise HTTPException(status_code=413, detail="This event does not have enough storage left for the upload")
+
+        upload_id = uuid.uuid4().hex
+        key = direct_upload_key(event, upload_id)
+        file_type = body.filetype or "application/octet-stream"
+        # Started before the reservation, so no write lock is held across the request
+        multipart_id = await asyncio.to_thread(store.create_multipart, key, file_type)
+        try:
+            await session.run_sync(charge, event, body.size, 0, quota.limit_bytes)
+        except QuotaExceeded as exc:
+            await session.rollback()
+            await asyncio.to_thread(store.abort_multipart, key, multipart_id)
+            raise HTTPException(status_code=413, detail=str(exc))
+        guest = await session.run_sync(get_or_create_guest, event, body.guest_email)
+
+        upload = UploadSession(
+            id=upload_id,
+            event_id=event.id,
+            guest_id=guest.id,
+            file_name=safe_filename(body.filename),
+            file_type=file_type,
+            guest_device=body.guest_device,
+            upload_length=body.size,
+            storage_key=key,
+            multipart_id=multipart_id,
+        )
+        session.add(upload)
+        await session.commit()
+
+    return direct_upload_status(upload, f"{request.url.path.rstrip('/')}/{upload.id}", {})
+
+@upload_router.get("/{event_code}/{event_password}/direct/{upload_id}")
+async def get_direct_upload(request: Request, event_code: str, event_password: str, upload_id: str):
+    """
+    Status of a direct upload, for resuming: the parts already stored and
+    fresh presigned URLs for the rest.
+    """
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        upload = await find_direct_upload(session, event, upload_id)
+    try:
+        done = await asyncio.to_thread(object_store().uploaded_parts, upload.storage_key, upload.multipart_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Upload has expired")
+    return direct_upload_status(upload, request.url.path.rstrip("/"), done)
+
+@upload_router.post("/{event_code}/{event_password}/direct/{upload_id}/complete", status_code=204)
+async def complete_direct_upload(event_code: str, event_password: str, upload_id: str):
+    """
+    Finish a direct upload once every part is stored.
+    - 409 while parts are still missing.
+    - The assembled file must be exactly the announced size; otherwise it
+      is dropped with its reservation (400).
+    - The reservation becomes the file's storage use, and the file goes
+      through the same media processing as any other upload.
+    - If the event's storage was dropped meanwhile (expired, or its owner
+      deleted), the file is removed again and the answer is 410.
+    """
+    store = object_store()
+    event = await find_event(event_code, event_password)
+    async with AsyncSessionLocal() as session:
+        upload = await find_direct_upload(session, event, upload_id)
+        key = upload.storage_key
+        try:
+            parts = await asyncio.to_thread(store.uploaded_parts, key, upload.multipart_id)
+        except FileNotFoundError:
+            parts = None  # Assembled by an earlier attempt that failed afterwards, or aborted
+        if parts is not None:
+            if len(parts) < part_layout(upload)[1]:
+                raise HTTPException(status_code=409, detail="Some parts have not been uploaded yet")
+            try:
+                await asyncio.to_thread(store.complete_multipart, key, upload.multipart_id, parts)
+            except ObjectStoreError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+
+        if await asyncio.to_thread(store.size, key) != upload.upload_length:
+            await asyncio.to_thread(store.delete, key)
+            await session.run_sync(release, event, upload.upload_length, 0)
+            await session.delete(upload)
+            await session.commit()
+            raise HTTPException(status_code=400, detail="The uploaded parts do not add up to the announced size")
+
+        try:
+            await session.run_sync(save_direct_upload, event, upload)
+        except QuotaExceeded:
+            await session.rollback()
+            await asyncio.to_thread(store.delete, key)
+            await session.execute(delete(UploadSession).where(UploadSession.id == upload_id))
+            await session.commit()
+            raise HTTPException(status_code=410, detail="This event no longer accepts uploads")
+        await session.delete(upload)
+        await session.commit()
+        media_worker.notify()
+    return Response(status_code=204)
@@ -14,10 +14,32 @@ WEBSITE_DESCRIPTION = os.getenv(
 )  # Default website description
 
 # Storage settings
-STORAGE_ROOT = "/media/devmon/Elements/EventPhotoUploader/Events"  # Root directory for storing event files
+STORAGE_ROOT = os.getenv(
+    "STORAGE_ROOT", "/media/devmon/Elements/EventPhotoUploader/Events"
+)  # Local files: scratch space and previews, plus originals and banners with the local backend
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # Where originals and banners live: "local" or "s3"
+# S3-compatible object storage (AWS, MinIO, ...), used when STORAGE_BACKEND is "s3"; needs boto3.
+# Browsers upload to the bucket directly, so its CORS rules must allow PUT from the site.
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_PREFIX = os.getenv("S3_PREFIX", "")  # Key prefix inside the bucket, e.g. "events/"
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # Unset for AWS; e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID") or None  # Unset to use boto3's usual credential lookup
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY") or None
+S3_URL_EXPIRE_SECONDS = int(os.getenv("S3_URL_EXPIRE_SECONDS", "3600"))  # Lifetime of presigned upload/download URLs
+S3_PART_SIZE_MB = int(os.getenv("S3_PART_SIZE_MB", "16"))  # Multipart part size; S3's minimum is 5
 
 # Database settings
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")  # Database connection URL
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"  # Log every SQL statement
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "0"))  # Pooled connections per engine; 0 picks a default for the backend
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Extra connections a server database may open under load
+# SQLite tuning, applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # WAL lets readers run alongside the writer
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # Safe with WAL; fsyncs at checkpoints only
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))  # How long a writer waits for the lock
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # Bytes of the file read through mmap
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)))  # Page cache; negative means KiB (64 MiB)
 
 # ─── Social Media Links ────────────────────────────────────────────────────
 
@@ -31,6 +53,21 @@ TIKTOK_URL = "https://www.tiktok.com/"
 # Email settings for sending notifications
 EMAIL_FROM = "testingeventsnap@gmail.com"  # Sender email address
 EMAIL_PASSWORD = "auoa rdig arpx jjsj"  # App-specific password for the email account
+# Outgoing mail server; point at a local SMTP stand-in for testing
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"  # Upgrade the connection before logging in
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", EMAIL_FROM)
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", EMAIL_PASSWORD)  # Empty skips login
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))  # Per-command socket timeout
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))  # Idle time before the pooled connection is closed
+# Background sender draining the email outbox table
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))  # Messages sent per connection checkout
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))  # Tries before a message is marked failed
+EMAIL_RETRY_SECONDS = int(os.getenv("EMAIL_RETRY_SECONDS", "30"))  # Base delay, doubled per attempt
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "10"))  # Idle poll interval
+EMAIL_LEASE_SECONDS = float(os.getenv("EMAIL_LEASE_SECONDS", "600"))  # Messages left "sending" without a lease renewal this long are re-queued
+EMAIL_KEEP_DAYS = float(os.getenv("EMAIL_KEEP_DAYS", "7"))  # Sent messages kept before the sweeper removes them
 
 # ─── Security Configuration ────────────────────────────────────────────────
 
@@ -40,6 +77,26 @@ SECRET_KEY = os.getenv(
 )  # Secret key for signing tokens
 ALGORITHM = "HS256"  # Algorithm used for token encoding
 TOKEN_EXPIRE_SECONDS = 3600  # Token expiration time in seconds (1 hour)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))  # How long a resolved login is reused
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))  # Session tokens kept in the login cache
+# "database": check every token against its UserSession row
+# "stateless": trust the signed token's expiry and only consult the revocation list
+SESSION_VALIDATION = os.getenv("SESSION_VALIDATION", "database")
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))  # How often other workers' revocations are read
+REVOCATION_OVERLAP_SECONDS = float(os.getenv("REVOCATION_OVERLAP_SECONDS", "60"))  # Recent revocations re-read on each refresh, for rows that commit late
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Work factor for new password hashes
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))  # bcrypt calls run at once
+
+# ─── Event Codes ───────────────────────────────────────────────────────────
+
+# Codes guests type in; handed out from a pre-screened pool table
+EVENT_CODE_LENGTH = int(os.getenv("EVENT_CODE_LENGTH", "4"))  # Base code length
+EVENT_CODE_POOL_SIZE = int(os.getenv("EVENT_CODE_POOL_SIZE", "500"))  # Free codes kept ready
+EVENT_CODE_WIDEN_AT = float(os.getenv("EVENT_CODE_WIDEN_AT", "0.5"))  # Share of a length's codes in use before codes get longer
+# In-process cache of events by code for the guest entry points
+EVENT_CACHE_TTL_SECONDS = float(os.getenv("EVENT_CACHE_TTL_SECONDS", "60"))  # How long a looked-up event is reused
+EVENT_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("EVENT_CACHE_NEGATIVE_TTL_SECONDS", "30"))  # How long an unknown code stays unknown
+EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", "4096"))  # Codes kept in the event cache
 
 # ─── Application Base URL ──────────────────────────────────────────────────
 
@@ -59,4 +116,48 @@ TEST_PRO_USER_EMAIL = "pro@test.com"
 TEST_PRO_USER_PASSWORD = "Pro123!?"
 
 TEST_PREMIUM_USER_EMAIL = "premium@test.com"
-TEST_PREMIUM_USER_PASSWORD = "Premium123!?"
\ No newline at end of file
+TEST_PREMIUM_USER_PASSWORD = "Premium123!?"
+
+# ─── Media Processing ──────────────────────────────────────────────────────
+
+# Background worker that extracts metadata and transcodes uploads
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))  # Worker processes / jobs run at once
+MEDIA_JOB_MAX_ATTEMPTS = int(os.getenv("MEDIA_JOB_MAX_ATTEMPTS", "3"))  # Tries before a job is marked failed
+MEDIA_JOB_RETRY_SECONDS = int(os.getenv("MEDIA_JOB_RETRY_SECONDS", "30"))  # Base delay, doubled per attempt
+MEDIA_JOB_POLL_SECONDS = float(os.getenv("MEDIA_JOB_POLL_SECONDS", "5"))  # Idle poll interval
+MEDIA_JOB_LEASE_SECONDS = float(os.getenv("MEDIA_JOB_LEASE_SECONDS", "300"))  # Running jobs not renewed for this long are re-queued
+FFMPEG_CONCURRENCY = int(os.getenv("FFMPEG_CONCURRENCY", "2"))  # ffmpeg/ffprobe processes allowed at once
+FFPROBE_TIMEOUT_SECONDS = float(os.getenv("FFPROBE_TIMEOUT_SECONDS", "30"))  # Per-call limit for probing
+FFMPEG_TIMEOUT_SECONDS = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "1800"))  # Per-call limit for transcoding
+
+# ─── Media Delivery ────────────────────────────────────────────────────────
+
+# Signed preview/download links handed out by the gallery
+MEDIA_URL_TTL_SECONDS = int(os.getenv("MEDIA_URL_TTL_SECONDS", "3600"))  # Shortest lifetime of a signed link
+MEDIA_URL_WINDOW_SECONDS = int(os.getenv("MEDIA_URL_WINDOW_SECONDS", "900"))  # Expiries round up to this, keeping links cacheable
+# Hand large local files to the reverse proxy, which sends them with sendfile():
+# "x-accel" for nginx (needs an `internal` location aliased to STORAGE_ROOT),
+# "x-sendfile" for Apache/lighttpd; empty streams them from the app itself
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "")
+MEDIA_SENDFILE_PREFIX = os.getenv("MEDIA_SENDFILE_PREFIX", "/_stored/")  # The nginx internal location
+MEDIA_SENDFILE_MIN_MB = int(os.getenv("MEDIA_SENDFILE_MIN_MB", "1"))  # Smaller files are sent by the app
+
+# ─── Maintenance ───────────────────────────────────────────────────────────
+
+# Periodic cleanup of expired sessions and abandoned uploads
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "900"))  # Time between sweeps
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "500"))  # Rows deleted per transaction
+STALE_UPLOAD_HOURS = float(os.getenv("STALE_UPLOAD_HOURS", "48"))  # Idle time before a resumable upload is dropped
+STORAGE_RECONCILE_SECONDS = float(os.getenv("STORAGE_RECONCILE_SECONDS", "3600"))  # Time between storage counter checks
+
+# ─── Retention ─────────────────────────────────────────────────────────────
+
+# Removes the files of events older than their plan's storage_duration (days)
+# "dry-run" only logs what would go; "delete" removes the files; "archive"
+# first keeps each event as one ZIP under the store's .archive/ folder; "off" disables it
+RETENTION_MODE = os.getenv("RETENTION_MODE", "dry-run")
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))  # Time between retention runs
+RETENTION_BATCH_FILES = int(os.getenv("RETENTION_BATCH_FILES", "100"))  # Files removed per batch
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.5"))  # Idle time between batches, leaving disk I/O to uploads
+RETENTION_ARCHIVE_MB_PER_SECOND = float(os.getenv("RETENTION_ARCHIVE_MB_PER_SECOND", "20"))  # Read rate cap while archiving; 0 means none
+RETENTION_BLOB_GRACE_SECONDS = float(os.getenv("RETENTION_BLOB_GRACE_SECONDS", "3600"))  # Wait before deleting an unused blob; must outlast an upload request
@@ -1,10 +1,76 @@
 from sqlmodel import Session, create_engine
-from app.core.config import DATABASE_URL
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import (
+    DATABASE_URL,
+    DATABASE_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+)
+from typing import AsyncGenerator, Generator
+
+# ─── Engine Profile ─────────────────────────────────────────────────────────
+
+def engine_options(url: str) -> dict:
+    """
+    Pool settings for the backend behind `url`.
+    - SQLite files: a larger pool. Connections are cheap in-process handles,
+      and concurrent writers should queue on the database lock
+      (busy_timeout), not time out waiting for the pool.
+    - Server databases: a small pool plus overflow, pinged before use so
+      connections the server closed are replaced.
+    - In-memory SQLite keeps SQLAlchemy's default shared connection.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {"pool_size": DB_POOL_SIZE or 5, "max_overflow": DB_MAX_OVERFLOW, "pool_pre_ping": True}
+    if parsed.database in (None, "", ":memory:"):
+        return {}
+    return {"pool_size": DB_POOL_SIZE or 20, "max_overflow": DB_MAX_OVERFLOW}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection: WAL so readers never block the writer,
+    a busy timeout so writers wait for the lock instead of failing with
+    "database is locked", and a larger cache plus mmap for reads.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS:d}")  # First, so the journal switch can wait too
+    cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE:d}")
+    cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE:d}")
+    cursor.close()
 
 # ─── Database Engine ────────────────────────────────────────────────────────
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=DATABASE_ECHO, **engine_options(DATABASE_URL))
+
+# Async routes use the same database through an async driver
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """
+    DATABASE_URL with its driver swapped for the async one (aiosqlite, asyncpg).
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL), echo=DATABASE_ECHO, **engine_options(DATABASE_URL)
+)
+
+if make_url(DATABASE_URL).get_backend_name() == "sqlite":
+    for sync_engine in (engine, async_engine.sync_engine):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
 
 # ─── Database Initialization ───────────────────────────────────────────────
 
@@ -26,6 +92,20 @@ def get_session() -> Generator[Session, None, None]:
     finally:
         session.close()
 
+def AsyncSessionLocal() -> AsyncSession:
+    """
+    Factory for `async with AsyncSessionLocal() as session:` in async routes.
+    - Objects stay loaded after commit: refreshing an expired attribute
+      would need an await, so attribute access would fail instead.
+    - Shared sync helpers run inside it with `await session.run_sync(fn, ...)`.
+    """
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency that provides an async SQLModel session."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
 # ─── Legacy SessionLocal for manual use ─────────────────────────────────────
 def SessionLocal() -> Session:
     """
@@ -1,8 +1,10 @@
 # ─── External imports ────────────────────────────────────────────────────────
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from datetime import datetime
+from pathlib import PurePosixPath
+import mimetypes
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,12 +20,18 @@ from app.api.v1.upload import upload_router
 # ─── Database ───────────────────────────────────────────────────────────────
 from app.db.session import init_db
 from sqlmodel import Session
-from app.db.session import engine
+from app.db.session import engine, async_engine
 from app.dummy_data import populate_dummy_data
+from app.services.media_jobs import media_worker
+from app.services.auth import revocations
+from app.services.maintenance import maintenance_sweeper
+from app.services.email_outbox import email_outbox
+from app.services.retention import retention_engine
+from app.services.object_store import object_store
 
 # ─── Configuration ─────────────────────────────────────────────────────────
 from app.core.config import (
-    STORAGE_ROOT,
+    SESSION_VALIDATION,
     FACEBOOK_URL,
     INSTAGRAM_URL,
     TIKTOK_URL,
@@ -50,22 +58,42 @@ async def lifespan(app: FastAPI):
     init_db()
     with Session(engine) as session:
         populate_dummy_data(session)
+    media_worker.start()
+    if SESSION_VALIDATION == "stateless":
+        revocations.start()
+    maintenance_sweeper.start()
+    email_outbox.start()
+    retention_engine.start()
     yield
+    await retention_engine.stop()
+    await email_outbox.stop()
+    await maintenance_sweeper.stop()
+    await revocations.stop()
+    await media_worker.stop()
+    await async_engine.dispose()
 
 # ─── Create FastAPI app ─────────────────────────────────────────────────────
 app = FastAPI(lifespan=lifespan)
 
 # ─── Static & media mounts ─────────────────────────────────────────────────
-app.mount("/media", StaticFiles(directory=STORAGE_ROOT), name="media")
 app.mount(
     "/static",
     StaticFiles(directory="app/static"),
     name="static",
 )
-# serve /<storage_root> → /uploads
-app.mount("/uploads",
-          StaticFiles(directory=STORAGE_ROOT, html=False),
-          name="uploads")
+
+# serve event banners from the object store → /uploads, /media
+# only <event_code>/customisation/<banner>; uploads are reachable through the gallery's signed links alone
+@app.api_route("/uploads/{key:path}", methods=["GET", "HEAD"])
+@app.api_route("/media/{key:path}", methods=["GET", "HEAD"])
+async def stored_file(request: Request, key: str):
+    path = PurePosixPath(key)
+    parts = path.parts
+    if path.is_absolute() or len(parts) != 3 or parts[1] != "customisation" or any(p.startswith(".") for p in parts):
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    # a new banner keeps its name, so browsers revalidate (a 304 while it is unchanged)
+    return object_store().response(key, media_type, headers={"Cache-Control": "no-cache"}, request=request)
 
 # ─── Include routers ───────────────────────────────────────────────────────
 app.include_router(auth_router,    prefix="/auth")
@@ -77,7 +105,7 @@ app.include_router(page_router)
 # ─── Home page ────────────────────────────────────────────────────────────
 @app.get("/")
 async def home(request: Request):
-    from app.api.v1.page import get_logged_in_user
-    user = get_logged_in_user(request)
+    from app.services.auth import resolve_logged_in_user
+    user = await resolve_logged_in_user(request)
     return templates.TemplateResponse("home.html", {"request": request, "user": user})
 
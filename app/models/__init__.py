@@ -3,13 +3,20 @@ __all__ = [
     "Pricing",
     "EventType",
     "Event",
+    "EventCodePool",
     "Guest",
     "Billing",
     "EventStorage",
+    "UserStorage",
     "QRCode",
     "UserSession",
+    "RevokedToken",
     "FileMetadata",
+    "BlobDeletion",
     "GuestSession",
+    "UploadSession",
+    "MediaJob",
+    "OutboxEmail",
 ]
 
 from .models import (
@@ -17,11 +24,18 @@ from .models import (
     Pricing,
     EventType,
     Event,
+    EventCodePool,
     Guest,
     Billing,
     EventStorage,
+    UserStorage,
     QRCode,
     UserSession,
+    RevokedToken,
     FileMetadata,
+    BlobDeletion,
     GuestSession,
+    UploadSession,
+    MediaJob,
+    OutboxEmail,
 )
\ No newline at end of file
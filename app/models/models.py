@@ -1,5 +1,6 @@
 from typing import Optional, List  # For optional and list type hints
 from datetime import datetime, timezone  # For date and time handling
+from sqlalchemy import BigInteger, Index  # Unsigned 32-bit values and composite indexes
 from sqlmodel import SQLModel, Field, Relationship  # SQLModel utilities for ORM
 
 # ─── User Model ─────────────────────────────────────────────────────────────
@@ -11,7 +12,7 @@ class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     first_name: str
     last_name: str
-    email: str
+    email: str = Field(unique=True, index=True)  # Login lookup
     hashed_password: str
     verified: bool = False  # Indicates if the user's email is verified
     marked_for_deletion: bool = False  # Indicates if the user is marked for deletion
@@ -67,6 +68,11 @@ class Event(SQLModel, table=True):
     """
     Represents an event created by a user.
     """
+    __table_args__ = (
+        Index("ix_event_user_id_date", "user_id", "date"),  # Dashboard: a user's events in date order
+        Index("ix_event_expired_at_pricing_id_date", "expired_at", "pricing_id", "date"),  # Retention: a plan's live events past a date
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_type_id: Optional[int] = Field(default=None, foreign_key="eventtype.id")
     user_id: int = Field(foreign_key="user.id")
@@ -74,11 +80,15 @@ class Event(SQLModel, table=True):
     date: datetime  # Date of the event
     welcome_message: Optional[str] = Field(default=None, max_length=250)
     storage_path: str  # Path to the event's storage directory
-    event_code: str = Field(max_length=4)  # Unique event code
+    event_code: str = Field(max_length=8, unique=True, index=True)  # Unique event code; guest lookups seek on it
+    event_code_length: Optional[int] = Field(default=None, index=True, sa_column_kwargs={
+        "default": lambda context: len(context.get_current_parameters()["event_code"]),
+    })  # Filled in on insert; code space usage is counted on it
     event_password: str = Field(max_length=4)  # Password for accessing the event
     pricing_id: Optional[int] = Field(default=None, foreign_key="pricing.id")
     # store just the filename; URL will be /static/uploads/<code>/customisation/<banner_filename>
     banner_filename: Optional[str] = Field(default=None, description="Uploaded banner image filename")
+    expired_at: Optional[datetime] = None  # Set when retention removed the event's files
 
     # Relationships
     user: "User" = Relationship(back_populates="events")
@@ -91,12 +101,26 @@ class Event(SQLModel, table=True):
     qrcode: Optional["QRCode"] = Relationship(back_populates="event")
     guest_sessions: List["GuestSession"] = Relationship(back_populates="event")
 
+# ─── Event Code Pool Model ─────────────────────────────────────────────────
+
+class EventCodePool(SQLModel, table=True):
+    """
+    Represents a free, profanity-screened event code waiting to be handed out.
+    A row is deleted when its code is allocated to an event.
+    """
+    __table_args__ = (Index("ix_eventcodepool_length_code", "length", "code"),)
+
+    code: str = Field(primary_key=True, max_length=8)
+    length: int  # Number of characters in the code (grows when the space widens)
+
 # ─── Guest Model ───────────────────────────────────────────────────────────
 
 class Guest(SQLModel, table=True):
     """
     Represents a guest attending an event.
     """
+    __table_args__ = (Index("ix_guest_event_id_guest_email", "event_id", "guest_email"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="event.id")
     guest_email: str  # Email address of the guest
@@ -105,6 +129,7 @@ class Guest(SQLModel, table=True):
     event: "Event" = Relationship(back_populates="guests")
     files: List["FileMetadata"] = Relationship(back_populates="guest")
     sessions: List["GuestSession"] = Relationship(back_populates="guest")
+    upload_sessions: List["UploadSession"] = Relationship(back_populates="guest")
 
 # ─── Billing Model ─────────────────────────────────────────────────────────
 
@@ -129,16 +154,33 @@ class Billing(SQLModel, table=True):
 
 class EventStorage(SQLModel, table=True):
     """
-    Represents storage information for an event.
+    Represents storage information for an event, including its running usage.
+    Counters are changed with each upload and delete; the maintenance
+    sweeper recomputes them from the file rows to correct any drift.
     """
     id: Optional[int] = Field(default=None, primary_key=True)
-    event_id: int = Field(foreign_key="event.id")
+    event_id: int = Field(foreign_key="event.id", unique=True)  # One counter row per event
     path: str  # Path to the storage
+    used_bytes: int = Field(default=0, sa_type=BigInteger)  # Stored files plus bytes reserved by resumable uploads
+    file_count: int = 0  # Stored files
     created_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     # Relationships
     event: "Event" = Relationship(back_populates="storages")
 
+# ─── User Storage Model ────────────────────────────────────────────────────
+
+class UserStorage(SQLModel, table=True):
+    """
+    Represents the running storage usage across all of a user's events.
+    Kept equal to the sum of the user's EventStorage counters.
+    """
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    used_bytes: int = Field(default=0, sa_type=BigInteger)
+    file_count: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 # ─── QR Code Model ─────────────────────────────────────────────────────────
 
 class QRCode(SQLModel, table=True):
@@ -147,7 +189,7 @@ class QRCode(SQLModel, table=True):
     """
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="event.id", unique=True)
-    qr_code_path: str  # Path to the QR code image
+    qr_code_path: str  # Path prefix of the stored images (<prefix>-<size>.png, <prefix>.svg)
     created_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -160,8 +202,8 @@ class UserSession(SQLModel, table=True):
     Represents a session for a logged-in user.
     """
     id: int = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id")
-    session_token: str  # Token for the session
+    user_id: int = Field(foreign_key="user.id", index=True)
+    session_token: str = Field(unique=True, index=True)  # Token for the session
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     expires_at: datetime  # Expiration time of the session
     user_agent: str = ""  # User agent of the client
@@ -170,22 +212,58 @@ class UserSession(SQLModel, table=True):
     # Relationships
     user: "User" = Relationship(back_populates="sessions")
 
+# ─── Revoked Token Model ───────────────────────────────────────────────────
+
+class RevokedToken(SQLModel, table=True):
+    """
+    Represents a session token (or all of a user's tokens) revoked before expiry.
+    Read incrementally (new ids, plus recent `revoked_at` for rows that
+    committed late) when session tokens are validated statelessly.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    token_hash: Optional[str] = None  # SHA-256 of the token; None revokes every token of `user_id`
+    user_id: int  # Not a foreign key: rows outlive deleted accounts
+    expires_at: datetime  # After this the token is invalid anyway and the row can be pruned
+    revoked_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+
 # ─── File Metadata Model ───────────────────────────────────────────────────
 
 class FileMetadata(SQLModel, table=True):
     """
     Represents metadata for a file uploaded to an event.
     """
+    # Gallery listing: keyset pagination per event, newest first
+    __table_args__ = (Index("ix_filemetadata_event_id_created_date", "event_id", "created_date"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="event.id")
     guest_id: Optional[int] = Field(default=None, foreign_key="guest.id")
     file_name: str  # Name of the file
     file_size: int  # Size of the file in bytes
+    file_type: Optional[str] = None  # MIME type reported by the uploader
+    guest_device: Optional[str] = None  # Device info reported by the uploader
+    capture_time: Optional[datetime] = None  # Filled in by the media job worker
+    width: Optional[int] = None  # Display width in pixels (photos), filled in by the worker
+    height: Optional[int] = None  # Display height in pixels (photos), filled in by the worker
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 of the stored blob
+    storage_key: Optional[str] = None  # Object key of a direct-to-storage upload (never hashed by the server)
+    crc32: Optional[int] = Field(default=None, sa_type=BigInteger)  # ZIP checksum, filled in by the first download that needs it
     created_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     # Relationships
     event: "Event" = Relationship(back_populates="files")
     guest: Optional["Guest"] = Relationship(back_populates="files")
+    jobs: List["MediaJob"] = Relationship(back_populates="file")
+
+# ─── Blob Deletion Model ───────────────────────────────────────────────────
+
+class BlobDeletion(SQLModel, table=True):
+    """
+    Represents a stored blob that lost its last file row, to be deleted once
+    a grace period has passed, unless an upload reuses it in the meantime.
+    """
+    content_hash: str = Field(primary_key=True)  # SHA-256 of the blob
+    requested_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
 # ─── Guest Session Model ───────────────────────────────────────────────────
 
@@ -201,4 +279,71 @@ class GuestSession(SQLModel, table=True):
 
     # Relationships
     guest: "Guest" = Relationship(back_populates="sessions")
-    event: "Event" = Relationship(back_populates="guest_sessions")
\ No newline at end of file
+    event: "Event" = Relationship(back_populates="guest_sessions")
+
+# ─── Upload Session Model ──────────────────────────────────────────────────
+
+class UploadSession(SQLModel, table=True):
+    """
+    Represents a resumable (chunked) upload a guest has started but not finished.
+    """
+    id: str = Field(primary_key=True)  # Random identifier used in the upload URL
+    event_id: int = Field(foreign_key="event.id", index=True)  # Quota sums reservations per event
+    guest_id: int = Field(foreign_key="guest.id")
+    file_name: str  # Name of the file once assembled
+    file_type: str  # MIME type reported by the client
+    guest_device: Optional[str] = None  # Device info reported by the client
+    upload_length: int  # Total size of the file in bytes
+    upload_offset: int = 0  # Number of bytes received so far
+    storage_key: Optional[str] = None  # Direct uploads: object key the parts are assembled under
+    multipart_id: Optional[str] = None  # Direct uploads: the object store's multipart upload id
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    guest: "Guest" = Relationship(back_populates="upload_sessions")
+
+# ─── Media Job Model ───────────────────────────────────────────────────────
+
+class MediaJob(SQLModel, table=True):
+    """
+    Represents a queued media-processing task for an uploaded file.
+    """
+    # The worker polls for (status = 'pending', run_after <= now)
+    __table_args__ = (Index("ix_mediajob_status_run_after", "status", "run_after"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    file_id: int = Field(foreign_key="filemetadata.id", index=True)
+    kind: str  # Task to run: "metadata", "renditions" or "transcode"
+    status: str = "pending"  # pending, running, done or failed
+    claimed_by: Optional[str] = None  # Worker running the job; it renews its lease through updated_at
+    attempts: int = 0  # Number of times the task has been started
+    last_error: Optional[str] = None  # Error from the most recent failed attempt
+    run_after: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))  # Earliest time to (re)try
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    file: "FileMetadata" = Relationship(back_populates="jobs")
+
+# ─── Outbox Email Model ────────────────────────────────────────────────────
+
+class OutboxEmail(SQLModel, table=True):
+    """
+    Represents an email queued by a request and delivered by the background sender.
+    """
+    # The sender polls for (status = 'pending', run_after <= now)
+    __table_args__ = (Index("ix_outboxemail_status_run_after", "status", "run_after"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    to_address: str  # Recipient
+    subject: str
+    body: str  # Plain-text body
+    status: str = "pending"  # pending, sending, sent or failed
+    claimed_by: Optional[str] = None  # Sender delivering the message
+    claimed_at: Optional[datetime] = None  # Start of the sender's lease, renewed while its batch goes out
+    attempts: int = 0  # Number of delivery attempts so far
+    last_error: Optional[str] = None  # Error from the most recent failed attempt
+    run_after: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))  # Earliest time to (re)try
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    sent_at: Optional[datetime] = None
\ No newline at end of file
@@ -32,3 +32,20 @@ PROFANITY_LIST = [
     "JUGS", "JUC5", "JU65",
     "SM3G", "SMEG", "5MEG"
 ]
+
+
+# Set form for O(1) lookups; the list above stays the editable source
+PROFANITY_SET = frozenset(PROFANITY_LIST)
+_WORD_LENGTHS = sorted({len(word) for word in PROFANITY_SET})
+
+def contains_profanity(code: str) -> bool:
+    """
+    True if any window of the code is a listed word. A fixed number of set
+    lookups per code, so longer (widened) codes are screened too.
+    """
+    code = code.upper()
+    return any(
+        code[i:i + n] in PROFANITY_SET
+        for n in _WORD_LENGTHS
+        for i in range(len(code) - n + 1)
+    )
@@ -0,0 +1,323 @@
+import asyncio  # Background refresh of the revocation list
+import hashlib  # Token digests for the revocation list
+import logging  # Refresh diagnostics
+import threading  # Guards the shared cache
+import time  # Monotonic clock for cache expiry
+from collections import OrderedDict  # LRU ordering
+from datetime import datetime, timedelta, timezone  # Session expiry checks
+from typing import Optional  # Type hints
+import jwt  # Session token decoding
+from fastapi import Request  # Incoming request carrying the session cookie
+from sqlalchemy.orm import joinedload  # Load the pricing tier with the user
+from sqlmodel import Session, or_, select  # ORM for database queries
+from app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    TOKEN_EXPIRE_SECONDS,
+    AUTH_CACHE_TTL_SECONDS,
+    AUTH_CACHE_SIZE,
+    SESSION_VALIDATION,
+    REVOCATION_REFRESH_SECONDS,
+    REVOCATION_OVERLAP_SECONDS,
+)
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import User, UserSession, RevokedToken  # Database models
+
+logger = logging.getLogger(__name__)
+
+# ─── User Cache ─────────────────────────────────────────────────────────────
+
+class UserCache:
+    """
+    Bounded LRU map of session token → logged-in user, each entry living at
+    most `ttl` seconds and never past the session's own expiry.
+    - Cached users are detached, read-only snapshots: load the row in your
+      own session before changing or deleting it.
+    - The cache is per process; other workers see a logout or account change
+      after at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL_SECONDS, max_size: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[User, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, session_expires_at: datetime):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        remaining = (session_expires_at - datetime.now(timezone.utc)).total_seconds()
+        expires = time.monotonic() + min(self.ttl, remaining)
+        with self._lock:
+            self._entries[token] = (user, expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in [t for t, (user, _) in self._entries.items() if user.id == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache()
+
+# ─── Revocation List ────────────────────────────────────────────────────────
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class RevocationList:
+    """
+    In-memory copy of the RevokedToken table, used when SESSION_VALIDATION is
+    "stateless" so checking a token never reads the database.
+    - Single tokens are held as 32-byte digests; account-wide revocations as
+      user id → cutoff, which rejects every token issued up to that moment.
+    - `refresh` reads only rows added since the last refresh; a background
+      task runs it every `refresh_seconds` to pick up other workers' logouts.
+    - Ids are handed out before commit, so a row can become visible after a
+      higher id was already read. Each refresh also re-reads rows revoked in
+      the last `overlap_seconds`; applying a row twice is harmless.
+    - Entries are dropped once every token they cover has expired.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS,
+                 overlap_seconds: float = REVOCATION_OVERLAP_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.overlap_seconds = overlap_seconds
+        self._tokens: dict[bytes, float] = {}  # digest → token expiry (epoch seconds)
+        self._users: dict[int, tuple[float, float]] = {}  # user id → (cutoff, expiry)
+        self._last_id = 0
+        self._last_refresh = 0.0  # When the last applied read started (epoch seconds)
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, token: str, payload: dict) -> bool:
+        if token_digest(token) in self._tokens:
+            return True
+        cutoff = self._users.get(payload.get("user_id"))
+        return cutoff is not None and payload.get("iat", 0) <= cutoff[0]
+
+    def revoke_token(self, session: Session, token: str):
+        """
+        Record a logout. The caller commits.
+        """
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+        except jwt.PyJWTError:
+            return  # Never valid, nothing to revoke
+        row = RevokedToken(
+            token_hash=token_digest(token).hex(),
+            user_id=payload.get("user_id", 0),
+            expires_at=datetime.fromtimestamp(payload.get("exp", time.time()), timezone.utc),
+        )
+        session.add(row)
+        self._apply(row)
+
+    def revoke_user(self, session: Session, user_id: int):
+        """
+        Revoke every token issued to a user so far. The caller commits.
+        """
+        now = datetime.now(timezone.utc)
+        row = RevokedToken(
+            user_id=user_id,
+            revoked_at=now,
+            expires_at=now + timedelta(seconds=TOKEN_EXPIRE_SECONDS),
+        )
+        session.add(row)
+        self._apply(row)
+
+    def refresh(self):
+        """
+        Apply revocations added since the last refresh and prune expired ones.
+        """
+        self._merge(*self._fetch())
+
+    def _fetch(self) -> tuple[float, list[RevokedToken]]:
+        """
+        When the read started, and the rows added since the last refresh or
+        revoked within the overlap before it. Blocking; the refresh loop runs
+        it in a thread.
+        """
+        started = time.time()
+        since = datetime.fromtimestamp(self._last_refresh - self.overlap_seconds, timezone.utc)
+        with Session(engine) as session:
+            return started, session.exec(
+                select(RevokedToken).where(or_(RevokedToken.id > self._last_id, RevokedToken.revoked_at >= since))
+            ).all()
+
+    def _merge(self, started: float, rows: list[RevokedToken]):
+        for row in rows:
+            self._apply(row)
+            self._last_id = max(self._last_id, row.id)
+        self._last_refresh = started
+        now = time.time()
+        self._tokens = {digest: exp for digest, exp in self._tokens.items() if exp > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+
+    def _apply(self, row: RevokedToken):
+        if row.token_hash:
+            self._tokens[bytes.fromhex(row.token_hash)] = _epoch(row.expires_at)
+        else:
+            cutoff = max(_epoch(row.revoked_at), self._users.get(row.user_id, (0, 0))[0])
+            self._users[row.user_id] = (cutoff, _epoch(row.expires_at))
+
+    # ── Lifecycle ──
+    def start(self):
+        """
+        Load the list and keep it fresh from the current event loop.
+        """
+        self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                self._merge(*await asyncio.to_thread(self._fetch))  # Merged on the loop, where tokens are checked
+            except Exception as exc:
+                logger.warning("Revocation list refresh failed: %s", exc)
+
+revocations = RevocationList()
+
+# ─── Resolver ───────────────────────────────────────────────────────────────
+
+_UNRESOLVED = object()
+
+def _load_user(token: str) -> Optional[User]:
+    """
+    Validate the session token against the database and load its user.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+
+    with Session(engine) as session:
+        row = session.exec(
+            select(UserSession, User)
+            .join(User, User.id == UserSession.user_id)
+            .where(UserSession.session_token == token, User.id == payload.get("user_id"))
+            .options(joinedload(User.pricing))  # Profile and quota checks need the tier
+        ).first()
+    if not row:
+        return None
+    user_session, user = row
+    expires_at = user_session.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at < datetime.now(timezone.utc):
+        return None
+    user_cache.put(token, user, expires_at)
+    return user
+
+def _stateless_payload(token: str) -> Optional[dict]:
+    """
+    The token's claims if its signature and expiry hold and it is not on the
+    revocation list. In memory only, so safe on the event loop.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    return None if revocations.is_revoked(token, payload) else payload
+
+def _load_token_user(token: str, payload: dict) -> Optional[User]:
+    """
+    Load the user a trusted token names and cache it for the token.
+    """
+    with Session(engine) as session:
+        user = session.exec(
+            select(User).where(User.id == payload.get("user_id")).options(joinedload(User.pricing))
+        ).first()
+    if user:
+        user_cache.put(token, user, datetime.fromtimestamp(payload["exp"], timezone.utc))
+    return user
+
+def _load_user_stateless(token: str) -> Optional[User]:
+    """
+    Trust the token's signature and expiry; only the revocation list and,
+    on a cache miss, the user row itself are consulted.
+    """
+    payload = _stateless_payload(token)
+    if payload is None:
+        return None
+    return user_cache.get(token) or _load_token_user(token, payload)
+
+def get_logged_in_user(request: Request) -> Optional[User]:
+    """
+    Return the user behind the request's session cookie, or None.
+    - Resolved once per request (memoised on `request.state`).
+    - Across requests, served from `user_cache` until the entry expires or
+      is invalidated, so a typical page view makes no database round trip.
+    - With SESSION_VALIDATION = "stateless" the token is checked against its
+      own expiry and `revocations` instead of its UserSession row.
+    - Reads the database on a cache miss; async routes use
+      `resolve_logged_in_user` instead.
+    """
+    cached = getattr(request.state, "user", _UNRESOLVED)
+    if cached is not _UNRESOLVED:
+        return cached
+
+    token = request.cookies.get("session_token")
+    user = None
+    if token and SESSION_VALIDATION == "stateless":
+        user = _load_user_stateless(token)
+    elif token:
+        user = user_cache.get(token) or _load_user(token)
+    request.state.user = user
+    return user
+
+async def resolve_logged_in_user(request: Request) -> Optional[User]:
+    """
+    `get_logged_in_user` for async routes.
+    - Cache hits and stateless token checks are answered in memory; only a
+      miss reads the database, in a worker thread, so the event loop keeps
+      serving other requests meanwhile.
+    """
+    cached = getattr(request.state, "user", _UNRESOLVED)
+    if cached is not _UNRESOLVED:
+        return cached
+
+    token = request.cookies.get("session_token")
+    user = None
+    if token and SESSION_VALIDATION == "stateless":
+        payload = _stateless_payload(token)
+        if payload is not None:
+            user = user_cache.get(token) or await asyncio.to_thread(_load_token_user, token, payload)
+    elif token:
+        user = user_cache.get(token) or await asyncio.to_thread(_load_user, token)
+    request.state.user = user
+    return user
@@ -0,0 +1,320 @@
+import asyncio  # Event loop integration for the sender
+import logging  # Delivery diagnostics
+import os, socket  # Sender identity
+import smtplib  # SMTP client
+import time  # Idle tracking for the pooled connection and lease renewal
+from datetime import datetime, timedelta, timezone  # Retry scheduling
+from email.mime.text import MIMEText  # Message construction
+from typing import Optional  # Type hints
+from uuid import uuid4  # Sender identity
+from sqlalchemy import or_, update  # Atomic message claiming
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import (
+    EMAIL_FROM,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    SMTP_TIMEOUT_SECONDS,
+    SMTP_IDLE_SECONDS,
+    EMAIL_BATCH_SIZE,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_SECONDS,
+    EMAIL_POLL_SECONDS,
+    EMAIL_LEASE_SECONDS,
+)
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import OutboxEmail  # Database models
+
+logger = logging.getLogger(__name__)
+
+# ─── Enqueueing ─────────────────────────────────────────────────────────────
+
+def enqueue_email(session: Session, to_address: str, subject: str, body: str) -> OutboxEmail:
+    """
+    Add a plain-text email to the outbox.
+    The caller commits, then calls `email_outbox.notify()`.
+    """
+    email = OutboxEmail(to_address=to_address, subject=subject, body=body)
+    session.add(email)
+    return email
+
+# ─── SMTP Connection ────────────────────────────────────────────────────────
+
+class SMTPConnection:
+    """
+    One authenticated SMTP connection, opened on first use and reused for
+    every message until it has been idle for `idle_seconds`.
+    - A connection the server dropped is reopened once per message.
+    - Not thread-safe: the sender uses it from one thread at a time.
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        starttls: bool = SMTP_STARTTLS,
+        username: str = SMTP_USERNAME,
+        password: str = SMTP_PASSWORD,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+        idle_seconds: float = SMTP_IDLE_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self.connects = 0  # Connections opened so far
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def send(self, message: MIMEText):
+        try:
+            self._connect().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connect().send_message(message)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass  # Already gone
+            self._server = None
+
+    def _connect(self) -> smtplib.SMTP:
+        self.close_if_idle()
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    server.starttls()
+                if self.password:
+                    server.login(self.username, self.password)
+            except BaseException:
+                server.close()
+                raise
+            self._server = server
+            self._last_used = time.monotonic()
+            self.connects += 1
+        return self._server
+
+# ─── Sender ─────────────────────────────────────────────────────────────────
+
+class EmailOutbox:
+    """
+    Delivers queued OutboxEmail rows in the background over one pooled SMTP
+    connection, so no request waits on the mail server.
+    - Pending messages are claimed atomically (pending → sending), up to
+      `batch_size` at a time, and sent one after another on the same connection.
+    - Failures are retried with exponential backoff up to `max_attempts`;
+      5xx rejections of a message fail it straight away.
+    - Claimed messages carry the sender's id and a lease (claimed_at),
+      renewed while their batch goes out. Messages whose lease is older
+      than `lease_seconds`, left by a crashed sender, are re-queued; those
+      another process is still sending are left alone.
+    - Delivery is at-least-once: a message sent just before its sender
+      crashed goes out again once its lease expires.
+    """
+
+    def __init__(
+        self,
+        connection: Optional[SMTPConnection] = None,
+        batch_size: int = EMAIL_BATCH_SIZE,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        retry_seconds: int = EMAIL_RETRY_SECONDS,
+        poll_seconds: float = EMAIL_POLL_SECONDS,
+        lease_seconds: float = EMAIL_LEASE_SECONDS,
+    ):
+        self.connection = connection or SMTPConnection()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.sender_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stale_checked = 0.0  # time.monotonic() of the last stale lease check
+
+    def start(self):
+        """
+        Start draining the outbox on the current event loop.
+        """
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.connection.close)
+
+    def notify(self):
+        """
+        Wake the sender after new messages were committed.
+        """
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def drain(self) -> int:
+        """
+        Send batches until nothing is due and return how many were delivered.
+        """
+        delivered = 0
+        while True:
+            claimed, sent = await self._send_batch()
+            delivered += sent
+            if claimed < self.batch_size:
+                return delivered
+
+    # ── Internals ──
+    def _requeue_stale(self):
+        """
+        Re-queue messages whose lease has expired; at most once every third
+        of `lease_seconds`.
+        """
+        if time.monotonic() - self._stale_checked < self.lease_seconds / 3:
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lease_seconds)
+        with Session(engine) as session:
+            session.execute(
+                update(OutboxEmail)
+                .where(
+                    OutboxEmail.status == "sending",
+                    or_(OutboxEmail.claimed_at.is_(None), OutboxEmail.claimed_at < cutoff),  # None: claimed before leases
+                )
+                .values(status="pending", claimed_by=None)
+            )
+            session.commit()
+        self._stale_checked = time.monotonic()
+
+    def _renew_lease(self, emails: list[OutboxEmail]):
+        """
+        Extend this sender's lease on messages it has not sent yet.
+        A failed renewal is only logged: at worst the messages go out twice.
+        """
+        try:
+            with Session(engine) as session:
+                session.execute(
+                    update(OutboxEmail)
+                    .where(OutboxEmail.id.in_([email.id for email in emails]), OutboxEmail.claimed_by == self.sender_id)
+                    .values(claimed_at=datetime.now(timezone.utc))
+                )
+                session.commit()
+        except Exception as exc:
+            logger.warning("Renewing the lease on %d emails failed: %s", len(emails), exc)
+
+    async def _poll(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self._requeue_stale)
+                await self.drain()
+                await asyncio.to_thread(self.connection.close_if_idle)
+            except Exception as exc:
+                logger.warning("Email outbox run failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim(self) -> list[OutboxEmail]:
+        now = datetime.now(timezone.utc)
+        claimed = []
+        with Session(engine) as session:
+            candidates = session.exec(
+                select(OutboxEmail)
+                .where(OutboxEmail.status == "pending", OutboxEmail.run_after <= now)
+                .order_by(OutboxEmail.run_after, OutboxEmail.id)  # Served by ix_outboxemail_status_run_after
+                .limit(self.batch_size)
+            ).all()
+            for email in candidates:
+                result = session.execute(
+                    update(OutboxEmail)
+                    .where(OutboxEmail.id == email.id, OutboxEmail.status == "pending")
+                    .values(status="sending", claimed_by=self.sender_id, claimed_at=now, attempts=OutboxEmail.attempts + 1)
+                )
+                if result.rowcount == 1:
+                    claimed.append(email)
+            session.commit()
+            for email in claimed:
+                session.refresh(email)
+                session.expunge(email)
+        return claimed
+
+    async def _send_batch(self) -> tuple[int, int]:
+        emails = await asyncio.to_thread(self._claim)
+        if not emails:
+            return 0, 0
+        errors = await asyncio.to_thread(self._deliver, emails)
+        await asyncio.to_thread(self._record, emails, errors)
+        return len(emails), sum(1 for email in emails if email.id not in errors)
+
+    def _deliver(self, emails: list[OutboxEmail]) -> dict[int, tuple[str, bool]]:
+        """
+        Send each message; return id → (error, permanent) for the ones that failed.
+        """
+        errors = {}
+        renewed = time.monotonic()
+        for i, email in enumerate(emails):
+            if time.monotonic() - renewed >= self.lease_seconds / 3:  # A slow server could outlast the lease
+                self._renew_lease(emails[i:])
+                renewed = time.monotonic()
+            message = MIMEText(email.body)
+            message["Subject"] = email.subject
+            message["From"] = EMAIL_FROM
+            message["To"] = email.to_address
+            try:
+                self.connection.send(message)
+            except smtplib.SMTPRecipientsRefused as exc:
+                errors[email.id] = (str(exc), True)
+            except smtplib.SMTPAuthenticationError as exc:
+                errors.update({e.id: (str(exc), False) for e in emails[i:]})
+                break  # Nothing else will get through this run
+            except smtplib.SMTPResponseException as exc:
+                errors[email.id] = (str(exc), 500 <= exc.smtp_code < 600)
+            except (smtplib.SMTPException, OSError) as exc:
+                self.connection.close()
+                errors.update({e.id: (str(exc), False) for e in emails[i:]})
+                break  # Server unreachable; back off instead of timing out per message
+        return errors
+
+    def _record(self, emails: list[OutboxEmail], errors: dict[int, tuple[str, bool]]):
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            for email in emails:
+                values = {"status": "sent", "sent_at": now, "last_error": None}
+                if email.id in errors:
+                    error, permanent = errors[email.id]
+                    logger.warning("Email %s to %s failed: %s", email.id, email.to_address, error)
+                    values = {"status": "pending", "last_error": error[:1000]}
+                    if permanent or email.attempts >= self.max_attempts:
+                        values["status"] = "failed"
+                    else:
+                        values["run_after"] = now + timedelta(seconds=self.retry_seconds * 2 ** (email.attempts - 1))
+                result = session.execute(
+                    update(OutboxEmail)
+                    .where(OutboxEmail.id == email.id, OutboxEmail.status == "sending",
+                           OutboxEmail.claimed_by == self.sender_id)
+                    .values(**values)
+                )
+                if result.rowcount == 0:  # Lease expired and another sender took it over; its result stands
+                    logger.info("Email %s was handed on to another sender; its result is dropped", email.id)
+            session.commit()
+
+# Shared sender started from the application lifespan
+email_outbox = EmailOutbox()
@@ -0,0 +1,91 @@
+import asyncio  # Cache misses are loaded off the event loop
+import hmac  # Constant-time password comparison
+import threading  # Guards the shared cache
+import time  # Monotonic clock for cache expiry
+from collections import OrderedDict  # LRU ordering
+from typing import Optional  # Type hints
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import EVENT_CACHE_TTL_SECONDS, EVENT_CACHE_NEGATIVE_TTL_SECONDS, EVENT_CACHE_SIZE
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event  # Database models
+
+# ─── Event Cache ────────────────────────────────────────────────────────────
+
+class EventCache:
+    """
+    Bounded LRU map of event code → event, used by the guest entry points.
+    - Keyed by code alone: the password is compared against the cached row,
+      so guessing passwords for a known code never reaches the database.
+    - Codes with no event are cached too (for `negative_ttl` seconds), so
+      probing the same unknown code repeatedly costs one query.
+    - Cached events are detached, read-only snapshots: load the row in your
+      own session before changing or deleting it.
+    - The cache is per process; other workers see an edited or deleted
+      event after at most `ttl` seconds.
+    - Hits are answered in memory; a miss is loaded in a worker thread, so
+      the event loop never waits on the database.
+    """
+
+    def __init__(
+        self,
+        ttl: float = EVENT_CACHE_TTL_SECONDS,
+        negative_ttl: float = EVENT_CACHE_NEGATIVE_TTL_SECONDS,
+        max_size: int = EVENT_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[Optional[Event], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def lookup(self, event_code: str, event_password: str) -> Optional[Event]:
+        """
+        Return the event with this code and password, or None.
+        """
+        event = await self.get(event_code)
+        if event is None or not hmac.compare_digest(event.event_password.encode(), event_password.encode()):
+            return None
+        return event
+
+    async def get(self, event_code: str) -> Optional[Event]:
+        """
+        Return the event with this code, or None, without checking its password.
+        For callers that check access another way (its host's session).
+        """
+        found, event = self._cached(event_code)
+        return event if found else await asyncio.to_thread(self._load, event_code)
+
+    def invalidate(self, *event_codes: str):
+        with self._lock:
+            for code in event_codes:
+                self._entries.pop(code, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ── Internals ──
+    def _cached(self, event_code: str) -> tuple[bool, Optional[Event]]:
+        with self._lock:
+            entry = self._entries.get(event_code)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(event_code)
+                return True, entry[0]
+        return False, None
+
+    def _load(self, event_code: str) -> Optional[Event]:
+        with Session(engine) as session:
+            event = session.exec(select(Event).where(Event.event_code == event_code)).first()
+            if event is not None:
+                session.expunge(event)  # Keep the loaded columns after the session closes
+
+        ttl = self.ttl if event is not None else self.negative_ttl
+        if ttl > 0 and self.max_size > 0:
+            with self._lock:
+                self._entries[event_code] = (event, time.monotonic() + ttl)
+                self._entries.move_to_end(event_code)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return event
+
+event_cache = EventCache()
@@ -0,0 +1,107 @@
+import logging  # Pool diagnostics
+import secrets, string  # Unpredictable codes
+from sqlalchemy import delete, func  # Atomic claims and counts
+from sqlalchemy.exc import IntegrityError  # Concurrent refills
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import EVENT_CODE_LENGTH, EVENT_CODE_POOL_SIZE, EVENT_CODE_WIDEN_AT
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event, EventCodePool  # Database models
+from app.profanity_filter import contains_profanity  # Constant-time screening
+
+logger = logging.getLogger(__name__)
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CLAIM_ATTEMPTS = 5  # Pool rows tried before falling back to a random code
+LOOKUP_CHUNK = 500  # Codes per IN (...) query, under SQLite's parameter limit
+
+# ─── Code Generation ────────────────────────────────────────────────────────
+
+def random_code(length: int = EVENT_CODE_LENGTH) -> str:
+    """
+    A random, profanity-free code (also used for event passwords).
+    """
+    while True:
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+        if not contains_profanity(code):
+            return code
+
+def code_space_usage(session: Session, length: int) -> float:
+    """
+    Share of all codes of this length already used by events.
+    """
+    used = session.exec(
+        select(func.count()).select_from(Event).where(Event.event_code_length == length)
+    ).one()
+    return used / len(CODE_ALPHABET) ** length
+
+def current_code_length(session: Session) -> int:
+    """
+    Shortest code length whose space is still below EVENT_CODE_WIDEN_AT.
+    """
+    length = EVENT_CODE_LENGTH
+    while code_space_usage(session, length) >= EVENT_CODE_WIDEN_AT:
+        length += 1
+    return length
+
+# ─── Pool ───────────────────────────────────────────────────────────────────
+
+def refill_code_pool(target: int = EVENT_CODE_POOL_SIZE) -> int:
+    """
+    Top the pool up to `target` free codes and return how many were added.
+    - Codes are screened for profanity and checked against events and the
+      pool in bulk, a chunk of codes per query.
+    - Widens to longer codes once the current length is EVENT_CODE_WIDEN_AT full.
+    - Safe to run from several processes: a refill that loses a race on a
+      code is rolled back and simply adds nothing this round.
+    """
+    with Session(engine) as session:
+        missing = target - session.exec(select(func.count()).select_from(EventCodePool)).one()
+        if missing <= 0:
+            return 0
+        length = current_code_length(session)
+        if length > EVENT_CODE_LENGTH:
+            logger.warning("Event codes widened to %d characters", length)
+
+        added: set[str] = set()
+        while len(added) < missing:
+            candidates = {random_code(length) for _ in range(min(LOOKUP_CHUNK, 2 * (missing - len(added))))} - added
+            taken = set(session.exec(select(Event.event_code).where(Event.event_code.in_(candidates))).all())
+            taken |= set(session.exec(select(EventCodePool.code).where(EventCodePool.code.in_(candidates))).all())
+            fresh = list(candidates - taken)[:missing - len(added)]
+            session.add_all(EventCodePool(code=code, length=length) for code in fresh)
+            added.update(fresh)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return 0
+    return len(added)
+
+def allocate_event_code(session: Session) -> str:
+    """
+    Take a code from the pool inside the caller's transaction.
+    - A code is claimed by deleting its pool row; only the request whose
+      DELETE hits the row gets it, so concurrent requests never share one.
+    - If the caller rolls back, the code returns to the pool.
+    - Shortest codes first; among those, the first code after a random one,
+      so concurrent requests spread over the pool without sorting it.
+    - Falls back to checked random codes when the pool is empty.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        length = session.exec(select(func.min(EventCodePool.length))).one()
+        if length is None:
+            break
+        pivot = "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+        shortest = select(EventCodePool.code).where(EventCodePool.length == length).order_by(EventCodePool.code).limit(1)
+        code = (session.exec(shortest.where(EventCodePool.code >= pivot)).first()
+                or session.exec(shortest).first())  # Wrap around past the last code
+        if code is None:
+            continue
+        if session.execute(delete(EventCodePool).where(EventCodePool.code == code)).rowcount == 1:
+            return code
+
+    length = current_code_length(session)
+    while True:
+        code = random_code(length)
+        if not session.exec(select(Event.id).where(Event.event_code == code)).first():
+            return code
@@ -0,0 +1,299 @@
+import struct  # Binary header parsing
+from dataclasses import dataclass  # Result container
+from datetime import datetime  # Date and time handling
+from typing import BinaryIO, Optional  # Type hints
+
+# Header-only image metadata reader. Walks JPEG markers or HEIC (ISO BMFF)
+# boxes and reads just the EXIF/TIFF bytes it needs: no pixels are decoded
+# and no full tag dictionary is built. Returns None for anything it does not
+# understand so callers can fall back to Pillow.
+
+# ─── Result Type ────────────────────────────────────────────────────────────
+
+@dataclass
+class ImageHeader:
+    """
+    Metadata read from an image header.
+    `width`/`height` are as stored; `display_size` applies the EXIF orientation.
+    """
+    capture_time: Optional[datetime] = None
+    orientation: int = 1
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @property
+    def display_size(self) -> tuple[Optional[int], Optional[int]]:
+        if self.orientation in (5, 6, 7, 8):  # Rotated by 90°/270°
+            return self.height, self.width
+        return self.width, self.height
+
+# ─── TIFF / EXIF ────────────────────────────────────────────────────────────
+
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_PIXEL_X = 0xA002
+TAG_PIXEL_Y = 0xA003
+
+def _parse_exif_time(raw: bytes) -> Optional[datetime]:
+    try:
+        return datetime.strptime(raw.split(b"\0", 1)[0].decode("ascii").strip(), "%Y:%m:%d %H:%M:%S")
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+def _read_ifd(tiff: bytes, offset: int, endian: str, wanted: set[int]) -> dict[int, object]:
+    """
+    Read the wanted tags of one IFD. ASCII values come back as bytes,
+    SHORT/LONG values as ints.
+    """
+    values = {}
+    if offset + 2 > len(tiff):
+        return values
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, kind, n = struct.unpack_from(endian + "HHI", tiff, entry)
+        if tag not in wanted:
+            continue
+        if kind == 3:  # SHORT
+            values[tag] = struct.unpack_from(endian + "H", tiff, entry + 8)[0]
+        elif kind == 4:  # LONG
+            values[tag] = struct.unpack_from(endian + "I", tiff, entry + 8)[0]
+        elif kind == 2:  # ASCII
+            if n <= 4:
+                values[tag] = tiff[entry + 8:entry + 8 + n]
+            else:
+                (pointer,) = struct.unpack_from(endian + "I", tiff, entry + 8)
+                values[tag] = tiff[pointer:pointer + n]
+    return values
+
+def parse_tiff(tiff: bytes, header: ImageHeader) -> None:
+    """
+    Fill capture time, orientation and pixel size from a TIFF/EXIF block.
+    """
+    if len(tiff) < 8:
+        return
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None:
+        return
+    (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+    main = _read_ifd(tiff, ifd0, endian, {TAG_ORIENTATION, TAG_DATETIME, TAG_EXIF_IFD})
+    exif = {}
+    if TAG_EXIF_IFD in main:
+        exif = _read_ifd(tiff, main[TAG_EXIF_IFD], endian, {TAG_DATETIME_ORIGINAL, TAG_PIXEL_X, TAG_PIXEL_Y})
+
+    raw_time = exif.get(TAG_DATETIME_ORIGINAL) or main.get(TAG_DATETIME)
+    if raw_time:
+        header.capture_time = _parse_exif_time(raw_time)
+    if main.get(TAG_ORIENTATION) in range(1, 9):
+        header.orientation = main[TAG_ORIENTATION]
+    if header.width is None and exif.get(TAG_PIXEL_X) and exif.get(TAG_PIXEL_Y):
+        header.width, header.height = exif[TAG_PIXEL_X], exif[TAG_PIXEL_Y]
+
+# ─── JPEG ───────────────────────────────────────────────────────────────────
+
+# Start-of-frame markers carry the image size (C4, C8 and CC are not frames)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _read_jpeg(f: BinaryIO) -> Optional[ImageHeader]:
+    header = ImageHeader()
+    f.seek(2)  # Past SOI
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:  # Fill bytes
+            code = f.read(1)[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:  # Markers without a length
+            continue
+        if code in (0xD9, 0xDA):  # End of image / start of scan: no more headers
+            break
+        raw_length = f.read(2)
+        if len(raw_length) < 2:
+            return None
+        length = struct.unpack(">H", raw_length)[0] - 2
+        if code == 0xE1 and header.capture_time is None:
+            segment = f.read(length)
+            if segment.startswith(b"Exif\0\0"):
+                parse_tiff(segment[6:], header)
+            continue
+        if code in SOF_MARKERS:
+            segment = f.read(length)
+            header.height, header.width = struct.unpack_from(">HH", segment, 1)
+            break  # EXIF (APP1) always precedes the frame header
+        f.seek(length, 1)
+    return header
+
+# ─── HEIC / HEIF ────────────────────────────────────────────────────────────
+
+HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif"}
+MAX_META_BOX = 4 * 1024 * 1024  # Refuse to buffer absurd `meta` boxes
+MAX_EXIF_ITEM = 1024 * 1024
+
+def _boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """
+    Yield (type, payload_start, payload_end) for the boxes in data[start:end].
+    """
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+def _read_uint(data: bytes, pos: int, size: int) -> tuple[int, int]:
+    if size == 0:
+        return 0, pos
+    return int.from_bytes(data[pos:pos + size], "big"), pos + size
+
+def _parse_meta(meta: bytes) -> tuple[Optional[tuple[int, int]], Optional[tuple[int, int]]]:
+    """
+    Return ((exif_offset, exif_length), (width, height)) from a `meta` box payload.
+    """
+    primary = None
+    exif_item = None
+    locations = {}
+    properties = []
+    associations = {}
+
+    for kind, start, end in _boxes(meta, 4):  # `meta` is a full box: skip version/flags
+        version = meta[start]
+        if kind == b"pitm":
+            primary = struct.unpack_from(">H" if version == 0 else ">I", meta, start + 4)[0]
+        elif kind == b"iinf":
+            pos = start + 4 + (2 if version == 0 else 4)
+            for entry, e_start, _ in _boxes(meta, pos, end):
+                if entry != b"infe" or meta[e_start] < 2:
+                    continue
+                if meta[e_start] == 2:
+                    item_id = struct.unpack_from(">H", meta, e_start + 4)[0]
+                    item_type = meta[e_start + 8:e_start + 12]
+                else:
+                    item_id = struct.unpack_from(">I", meta, e_start + 4)[0]
+                    item_type = meta[e_start + 10:e_start + 14]
+                if item_type == b"Exif":
+                    exif_item = item_id
+        elif kind == b"iloc":
+            sizes = meta[start + 4:start + 6]
+            offset_size, length_size = sizes[0] >> 4, sizes[0] & 0x0F
+            base_size, index_size = sizes[1] >> 4, (sizes[1] & 0x0F if version in (1, 2) else 0)
+            pos = start + 6
+            count, pos = _read_uint(meta, pos, 2 if version < 2 else 4)
+            for _ in range(count):
+                item_id, pos = _read_uint(meta, pos, 2 if version < 2 else 4)
+                method = 0
+                if version in (1, 2):
+                    method, pos = _read_uint(meta, pos, 2)
+                    method &= 0x0F
+                pos += 2  # data_reference_index
+                base, pos = _read_uint(meta, pos, base_size)
+                extents, pos = _read_uint(meta, pos, 2)
+                for i in range(extents):
+                    _, pos = _read_uint(meta, pos, index_size)
+                    offset, pos = _read_uint(meta, pos, offset_size)
+                    length, pos = _read_uint(meta, pos, length_size)
+                    if i == 0 and method == 0:
+                        locations[item_id] = (base + offset, length)
+        elif kind == b"iprp":
+            for sub, s_start, s_end in _boxes(meta, start, end):
+                if sub == b"ipco":
+                    for prop, p_start, _ in _boxes(meta, s_start, s_end):
+                        size = struct.unpack_from(">II", meta, p_start + 4) if prop == b"ispe" else None
+                        properties.append(size)
+                elif sub == b"ipma":
+                    p_version, flags = meta[s_start], int.from_bytes(meta[s_start + 1:s_start + 4], "big")
+                    pos = s_start + 4
+                    count, pos = _read_uint(meta, pos, 4)
+                    for _ in range(count):
+                        item_id, pos = _read_uint(meta, pos, 2 if p_version < 1 else 4)
+                        n, pos = _read_uint(meta, pos, 1)
+                        indices = []
+                        for _ in range(n):
+                            value, pos = _read_uint(meta, pos, 2 if flags & 1 else 1)
+                            indices.append(value & (0x7FFF if flags & 1 else 0x7F))
+                        associations[item_id] = indices
+
+    size = None
+    for index in associations.get(primary, []):
+        if 0 < index <= len(properties) and properties[index - 1]:
+            size = properties[index - 1]
+            break
+    if size is None:
+        size = next((p for p in properties if p), None)
+    return locations.get(exif_item), size
+
+def _read_heif(f: BinaryIO) -> Optional[ImageHeader]:
+    f.seek(0)
+    head = f.read(8)
+    (ftyp_size,) = struct.unpack(">I", head[:4])
+    ftyp = f.read(max(ftyp_size - 8, 0))
+    brands = {ftyp[i:i + 4] for i in range(0, len(ftyp), 4)}
+    if not brands & HEIF_BRANDS:
+        return None
+
+    # Find the top-level `meta` box
+    pos = ftyp_size
+    while True:
+        f.seek(pos)
+        box = f.read(8)
+        if len(box) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", box)
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        else:
+            header_size = 8
+        if kind == b"meta":
+            if size - header_size > MAX_META_BOX:
+                return None
+            meta = f.read(size - header_size)
+            break
+        if size < header_size:
+            return None
+        pos += size
+
+    header = ImageHeader()
+    exif_location, size = _parse_meta(meta)
+    if size:
+        header.width, header.height = size
+    if exif_location and exif_location[1] <= MAX_EXIF_ITEM:
+        f.seek(exif_location[0])
+        item = f.read(exif_location[1])
+        if len(item) >= 4:
+            # The Exif item starts with the offset of the TIFF header after this field
+            (tiff_offset,) = struct.unpack(">I", item[:4])
+            parse_tiff(item[4 + tiff_offset:], header)
+    return header
+
+# ─── Entry Point ────────────────────────────────────────────────────────────
+
+def read_image_header(path: str) -> Optional[ImageHeader]:
+    """
+    Read capture time, orientation and size from a JPEG or HEIC header.
+    Returns None for other formats or unreadable headers.
+    """
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(12)
+            if magic[:2] == b"\xff\xd8":
+                return _read_jpeg(f)
+            if magic[4:8] == b"ftyp":
+                return _read_heif(f)
+    except (OSError, struct.error, IndexError, ValueError):
+        return None
+    return None
@@ -0,0 +1,213 @@
+import codecs  # For resolving the form charset
+from dataclasses import dataclass  # Lightweight result containers
+from pathlib import Path  # File path handling
+from typing import Awaitable, Callable, Optional  # Type hints for the destination callback
+import aiofiles, hashlib, os  # Async file writes, hashing and cleanup
+from starlette.requests import ClientDisconnect, Request  # Incoming request whose body is streamed
+
+try:
+    import python_multipart as multipart  # Push-style multipart parser used by Starlette
+    from python_multipart.exceptions import ParseError
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # pragma: no cover - older installs only ship the `multipart` module
+    import multipart
+    from multipart.exceptions import ParseError
+    from multipart.multipart import parse_options_header
+
+# ─── Exceptions & Result Types ──────────────────────────────────────────────
+
+class IngestError(Exception):
+    """
+    Raised when the request body is not a well-formed upload.
+    """
+
+class UploadTooLarge(IngestError):
+    """
+    Raised as soon as the files in a body exceed the reader's byte budget.
+    """
+
+@dataclass
+class IngestedFile:
+    """
+    A file part that has been written to its final location.
+    """
+    field_name: str
+    filename: str
+    content_type: str
+    path: Path
+    size: int
+    sha256: str = ""  # Hex digest, computed while the bytes streamed in
+
+# Called with (filename, content_type, fields received so far); returns the destination path.
+DestinationResolver = Callable[[str, str, dict], Awaitable[Path]]
+
+# ─── Streaming Multipart Reader ─────────────────────────────────────────────
+
+class StreamingMultipartReader:
+    """
+    Parse a multipart/form-data body chunk by chunk and write file parts
+    straight to disk, so memory per upload stays constant and Starlette's
+    spool file is never created. Each file's SHA-256 is computed on the way.
+
+    Plain form fields are collected in `fields`; they must precede the file
+    parts that depend on them (browsers send parts in DOM order).
+
+    With `max_file_bytes` set, reading stops with UploadTooLarge once the
+    file parts together go past it, before the excess is written.
+
+    A malformed body or a client that disconnects mid-upload also ends in
+    an IngestError, after the files written so far are removed.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        resolve_destination: DestinationResolver,
+        max_field_size: int = 64 * 1024,
+        max_file_bytes: Optional[int] = None,
+    ):
+        self.request = request
+        self.resolve_destination = resolve_destination
+        self.max_field_size = max_field_size
+        self.max_file_bytes = max_file_bytes
+        self.file_bytes = 0  # File bytes received so far, across all parts
+        self.fields: dict[str, str] = {}
+        self.files: list[IngestedFile] = []
+        self._events: list[tuple] = []  # Parser callbacks are sync; queue their output for the async writer
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._content_type = b""
+        self._charset = "utf-8"
+
+    # ── Parser callbacks ──
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._content_type = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        name = self._header_name.lower()
+        if name == b"content-disposition":
+            self._disposition = self._header_value
+        elif name == b"content-type":
+            self._content_type = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise IngestError('The Content-Disposition header field "name" must be provided.')
+        name = options[b"name"].decode(self._charset, errors="replace")
+        filename = options.get(b"filename")
+        if filename is None:
+            self._events.append(("field", name))
+        else:
+            self._events.append((
+                "file",
+                name,
+                filename.decode(self._charset, errors="replace"),
+                self._content_type.decode("latin-1") or "application/octet-stream",
+            ))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self):
+        self._events.append(("end",))
+
+    # ── Async driver ──
+    async def read(self) -> tuple[dict[str, str], list[IngestedFile]]:
+        """
+        Consume the request body and return (fields, files).
+        """
+        content_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise IngestError("Expected a multipart/form-data body.")
+        charset = params.get(b"charset", b"utf-8").decode("latin-1")
+        try:
+            self._charset = codecs.lookup(charset).name
+        except LookupError:
+            self._charset = "latin-1"
+
+        parser = multipart.MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+        current_field: Optional[tuple[str, bytearray]] = None
+        current_file: Optional[IngestedFile] = None
+        digest = None
+        out = None
+        try:
+            async for chunk in self.request.stream():
+                parser.write(chunk)
+                for event in self._events:
+                    kind = event[0]
+                    if kind == "field":
+                        current_field = (event[1], bytearray())
+                    elif kind == "file":
+                        _, name, filename, part_type = event
+                        dest = await self.resolve_destination(filename, part_type, self.fields)
+                        current_file = IngestedFile(name, filename, part_type, dest, 0)
+                        digest = hashlib.sha256()
+                        out = await aiofiles.open(dest, "wb")
+                    elif kind == "data":
+                        if current_file is not None:
+                            self.file_bytes += len(event[1])
+                            if self.max_file_bytes is not None and self.file_bytes > self.max_file_bytes:
+                                raise UploadTooLarge("The upload is larger than the space left for this event.")
+                            await out.write(event[1])
+                            digest.update(event[1])
+                            current_file.size += len(event[1])
+                        elif current_field is not None:
+                            if len(current_field[1]) + len(event[1]) > self.max_field_size:
+                                raise IngestError(f"Form field '{current_field[0]}' is too large.")
+                            current_field[1].extend(event[1])
+                    elif kind == "end":
+                        if current_file is not None:
+                            await out.close()
+                            out = None
+                            current_file.sha256 = digest.hexdigest()
+                            self.files.append(current_file)
+                            current_file = None
+                        elif current_field is not None:
+                            self.fields[current_field[0]] = current_field[1].decode(self._charset, errors="replace")
+                            current_field = None
+                self._events.clear()
+            parser.finalize()
+            if current_file is not None or current_field is not None:
+                raise IngestError("Upload body ended before the last part was complete.")
+        except BaseException as exc:
+            # The request failed, so nothing will be recorded: drop every file it wrote
+            if out is not None:
+                await out.close()
+            if current_file is not None:
+                self.files.append(current_file)
+            for written in self.files:
+                if written.path.exists():
+                    os.remove(written.path)
+            if isinstance(exc, ParseError):
+                raise IngestError(f"Malformed multipart body: {exc}") from exc
+            if isinstance(exc, ClientDisconnect):
+                raise IngestError("The client disconnected before the upload was complete.") from exc
+            raise
+        return self.fields, self.files
+
+def safe_filename(filename: str) -> str:
+    """
+    Strip any directory components a client put in the filename.
+    """
+    name = Path(filename.replace("\\", "/")).name
+    return name or "upload"
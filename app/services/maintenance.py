@@ -0,0 +1,176 @@
+import asyncio  # Periodic scheduling on the event loop
+import logging  # Sweep reports
+import os, time  # Stale scratch-file cleanup
+from datetime import datetime, timedelta, timezone  # Expiry cut-offs
+from typing import Optional  # Type hints
+from sqlalchemy import and_, delete  # Batched deletes
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import (
+    SWEEP_INTERVAL_SECONDS,
+    SWEEP_BATCH_SIZE,
+    STALE_UPLOAD_HOURS,
+    EMAIL_KEEP_DAYS,
+    STORAGE_RECONCILE_SECONDS,
+)
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event, OutboxEmail, RevokedToken, UploadSession, UserSession  # Database models
+from app.services.object_store import object_store  # Durable file storage
+from app.services.storage import incoming_path, partial_upload_path  # Storage layout helpers
+from app.services.event_codes import refill_code_pool  # Keeps free event codes ready
+from app.services.quota import reconcile_storage, release  # Storage usage counters
+
+logger = logging.getLogger(__name__)
+
+# ─── Sweeper ────────────────────────────────────────────────────────────────
+
+class MaintenanceSweeper:
+    """
+    Periodically deletes rows and files nothing will read again:
+    - expired user sessions and revocation entries,
+    - outbox emails delivered more than EMAIL_KEEP_DAYS ago,
+    - resumable and direct uploads untouched for `stale_upload_hours`, with
+      their bytes (or unfinished multipart upload) and storage reservation,
+    - scratch files left in the blob store's incoming folder by failed requests.
+    It also tops up the pool of free event codes and, every
+    `reconcile_seconds`, corrects storage counters that drifted from the rows.
+
+    Rows are deleted `batch_size` at a time, each batch in its own short
+    transaction, yielding to the event loop in between so request writers
+    are never locked out for long. Batches and file scans run in a worker
+    thread, so requests are not held up while they wait on the database.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = SWEEP_INTERVAL_SECONDS,
+        batch_size: int = SWEEP_BATCH_SIZE,
+        stale_upload_hours: float = STALE_UPLOAD_HOURS,
+        reconcile_seconds: float = STORAGE_RECONCILE_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.stale_upload_hours = stale_upload_hours
+        self.reconcile_seconds = reconcile_seconds
+        self._next_reconcile = 0.0  # Monotonic time of the next counter check; the first sweep runs one
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """
+        Run a sweep now and then every `interval_seconds`.
+        """
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sweep(self) -> dict[str, int]:
+        """
+        Run every cleanup once and return how many rows/files each removed.
+        """
+        now = datetime.now(timezone.utc)
+        removed = {
+            "user_sessions": await self._delete_batched(UserSession, UserSession.expires_at < now),
+            "revoked_tokens": await self._delete_batched(RevokedToken, RevokedToken.expires_at < now),
+            "sent_emails": await self._delete_batched(
+                OutboxEmail,
+                and_(OutboxEmail.status == "sent", OutboxEmail.sent_at < now - timedelta(days=EMAIL_KEEP_DAYS)),
+            ),
+            "upload_sessions": await self._prune_uploads(now - timedelta(hours=self.stale_upload_hours)),
+            "incoming_files": await asyncio.to_thread(self._prune_incoming, time.time() - self.stale_upload_hours * 3600),
+            "drifted_storage_counters": await self._reconcile_storage(),
+        }
+        if any(removed.values()):
+            logger.info("Maintenance sweep removed %s", ", ".join(f"{n} {k}" for k, n in removed.items()))
+        added = await asyncio.to_thread(refill_code_pool)
+        if added:
+            logger.info("Added %d codes to the event code pool", added)
+        return removed
+
+    # ── Internals ──
+    async def _loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as exc:
+                logger.warning("Maintenance sweep failed: %s", exc)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _delete_batched(self, model, condition) -> int:
+        total = 0
+        while True:
+            deleted = await asyncio.to_thread(self._delete_batch, model, condition)
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            await asyncio.sleep(0)  # Let waiting requests write between batches
+
+    def _delete_batch(self, model, condition) -> int:
+        with Session(engine) as session:
+            ids = session.exec(select(model.id).where(condition).limit(self.batch_size)).all()
+            if ids:
+                session.execute(delete(model).where(model.id.in_(ids)))
+                session.commit()
+        return len(ids)
+
+    async def _prune_uploads(self, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            pruned = await asyncio.to_thread(self._prune_upload_batch, cutoff)
+            total += pruned
+            if pruned < self.batch_size:
+                return total
+            await asyncio.sleep(0)
+
+    def _prune_upload_batch(self, cutoff: datetime) -> int:
+        with Session(engine) as session:
+            rows = session.exec(
+                select(UploadSession, Event)
+                .join(Event, Event.id == UploadSession.event_id)
+                .where(UploadSession.updated_at < cutoff)
+                .limit(self.batch_size)
+            ).all()
+            for upload, _ in rows:
+                if upload.multipart_id:  # Before any write, so no lock is held across the request
+                    object_store().abort_multipart(upload.storage_key, upload.multipart_id)
+            for upload, event in rows:
+                partial_upload_path(event, upload.id).unlink(missing_ok=True)
+                release(session, event, upload.upload_length, 0)
+                session.delete(upload)
+            session.commit()
+        return len(rows)
+
+    async def _reconcile_storage(self) -> int:
+        if time.monotonic() < self._next_reconcile:
+            return 0
+        self._next_reconcile = time.monotonic() + self.reconcile_seconds
+        total, after = 0, 0
+        while after is not None:
+            fixed, after = await asyncio.to_thread(self._reconcile_batch, after)
+            total += fixed
+            await asyncio.sleep(0)  # Let waiting requests write between batches
+        return total
+
+    def _reconcile_batch(self, after: int) -> tuple[int, Optional[int]]:
+        with Session(engine) as session:
+            return reconcile_storage(session, after, self.batch_size)
+
+    def _prune_incoming(self, cutoff: float) -> int:
+        folder = incoming_path("_").parent  # Also creates the folder if missing
+        removed = 0
+        for entry in os.scandir(folder):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # Finished and moved while we looked
+        return removed
+
+# Shared sweeper started from the application lifespan
+maintenance_sweeper = MaintenanceSweeper()
@@ -0,0 +1,119 @@
+from datetime import datetime  # Date and time handling
+from pathlib import Path  # File path handling
+from PIL import Image, ExifTags, ImageDraw, ImageFont, ImageOps, features  # Image metadata and previews
+import os  # Atomic renames
+from app.services.exif_reader import ImageHeader, read_image_header  # Header-only EXIF reader
+
+# Media helpers. This module is imported by the media job worker processes,
+# so it must stay free of web and database imports.
+
+# ─── Metadata Extraction ────────────────────────────────────────────────────
+
+def read_photo_header(path: str) -> ImageHeader | None:
+    """
+    Read capture time, orientation and size for a photo.
+    - JPEG and HEIC headers are parsed directly (no pixel decode).
+    - Other formats fall back to Pillow.
+    """
+    header = read_image_header(path)
+    if header is not None:
+        return header
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            header = ImageHeader(width=img.width, height=img.height)
+            header.orientation = exif.get(ExifTags.Base.Orientation, 1)
+            dt = exif.get_ifd(ExifTags.IFD.Exif).get(ExifTags.Base.DateTimeOriginal) \
+                or exif.get(ExifTags.Base.DateTime)
+            header.capture_time = datetime.strptime(dt, "%Y:%m:%d %H:%M:%S") if dt else None
+            return header
+    except Exception:
+        return None
+
+def extract_photo_time(path: str) -> datetime | None:
+    """
+    Extract the capture time from an image's EXIF metadata.
+    """
+    header = read_photo_header(path)
+    return header.capture_time if header else None
+
+# ─── Renditions ─────────────────────────────────────────────────────────────
+
+# Preview sizes (longest edge in pixels) generated for every uploaded photo
+RENDITION_SIZES = {"grid": 256, "viewer": 1280}
+
+# (file extension, Pillow format, content type), best compression first.
+# JPEG is always produced so every browser has something to show.
+RENDITION_FORMATS = [
+    fmt for fmt in [
+        ("avif", "AVIF", "image/avif"),
+        ("webp", "WEBP", "image/webp"),
+        ("jpg", "JPEG", "image/jpeg"),
+    ]
+    if fmt[1] == "JPEG" or features.check(fmt[1].lower())
+]
+
+def draw_watermark(img: Image.Image, text: str) -> Image.Image:
+    """
+    Overlay semi-transparent text in the bottom-right corner of a preview.
+    """
+    size = max(12, img.width // 24)
+    try:
+        font = ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 only has the fixed-size bitmap font
+        font = ImageFont.load_default()
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    margin = size // 2
+    position = (img.width - (right - left) - margin, img.height - (bottom - top) - margin)
+    draw.text(position, text, font=font, fill=(255, 255, 255, 140), stroke_width=1, stroke_fill=(0, 0, 0, 90))
+    return Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
+
+def generate_renditions(path: str, output_dir: str, watermark_text: str | None = None) -> list[str]:
+    """
+    Write every size/format preview of a photo into `output_dir`.
+    Returns the file names written (e.g. "grid.webp").
+    """
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    written = []
+    with Image.open(path) as img:
+        # Let JPEGs decode at a reduced scale: far cheaper than a full 12 MP decode
+        img.draft("RGB", (max(RENDITION_SIZES.values()),) * 2)
+        source = ImageOps.exif_transpose(img).convert("RGB")
+
+    for name, edge in sorted(RENDITION_SIZES.items(), key=lambda item: -item[1]):
+        preview = source.copy()
+        preview.thumbnail((edge, edge), Image.LANCZOS)
+        if watermark_text:
+            preview = draw_watermark(preview, watermark_text)
+        for ext, fmt, _ in RENDITION_FORMATS:
+            dest = out / f"{name}.{ext}"
+            tmp = out / f".{name}.{ext}.tmp"
+            preview.save(tmp, fmt, quality=80)
+            os.replace(tmp, dest)  # Never expose a half-written preview
+            written.append(dest.name)
+    return written
+
+# ─── Job Tasks (run in the media worker processes) ──────────────────────────
+
+def run_metadata_task(path: str, content_type: str) -> dict:
+    """
+    Extract capture time and display size for an uploaded photo.
+    (Videos are probed with ffprobe via app.services.media_tools.)
+    """
+    if not content_type.startswith("image/"):
+        return {}
+    header = read_photo_header(path)
+    if header is None:
+        return {}
+    width, height = header.display_size
+    return {"capture_time": header.capture_time, "width": width, "height": height}
+
+
+def run_renditions_task(path: str, output_dir: str, watermark_text: str | None) -> dict:
+    """
+    Generate the grid and viewer previews for an uploaded photo.
+    """
+    return {"renditions": generate_renditions(path, output_dir, watermark_text)}
@@ -0,0 +1,104 @@
+import base64, hashlib, hmac, math, os, time  # URL signatures and expiries
+from pathlib import Path  # File path handling
+from typing import Optional  # Type hints
+from urllib.parse import quote, urlencode  # Signed query strings and proxy paths
+from fastapi import HTTPException, Request  # Rejected links and request headers
+from fastapi.responses import FileResponse, Response  # Serving local files
+from app.core.config import SECRET_KEY  # Signing key
+
+# ─── Media Delivery ─────────────────────────────────────────────────────────
+#
+# Previews and originals are only reachable through signed links handed out
+# by the gallery listing: "<path>?expires=<unix time>&sig=<hmac>". The bytes
+# behind a signed link never change, so responses carry an immutable
+# Cache-Control that lasts until the link expires, and browsers and proxies
+# can keep them without asking again. Expiries are rounded up to a window,
+# so the same file gets the same link (and cache entry) for a while.
+#
+# Local files are served with a strong ETag (304 on If-None-Match) and Range
+# support for video seeking. Large ones can be handed to the reverse proxy
+# (MEDIA_SENDFILE), which sends them with sendfile() instead of uvicorn
+# copying them through Python.
+
+def _signature(path: str, expires: int) -> str:
+    mac = hmac.new(SECRET_KEY.encode(), f"{path}|{expires}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(mac[:18]).decode()  # 144 bits, no padding
+
+def sign_url(path: str, now: Optional[float] = None) -> str:
+    """
+    `path` with an expiry and signature appended.
+    - Valid for at least MEDIA_URL_TTL_SECONDS, at most one window more.
+    """
+    from app.core.config import MEDIA_URL_TTL_SECONDS, MEDIA_URL_WINDOW_SECONDS
+    now = time.time() if now is None else now
+    window = max(MEDIA_URL_WINDOW_SECONDS, 1)
+    expires = math.ceil((now + MEDIA_URL_TTL_SECONDS) / window) * window
+    return f"{path}?{urlencode({'expires': expires, 'sig': _signature(path, expires)})}"
+
+def verify_signature(request: Request) -> int:
+    """
+    Check the request's link signature; returns the seconds it has left.
+    Raises a 403 for a missing, forged or expired signature.
+    """
+    try:
+        expires = int(request.query_params.get("expires", ""))
+    except ValueError:
+        expires = 0
+    signature = request.query_params.get("sig", "").encode()
+    remaining = expires - int(time.time())
+    if remaining <= 0 or not hmac.compare_digest(signature, _signature(request.url.path, expires).encode()):
+        raise HTTPException(status_code=403, detail="This link is invalid or has expired")
+    return remaining
+
+def immutable_cache(seconds: int) -> str:
+    """
+    Cache-Control for a signed response, kept until its link expires.
+    """
+    return f"public, max-age={seconds}, immutable"
+
+# ─── Local Files ────────────────────────────────────────────────────────────
+
+NOT_MODIFIED_HEADERS = ("etag", "cache-control", "vary", "last-modified")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag` (or is "*").
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def file_response(request: Optional[Request], path: Path, media_type: str, filename: Optional[str] = None,
+                  headers: Optional[dict] = None) -> Response:
+    """
+    Serve a local file, as an attachment when `filename` is given.
+    - Strong ETag from the file's size and mtime; a matching If-None-Match
+      gets an empty 304. Range and If-Range are answered by FileResponse,
+      which checks against the same tag.
+    - Files of MEDIA_SENDFILE_MIN_MB and up are left to the proxy when
+      MEDIA_SENDFILE is set: an empty response whose X-Accel-Redirect
+      (nginx) or X-Sendfile (Apache, lighttpd) header names the file.
+    """
+    from app.core import config  # Read late, so scripts can point STORAGE_ROOT elsewhere first
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found")
+    response = FileResponse(path, media_type=media_type, filename=filename, headers=headers, stat_result=stat)
+    if request is not None and etag_matches(request.headers.get("if-none-match"), response.headers["etag"]):
+        return Response(status_code=304, headers={
+            name: value for name, value in response.headers.items() if name in NOT_MODIFIED_HEADERS
+        })
+
+    if config.MEDIA_SENDFILE and stat.st_size >= config.MEDIA_SENDFILE_MIN_MB * 1024 * 1024:
+        offload = {name: value for name, value in response.headers.items() if name != "content-length"}
+        if config.MEDIA_SENDFILE == "x-accel":
+            relative = Path(path).resolve().relative_to(Path(config.STORAGE_ROOT).resolve())
+            offload["X-Accel-Redirect"] = config.MEDIA_SENDFILE_PREFIX.rstrip("/") + "/" + quote(relative.as_posix())
+        elif config.MEDIA_SENDFILE == "x-sendfile":
+            offload["X-Sendfile"] = str(Path(path).resolve())
+        else:
+            raise ValueError(f"Unknown MEDIA_SENDFILE '{config.MEDIA_SENDFILE}'")
+        return Response(headers=offload)
+    return response
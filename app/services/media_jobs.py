@@ -0,0 +1,281 @@
+import asyncio  # Event loop integration for the worker
+import logging  # Worker diagnostics
+import multiprocessing  # Process start method for the pool
+import os, socket, time  # Worker identity and lease renewal timing
+from concurrent.futures import ProcessPoolExecutor  # CPU-bound work off the event loop
+from datetime import datetime, timedelta, timezone  # Retry scheduling
+from typing import Optional  # Type hints
+from uuid import uuid4  # Worker identity
+from sqlalchemy import update  # Atomic job claiming
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import (
+    MEDIA_WORKERS,
+    MEDIA_JOB_MAX_ATTEMPTS,
+    MEDIA_JOB_RETRY_SECONDS,
+    MEDIA_JOB_POLL_SECONDS,
+    MEDIA_JOB_LEASE_SECONDS,
+)
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event, EventType, FileMetadata, MediaJob  # Database models
+from app.services import media  # Task functions run in the worker processes
+from app.services import media_tools  # Async ffprobe/ffmpeg runner
+from app.services.object_store import local_copy  # Originals as local files for the tools
+from app.services.storage import original_key, derived_folder  # Storage layout helpers
+
+logger = logging.getLogger(__name__)
+
+# ─── Enqueueing ─────────────────────────────────────────────────────────────
+
+def enqueue_media_jobs(session: Session, meta: FileMetadata) -> list[MediaJob]:
+    """
+    Add the processing jobs an uploaded file needs to the session.
+    The caller commits, then calls `media_worker.notify()`.
+    """
+    content_type = meta.file_type or ""
+    jobs = []
+    if content_type.startswith(("image/", "video/")):
+        jobs.append(MediaJob(file_id=meta.id, kind="metadata"))
+    if content_type.startswith("image/"):
+        jobs.append(MediaJob(file_id=meta.id, kind="renditions"))
+    if content_type.startswith("video/") and content_type != "video/mp4":
+        jobs.append(MediaJob(file_id=meta.id, kind="transcode"))
+    for job in jobs:
+        session.add(job)
+    return jobs
+
+# ─── Worker ─────────────────────────────────────────────────────────────────
+
+class MediaJobWorker:
+    """
+    Runs queued MediaJob rows, at most `concurrency` at once. Photo metadata
+    and previews are made in a process pool; ffprobe/ffmpeg run as asyncio
+    subprocesses.
+    - Jobs are claimed atomically (pending → running), so several app
+      workers can share one queue.
+    - A claimed job carries the worker's id and a lease (updated_at) that
+      the worker renews while it runs. Jobs whose lease is older than
+      `lease_seconds`, left by a crashed or stuck worker, are re-queued by
+      whichever worker notices first; jobs other workers are still running
+      are left alone.
+    - Failed jobs are retried with exponential backoff up to `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = MEDIA_WORKERS,
+        max_attempts: int = MEDIA_JOB_MAX_ATTEMPTS,
+        retry_seconds: int = MEDIA_JOB_RETRY_SECONDS,
+        poll_seconds: float = MEDIA_JOB_POLL_SECONDS,
+        lease_seconds: float = MEDIA_JOB_LEASE_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: dict[asyncio.Task, int] = {}  # In-flight job tasks and their job ids
+        self._leases_renewed = 0.0  # time.monotonic() of the last renewal
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """
+        Start the pool and the polling loop on the current event loop.
+        """
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.concurrency,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        """
+        Stop polling, wait for in-flight jobs and shut the pool down.
+        """
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._pool:
+            self._pool.shutdown(wait=True)
+        self._loop_task = self._pool = None
+
+    def notify(self):
+        """
+        Wake the worker after new jobs were committed.
+        """
+        if self._wakeup:
+            self._wakeup.set()
+
+    # ── Internals ──
+    def _renew_leases(self, job_ids: list[int]):
+        """
+        Renew the leases of this worker's jobs (`job_ids`) and re-queue running
+        jobs whose lease has expired; at most once every third of `lease_seconds`.
+        """
+        if time.monotonic() - self._leases_renewed < self.lease_seconds / 3:
+            return
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            if job_ids:
+                session.execute(
+                    update(MediaJob)
+                    .where(MediaJob.id.in_(job_ids), MediaJob.claimed_by == self.worker_id)
+                    .values(updated_at=now)
+                )
+            session.execute(
+                update(MediaJob)
+                .where(MediaJob.status == "running", MediaJob.updated_at < now - timedelta(seconds=self.lease_seconds))
+                .values(status="pending", claimed_by=None, updated_at=now)
+            )
+            session.commit()
+        self._leases_renewed = time.monotonic()
+
+    def _claim_jobs(self, limit: int) -> list[int]:
+        now = datetime.now(timezone.utc)
+        claimed = []
+        with Session(engine) as session:
+            candidates = session.exec(
+                select(MediaJob.id)
+                .where(MediaJob.status == "pending", MediaJob.run_after <= now)
+                .order_by(MediaJob.run_after, MediaJob.id)  # Served by ix_mediajob_status_run_after
+                .limit(limit)
+            ).all()
+            for job_id in candidates:
+                result = session.execute(
+                    update(MediaJob)
+                    .where(MediaJob.id == job_id, MediaJob.status == "pending")
+                    .values(status="running", claimed_by=self.worker_id, attempts=MediaJob.attempts + 1, updated_at=now)
+                )
+                if result.rowcount == 1:
+                    claimed.append(job_id)
+            session.commit()
+        return claimed
+
+    async def _poll(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self._renew_leases, list(self._running.values()))
+                free = self.concurrency - len(self._running)
+                if free > 0:
+                    for job_id in await asyncio.to_thread(self._claim_jobs, free):
+                        task = asyncio.create_task(self._execute(job_id), name=str(job_id))
+                        self._running[task] = job_id
+                        task.add_done_callback(self._job_finished)
+            except Exception as exc:  # e.g. "database is locked"; try again next round
+                logger.warning("Media job poll failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _job_finished(self, task: asyncio.Task):
+        self._running.pop(task, None)
+        if not task.cancelled() and task.exception():  # Its lease runs out and the job is re-queued
+            logger.warning("Media job %s stopped: %s", task.get_name(), task.exception())
+        self.notify()  # A slot is free again
+
+    def _load_job(self, job_id: int) -> Optional[tuple]:
+        """
+        (kind, content type, original's key, output folder, watermark) of a
+        claimed job, or None (and the job failed) if it or its file is gone.
+        """
+        with Session(engine) as session:
+            job = session.get(MediaJob, job_id)
+            if job is None:
+                return None
+            meta = session.get(FileMetadata, job.file_id)
+            event = session.get(Event, meta.event_id) if meta else None
+            if not meta or not event:
+                if self._finish(session, job_id, status="failed", last_error="File no longer exists"):
+                    session.commit()
+                return None
+            event_type = session.get(EventType, event.event_type_id) if event.event_type_id else None
+            return (
+                job.kind,
+                meta.file_type or "",
+                original_key(event, meta),
+                derived_folder(event, meta),
+                event_type.watermark_text if event_type else None,
+            )
+
+    async def _execute(self, job_id: int):
+        loaded = await asyncio.to_thread(self._load_job, job_id)
+        if loaded is None:
+            return
+        kind, content_type, key, output, watermark_text = loaded
+
+        loop = asyncio.get_running_loop()
+        try:
+            if kind not in ("metadata", "renditions", "transcode"):
+                raise ValueError(f"Unknown media job kind '{kind}'")
+            async with local_copy(key) as original:  # Downloaded first when stored remotely
+                source = str(original)
+                if kind == "metadata" and content_type.startswith("video/"):
+                    result = {"capture_time": await media_tools.extract_video_time(source)}
+                elif kind == "metadata":
+                    # Pillow work is CPU-bound Python, so it goes to the process pool
+                    result = await loop.run_in_executor(self._pool, media.run_metadata_task, source, content_type)
+                elif kind == "renditions":
+                    result = await loop.run_in_executor(
+                        self._pool, media.run_renditions_task, source, str(output), watermark_text
+                    )
+                else:
+                    output.mkdir(parents=True, exist_ok=True)
+                    await media_tools.transcode_to_mp4(source, str(output / "video.mp4"))
+                    result = {}
+        except Exception as exc:
+            logger.warning("Media job %s (%s) failed: %s", job_id, kind, exc)
+            await asyncio.to_thread(self._record_failure, job_id, exc)
+            return
+        await asyncio.to_thread(self._record_success, job_id, result)
+
+    def _finish(self, session: Session, job_id: int, **values) -> bool:
+        """
+        Update a job only while this worker still holds its lease. False (and
+        nothing written) once the lease expired and the job was handed on, or
+        the job was removed; the caller commits.
+        """
+        return session.execute(
+            update(MediaJob)
+            .where(MediaJob.id == job_id, MediaJob.status == "running", MediaJob.claimed_by == self.worker_id)
+            .values(updated_at=datetime.now(timezone.utc), **values)
+        ).rowcount == 1
+
+    def _record_success(self, job_id: int, result: dict):
+        with Session(engine) as session:
+            job = session.get(MediaJob, job_id)
+            if job is None or not self._finish(session, job_id, status="done", last_error=None):
+                logger.info("Media job %s was handed on or removed; its result is dropped", job_id)
+                return
+            meta = session.get(FileMetadata, job.file_id) if job.kind == "metadata" else None
+            if meta is not None:  # None for other kinds, or if the file was purged while the job ran
+                for field in ("capture_time", "width", "height"):
+                    if result.get(field) is not None:
+                        setattr(meta, field, result[field])
+                session.add(meta)
+            session.commit()
+
+    def _record_failure(self, job_id: int, exc: Exception):
+        with Session(engine) as session:
+            job = session.get(MediaJob, job_id)
+            if job is None:
+                return
+            if job.attempts >= self.max_attempts:
+                retry = {"status": "failed"}
+            else:
+                delay = timedelta(seconds=self.retry_seconds * 2 ** (job.attempts - 1))
+                retry = {"status": "pending", "run_after": datetime.now(timezone.utc) + delay}
+            if self._finish(session, job_id, last_error=str(exc)[:1000], **retry):
+                session.commit()
+
+# Shared worker started from the application lifespan
+media_worker = MediaJobWorker()
@@ -0,0 +1,101 @@
+import asyncio  # Non-blocking subprocesses
+import json  # Parsing ffprobe output
+from datetime import datetime  # Date and time handling
+from functools import lru_cache  # Cached tool lookups
+from typing import Optional  # Type hints
+import shutil  # Locating executables
+from app.core.config import FFMPEG_CONCURRENCY, FFPROBE_TIMEOUT_SECONDS, FFMPEG_TIMEOUT_SECONDS
+
+# ─── Async ffmpeg/ffprobe Runner ────────────────────────────────────────────
+#
+# Media tools run as asyncio subprocesses so a slow or malformed video never
+# blocks the event loop. A global semaphore caps how many run at once, every
+# call has a timeout, and the child is killed if the caller is cancelled.
+
+class ToolError(Exception):
+    """
+    Raised when a media tool is missing or cannot complete.
+    """
+
+class ToolTimeout(ToolError):
+    """
+    Raised when a media tool runs past its timeout (the process is killed).
+    """
+
+_tool_slots = asyncio.Semaphore(FFMPEG_CONCURRENCY)
+
+@lru_cache(maxsize=None)
+def tool_path(name: str) -> Optional[str]:
+    """
+    Resolve a tool on PATH once per process instead of on every call.
+    """
+    return shutil.which(name)
+
+async def run_tool(name: str, *args: str, timeout: float) -> tuple[int, bytes, bytes]:
+    """
+    Run a media tool and return (returncode, stdout, stderr).
+    """
+    path = tool_path(name)
+    if path is None:
+        raise ToolError(f"{name} is not installed")
+
+    async with _tool_slots:
+        proc = await asyncio.create_subprocess_exec(
+            path, *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await _kill(proc)
+            raise ToolTimeout(f"{name} timed out after {timeout:g}s")
+        except asyncio.CancelledError:
+            await asyncio.shield(_kill(proc))
+            raise
+    return proc.returncode, stdout, stderr
+
+async def _kill(proc: asyncio.subprocess.Process):
+    if proc.returncode is None:
+        proc.kill()
+    await proc.wait()
+
+# ─── Media Operations ───────────────────────────────────────────────────────
+
+async def extract_video_time(path: str) -> datetime | None:
+    """
+    Extract the creation time from a video's metadata using ffprobe.
+    """
+    try:
+        returncode, stdout, _ = await run_tool(
+            "ffprobe", "-v", "quiet", "-print_format", "json",
+            "-show_entries", "format_tags=creation_time", path,
+            timeout=FFPROBE_TIMEOUT_SECONDS,
+        )
+        if returncode != 0:
+            return None
+        info = json.loads(stdout or b"{}")
+        ts = info.get("format", {}).get("tags", {}).get("creation_time")
+        if not ts:
+            return None
+        ts = ts.rstrip("Z")
+        return datetime.fromisoformat(ts)
+    except (ToolError, ValueError):
+        return None
+
+async def transcode_to_mp4(input_path: str, output_path: str) -> None:
+    """
+    Transcode a video file to MP4 format using ffmpeg.
+    Raises ToolError if ffmpeg is missing, fails or times out.
+    """
+    returncode, _, stderr = await run_tool(
+        "ffmpeg", "-v", "error", "-i", input_path,
+        "-c:v", "libx264", "-c:a", "aac",
+        "-movflags", "+faststart",
+        "-y",  # Overwrite output
+        output_path,
+        timeout=FFMPEG_TIMEOUT_SECONDS,
+    )
+    if returncode != 0:
+        raise ToolError(f"ffmpeg failed: {stderr.decode(errors='replace')[-500:]}")
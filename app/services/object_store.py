@@ -0,0 +1,372 @@
+import asyncio  # Blocking store calls off the event loop
+from abc import ABC, abstractmethod  # Store interface
+import os, tempfile  # Atomic local writes and scratch copies
+from concurrent.futures import ThreadPoolExecutor  # Parallel size lookups
+from contextlib import asynccontextmanager  # Local copies for path-based tools
+from pathlib import Path  # File path handling
+from typing import AsyncIterator, BinaryIO, Optional  # Type hints
+from urllib.parse import quote  # Non-ASCII download names
+from fastapi import HTTPException, Request  # Missing objects and conditional requests
+from fastapi.responses import RedirectResponse, Response  # Serving stored objects
+from app.services.media_delivery import file_response  # Cache-friendly local files
+
+try:
+    import boto3  # Optional: only needed with STORAGE_BACKEND=s3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - local-only installs
+    boto3 = None
+
+# ─── Object Storage ─────────────────────────────────────────────────────────
+#
+# Durable files (uploaded originals and event banners) are kept in an
+# ObjectStore under "/"-separated keys such as ".blobs/ab/<sha256>" (see
+# app/services/storage.py for the layout). STORAGE_BACKEND picks the store:
+# - "local": files under STORAGE_ROOT, the key being the relative path,
+# - "s3": a bucket on any S3-compatible service (AWS, MinIO, ...). Browsers
+#   upload originals straight into the bucket and download them from it
+#   through presigned URLs, so those bytes never pass through the app.
+#
+# Scratch space (uploads streaming in, resumable uploads) and generated
+# files (previews, QR codes) stay on the local disk with either store.
+
+MB = 1024 * 1024
+MAX_PARTS = 10_000  # S3's limit on parts per multipart upload
+SIZE_LOOKUPS = 16  # Object size requests run at once
+
+class ObjectStoreError(Exception):
+    """
+    Raised when the store rejects a request (e.g. a multipart upload whose parts do not match).
+    """
+
+class ObjectStore(ABC):
+    """
+    Interface of a store for durable files, addressed by key.
+    - Blocking: call from a thread (`asyncio.to_thread`) in request handlers.
+    - `direct_uploads` stores (see `DirectUploadStore`) also hand out
+      presigned multipart upload URLs.
+    """
+    direct_uploads = False
+
+    @abstractmethod
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        """
+        Store a fully written local file under `key`; `source` is consumed.
+        """
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        """
+        Store `data` under `key`.
+        """
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """
+        Size in bytes of a stored object, or None if there is none.
+        """
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def sizes(self, keys: list[str]) -> dict[str, Optional[int]]:
+        return {key: self.size(key) for key in keys}
+
+    @abstractmethod
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        """
+        Readable stream of an object from byte `start`; FileNotFoundError if missing.
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove an object; a missing one is not an error.
+        """
+
+    @abstractmethod
+    def fetch(self, key: str) -> tuple[Path, bool]:
+        """
+        A local file with the object's bytes, and whether it is a temporary copy.
+        """
+
+    @abstractmethod
+    def response(self, key: str, media_type: str, filename: Optional[str] = None,
+                 headers: Optional[dict] = None, request: Optional[Request] = None) -> Response:
+        """
+        HTTP response serving an object, as an attachment when `filename` is given.
+        - `request` lets a local file answer If-None-Match and Range itself.
+        """
+
+class DirectUploadStore(ObjectStore):
+    """
+    A store clients can upload to directly, in parts sent to presigned URLs.
+    """
+    direct_uploads = True
+    part_size = 16 * MB
+
+    def part_size_for(self, total: int) -> int:
+        """
+        Part size for a multipart upload of `total` bytes.
+        """
+        return max(self.part_size, -(-total // MAX_PARTS))
+
+    @abstractmethod
+    def create_multipart(self, key: str, content_type: str) -> str:
+        """
+        Start a multipart upload and return its id.
+        """
+
+    @abstractmethod
+    def part_url(self, key: str, upload_id: str, part_number: int) -> str:
+        """
+        Presigned URL a client PUTs one part to; the response's ETag identifies the part.
+        """
+
+    @abstractmethod
+    def uploaded_parts(self, key: str, upload_id: str) -> dict[int, str]:
+        """
+        Part number → ETag of the parts stored so far.
+        """
+
+    @abstractmethod
+    def complete_multipart(self, key: str, upload_id: str, parts: dict[int, str]):
+        """
+        Assemble the parts into the object; ObjectStoreError if they do not match.
+        """
+
+    @abstractmethod
+    def abort_multipart(self, key: str, upload_id: str):
+        """
+        Drop an unfinished multipart upload and the parts stored so far.
+        """
+
+# ─── Local Filesystem ───────────────────────────────────────────────────────
+
+class LocalObjectStore(ObjectStore):
+    """
+    Objects as files under `root`; a key is the file's relative path.
+    - Moving a finished upload in is a rename, never a copy.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, dest)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp, dest)  # Readers see the old file or the new one, never half of it
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except OSError:
+            return None
+
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        f = open(self.path(key), "rb")
+        f.seek(start)
+        return f
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def fetch(self, key: str) -> tuple[Path, bool]:
+        return self.path(key), False
+
+    def response(self, key: str, media_type: str, filename: Optional[str] = None,
+                 headers: Optional[dict] = None, request: Optional[Request] = None) -> Response:
+        if not self.path(key).is_file():
+            raise HTTPException(status_code=404, detail="File not found")
+        return file_response(request, self.path(key), media_type, filename=filename, headers=headers)
+
+# ─── S3-Compatible ──────────────────────────────────────────────────────────
+
+class S3ObjectStore(DirectUploadStore):
+    """
+    Objects in an S3-compatible bucket, under an optional key prefix.
+    - Downloads redirect to short-lived presigned URLs.
+    - Clients upload large files in parts straight to the bucket.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        scratch: Path,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        url_seconds: int = 3600,
+        part_size: int = 16 * MB,
+    ):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs boto3 installed")
+        self.bucket, self.prefix, self.scratch = bucket, prefix, scratch
+        self.url_seconds, self.part_size = url_seconds, part_size
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Path-style URLs: MinIO and most self-hosted services have no per-bucket hostnames
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"}),
+        )
+        self.transfer = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put_file(self, key: str, source: Path, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_file(str(source), self.bucket, self._key(key), ExtraArgs=extra, Config=self.transfer)
+        os.remove(source)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, **extra)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"]
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def sizes(self, keys: list[str]) -> dict[str, Optional[int]]:
+        # One request per object, so run a few at once
+        with ThreadPoolExecutor(SIZE_LOOKUPS) as pool:
+            return dict(zip(keys, pool.map(self.size, keys)))
+
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        extra = {"Range": f"bytes={start}-"} if start else {}
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key), **extra)["Body"]
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def fetch(self, key: str) -> tuple[Path, bool]:
+        self.scratch.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.scratch, prefix="fetch-")
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), tmp, Config=self.transfer)
+        except Exception:
+            os.remove(tmp)
+            raise
+        return Path(tmp), True
+
+    def response(self, key: str, media_type: str, filename: Optional[str] = None,
+                 headers: Optional[dict] = None, request: Optional[Request] = None) -> Response:
+        params = {"Bucket": self.bucket, "Key": self._key(key), "ResponseContentType": media_type}
+        if filename:
+            params["ResponseContentDisposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+        url = self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.url_seconds)
+        # The redirect itself must not outlive the URL it points to
+        return RedirectResponse(url, status_code=307, headers={"Cache-Control": "private, no-store"})
+
+    # ── Direct uploads ──
+    def create_multipart(self, key: str, content_type: str) -> str:
+        return self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self._key(key), ContentType=content_type or "application/octet-stream"
+        )["UploadId"]
+
+    def part_url(self, key: str, upload_id: str, part_number: int) -> str:
+        return self.client.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": self.bucket, "Key": self._key(key), "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=self.url_seconds,
+        )
+
+    def uploaded_parts(self, key: str, upload_id: str) -> dict[int, str]:
+        parts = {}
+        try:
+            pages = self.client.get_paginator("list_parts").paginate(
+                Bucket=self.bucket, Key=self._key(key), UploadId=upload_id
+            )
+            for page in pages:
+                parts.update((part["PartNumber"], part["ETag"]) for part in page.get("Parts", []))
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] == "NoSuchUpload":
+                raise FileNotFoundError(key) from exc
+            raise
+        return parts
+
+    def complete_multipart(self, key: str, upload_id: str, parts: dict[int, str]):
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self._key(key), UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": parts[n]} for n in sorted(parts)]},
+            )
+        except ClientError as exc:
+            raise ObjectStoreError(exc.response["Error"].get("Message") or str(exc)) from exc
+
+    def abort_multipart(self, key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "NoSuchUpload":
+                raise
+
+# ─── Shared Store ───────────────────────────────────────────────────────────
+
+_store: Optional[ObjectStore] = None
+
+def object_store() -> ObjectStore:
+    """
+    The store selected by STORAGE_BACKEND, created on first use.
+    """
+    global _store
+    if _store is None:
+        from app.core import config  # Read late, so scripts can point STORAGE_ROOT elsewhere first
+        if config.STORAGE_BACKEND == "local":
+            _store = LocalObjectStore(config.STORAGE_ROOT)
+        elif config.STORAGE_BACKEND == "s3":
+            _store = S3ObjectStore(
+                config.S3_BUCKET,
+                scratch=Path(config.STORAGE_ROOT) / ".blobs" / ".incoming",  # Swept like other scratch files
+                prefix=config.S3_PREFIX,
+                endpoint_url=config.S3_ENDPOINT_URL,
+                region=config.S3_REGION,
+                access_key_id=config.S3_ACCESS_KEY_ID,
+                secret_access_key=config.S3_SECRET_ACCESS_KEY,
+                url_seconds=config.S3_URL_EXPIRE_SECONDS,
+                part_size=config.S3_PART_SIZE_MB * MB,
+            )
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{config.STORAGE_BACKEND}'")
+    return _store
+
+@asynccontextmanager
+async def local_copy(key: str) -> AsyncIterator[Path]:
+    """
+    A local file holding an object, for tools that need a path (Pillow, ffmpeg).
+    - The local store hands out the stored file itself; others download a
+      temporary copy that is removed on exit.
+    """
+    path, temporary = await asyncio.to_thread(object_store().fetch, key)
+    try:
+        yield path
+    finally:
+        if temporary:
+            path.unlink(missing_ok=True)
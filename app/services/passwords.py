@@ -0,0 +1,36 @@
+import asyncio  # Awaiting work done in the executor
+from concurrent.futures import ThreadPoolExecutor  # Bounded pool for bcrypt
+import bcrypt  # Password hashing
+from app.core.config import BCRYPT_ROUNDS, PASSWORD_HASH_CONCURRENCY
+
+# bcrypt is deliberately slow (~250 ms at 12 rounds) and releases the GIL
+# while it works, so it runs on a few dedicated threads instead of the event
+# loop. The pool size caps how many CPU cores a burst of logins can take;
+# extra requests queue here rather than stalling everyone else's requests.
+
+# ─── Executor ───────────────────────────────────────────────────────────────
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+def _check(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:  # Malformed stored hash
+        return False
+
+# ─── Async API ──────────────────────────────────────────────────────────────
+
+async def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """
+    Hash a password with bcrypt off the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _hash, password, rounds)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """
+    Check a password against a stored bcrypt hash off the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _check, password, hashed)
@@ -0,0 +1,128 @@
+import hashlib, os  # Fingerprints and atomic renames
+from datetime import datetime, timezone  # Render timestamps
+from pathlib import Path  # File path handling
+import qrcode  # QR encoding
+import qrcode.image.svg  # Vector output for print
+from fastapi import HTTPException, Request, Response  # HTTP plumbing for the QR routes
+from fastapi.responses import FileResponse  # Serving stored images
+from PIL import Image  # Padding PNGs to their exact size
+from sqlalchemy.exc import IntegrityError  # Concurrent first renders
+from sqlmodel import Session, select  # ORM for database queries
+from app.models import Event, QRCode  # Database models
+from app.services.storage import event_folder  # Storage layout helpers
+
+# Named PNG sizes (edge in pixels); SVG is offered as well for print
+QR_SIZES = {"small": 256, "medium": 512, "large": 1024}
+QR_DEFAULT_SIZE = "medium"
+QR_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# A versioned URL (?v=<fingerprint>) never changes content; the bare URL is revalidated
+QR_VERSIONED_CACHE_CONTROL = "private, max-age=31536000, immutable"
+QR_CACHE_CONTROL = "private, no-cache"
+
+# ─── Rendering ──────────────────────────────────────────────────────────────
+
+def qr_payload(event: Event) -> str:
+    """
+    What the QR code encodes: the guest upload link.
+    """
+    return f"/upload/{event.event_code}/{event.event_password}"
+
+def qr_fingerprint(event: Event) -> str:
+    """
+    Short hash of the payload; changes only when the code or password does.
+    """
+    return hashlib.sha256(qr_payload(event).encode()).hexdigest()[:16]
+
+def qr_url(event: Event, size: str = QR_DEFAULT_SIZE, fmt: str = "png") -> str:
+    """
+    Versioned URL of an event's QR image, safe to cache for good.
+    """
+    return f"/auth/events/{event.id}/qr?size={size}&format={fmt}&v={qr_fingerprint(event)}"
+
+def qr_variant_path(prefix: str, size: str, fmt: str) -> Path:
+    """
+    File for one variant, next to the stored prefix ("<prefix>-<size>.png" or "<prefix>.svg").
+    """
+    return Path(f"{prefix}.svg") if fmt == "svg" else Path(f"{prefix}-{size}.png")
+
+def render_qr_codes(payload: str, prefix: str):
+    """
+    Write every PNG size and the SVG for a payload.
+    - PNGs use whole pixels per module and are padded to their exact size,
+      so codes stay crisp instead of being resampled.
+    """
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    modules = qr.modules_count + 2 * qr.border
+
+    outputs = {qr_variant_path(prefix, "", "svg"): qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)}
+    for size, edge in QR_SIZES.items():
+        qr.box_size = max(1, edge // modules)
+        code = qr.make_image().get_image().convert("L")
+        canvas = Image.new("L", (max(edge, code.width),) * 2, 255)
+        canvas.paste(code, ((canvas.width - code.width) // 2,) * 2)
+        outputs[qr_variant_path(prefix, size, "png")] = canvas
+
+    for dest, image in outputs.items():
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        with open(tmp, "wb") as out:
+            if dest.suffix == ".png":
+                image.save(out, format="PNG")
+            else:
+                image.save(out)
+        os.replace(tmp, dest)
+
+def ensure_qr_codes(session: Session, event: Event) -> str:
+    """
+    Return the path prefix of the event's stored QR images, rendering them
+    and recording them in QRCode only if the code or password changed.
+    """
+    folder = event_folder(event) / ".qr"
+    prefix = str(folder / qr_fingerprint(event))
+    if all(qr_variant_path(prefix, size, "png").exists() for size in QR_SIZES) \
+            and qr_variant_path(prefix, "", "svg").exists():
+        return prefix
+
+    folder.mkdir(parents=True, exist_ok=True)
+    render_qr_codes(qr_payload(event), prefix)
+    for old in folder.iterdir():  # Images of an earlier code/password
+        if not old.name.startswith(Path(prefix).name):
+            old.unlink(missing_ok=True)
+
+    row = session.exec(select(QRCode).where(QRCode.event_id == event.id)).first()
+    if row is None:
+        row = QRCode(event_id=event.id, qr_code_path=prefix)
+    row.qr_code_path = prefix
+    row.created_date = datetime.now(timezone.utc)
+    session.add(row)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()  # Another request recorded the same images first
+    return prefix
+
+# ─── Serving ────────────────────────────────────────────────────────────────
+
+def qr_response(request: Request, session: Session, event: Event, size: str, fmt: str) -> Response:
+    """
+    Serve a stored QR image with a strong ETag.
+    - Answers 304 when the browser already has this version.
+    - Versioned URLs (see `qr_url`) are cached for a year; the bare URL is
+      revalidated so a changed password shows up immediately.
+    """
+    if fmt not in QR_FORMATS or (fmt == "png" and size not in QR_SIZES):
+        raise HTTPException(status_code=404, detail="Unknown QR code size or format")
+
+    fingerprint = qr_fingerprint(event)
+    etag = f'"{fingerprint}-svg"' if fmt == "svg" else f'"{fingerprint}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": QR_VERSIONED_CACHE_CONTROL if request.query_params.get("v") == fingerprint else QR_CACHE_CONTROL,
+    }
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+
+    prefix = ensure_qr_codes(session, event)
+    return FileResponse(qr_variant_path(prefix, size, fmt), media_type=QR_FORMATS[fmt], headers=headers)
@@ -0,0 +1,223 @@
+import asyncio  # Counter-row creation off the event loop
+import logging  # Drift reports
+from dataclasses import dataclass  # Quota snapshot container
+from datetime import datetime, timezone  # Counter timestamps
+from typing import Optional  # Type hints
+from sqlalchemy import delete, func, or_, update  # Atomic counter updates
+from sqlalchemy.exc import IntegrityError  # Concurrent counter-row creation
+from sqlmodel import Session, select  # ORM for database queries
+from sqlmodel.ext.asyncio.session import AsyncSession  # Non-blocking sessions
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event, EventStorage, FileMetadata, Pricing, UploadSession, User, UserStorage  # Database models
+
+logger = logging.getLogger(__name__)
+
+# ─── Storage Quotas ─────────────────────────────────────────────────────────
+#
+# Each event has an EventStorage row with its running usage, and each user a
+# UserStorage row with the total over their events. Usage counts stored
+# files plus the full length of resumable uploads still in progress, which
+# reserve their space when they start.
+#
+# An upload is charged with a conditional UPDATE in the same transaction
+# that adds its FileMetadata rows, so concurrent uploads can never take an
+# event past its limit together. Drift (a crash between disk and database,
+# a manual fix) is corrected by `reconcile_storage`, run by the sweeper.
+
+MB = 1024 * 1024
+
+class QuotaExceeded(Exception):
+    """
+    Raised when an upload does not fit in the event's remaining storage.
+    """
+
+@dataclass
+class EventQuota:
+    """
+    An event's plan limits and usage at the time of the lookup.
+    """
+    limit_bytes: Optional[int]  # None when the plan has no storage limit
+    allow_video: bool
+    used_bytes: int
+
+    @property
+    def remaining_bytes(self) -> Optional[int]:
+        return None if self.limit_bytes is None else max(self.limit_bytes - self.used_bytes, 0)
+
+async def event_quota(session: AsyncSession, event: Event) -> EventQuota:
+    """
+    The plan limits (the event's plan, else its owner's) and current usage of an event.
+    One query; creates the event's counter row on first use, in a worker thread.
+    """
+    query = (
+        select(Pricing.storage_limit_mb, Pricing.allow_video, EventStorage.used_bytes)
+        .select_from(Event)
+        .join(User, User.id == Event.user_id)
+        .outerjoin(Pricing, Pricing.id == func.coalesce(Event.pricing_id, User.pricing_id))
+        .outerjoin(EventStorage, EventStorage.event_id == Event.id)
+        .where(Event.id == event.id)
+    )
+    row = (await session.exec(query)).first()
+    if row is not None and row.used_bytes is None:
+        await asyncio.to_thread(ensure_storage, event)
+        row = (await session.exec(query)).first()
+    if row is None:
+        return EventQuota(limit_bytes=None, allow_video=True, used_bytes=0)  # Owner gone; nothing to enforce
+    limit_mb = row.storage_limit_mb
+    return EventQuota(
+        limit_bytes=None if limit_mb is None or limit_mb < 0 else limit_mb * MB,  # -1 means unlimited
+        allow_video=row.allow_video is not False,
+        used_bytes=row.used_bytes,
+    )
+
+def ensure_storage(event: Event):
+    """
+    Create the counter rows for an event and its owner if they are missing,
+    starting the event's from the files it already has.
+    Runs in its own transaction so the upload's stays short.
+    - Blocking; run it in a thread from async code.
+    """
+    with Session(engine) as session:
+        try:
+            if not session.get(UserStorage, event.user_id):
+                session.add(UserStorage(user_id=event.user_id))
+                session.commit()
+        except IntegrityError:
+            session.rollback()  # Created by a concurrent request
+        try:
+            used, count = session.exec(
+                select(func.coalesce(func.sum(FileMetadata.file_size), 0), func.count(FileMetadata.id))
+                .where(FileMetadata.event_id == event.id)
+            ).one()
+            reserved = session.exec(
+                select(func.coalesce(func.sum(UploadSession.upload_length), 0))
+                .where(UploadSession.event_id == event.id)
+            ).one()
+            session.add(EventStorage(
+                event_id=event.id, path=event.storage_path, used_bytes=used + reserved, file_count=count
+            ))
+            session.flush()
+            _adjust_user(session, event.user_id, used + reserved, count)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+
+def charge(session: Session, event: Event, nbytes: int, nfiles: int, limit_bytes: Optional[int]):
+    """
+    Add an upload to the event's and owner's usage, or raise QuotaExceeded
+    if it would take the event past `limit_bytes`.
+    The caller commits, together with the upload's own rows.
+    """
+    if nbytes == 0 and nfiles == 0:
+        return
+    condition = EventStorage.event_id == event.id
+    if limit_bytes is not None:
+        condition &= EventStorage.used_bytes + nbytes <= limit_bytes
+    if _adjust_event(session, condition, nbytes, nfiles) != 1:
+        raise QuotaExceeded("This event has run out of storage space")
+    _adjust_user(session, event.user_id, nbytes, nfiles)
+
+def release(session: Session, event: Event, nbytes: int, nfiles: int):
+    """
+    Remove deleted files (or a dropped reservation) from the event's and owner's usage.
+    The caller commits, together with the delete.
+    """
+    if nbytes == 0 and nfiles == 0:
+        return
+    if _adjust_event(session, EventStorage.event_id == event.id, -nbytes, -nfiles):
+        _adjust_user(session, event.user_id, -nbytes, -nfiles)
+
+def drop_event_storage(session: Session, event: Event):
+    """
+    Remove a deleted event's usage from its owner and delete its counter row.
+    """
+    storage = session.exec(select(EventStorage).where(EventStorage.event_id == event.id)).first()
+    if storage:
+        _adjust_user(session, event.user_id, -storage.used_bytes, -storage.file_count)
+        session.execute(delete(EventStorage).where(EventStorage.id == storage.id))
+
+def _adjust_event(session: Session, condition, nbytes: int, nfiles: int) -> int:
+    return session.execute(
+        update(EventStorage).where(condition).values(
+            used_bytes=EventStorage.used_bytes + nbytes,
+            file_count=EventStorage.file_count + nfiles,
+            updated_at=datetime.now(timezone.utc),
+        )
+    ).rowcount
+
+def _adjust_user(session: Session, user_id: int, nbytes: int, nfiles: int):
+    session.execute(
+        update(UserStorage).where(UserStorage.user_id == user_id).values(
+            used_bytes=UserStorage.used_bytes + nbytes,
+            file_count=UserStorage.file_count + nfiles,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+
+# ─── Reconciliation ─────────────────────────────────────────────────────────
+
+def reconcile_storage(session: Session, after_event_id: int, limit: int) -> tuple[int, Optional[int]]:
+    """
+    Recompute the counters of up to `limit` events (ids above `after_event_id`)
+    and of their owners from the rows themselves.
+    Returns (counters corrected, last event id checked or None when done).
+    - Each counter is rewritten by a single UPDATE whose subqueries sum the
+      rows, so an upload committing at the same time cannot be lost.
+    """
+    event_ids = session.exec(
+        select(EventStorage.event_id)
+        .where(EventStorage.event_id > after_event_id)
+        .order_by(EventStorage.event_id)
+        .limit(limit)
+    ).all()
+    if not event_ids:
+        return 0, None
+
+    file_bytes = (
+        select(func.coalesce(func.sum(FileMetadata.file_size), 0))
+        .where(FileMetadata.event_id == EventStorage.event_id)
+        .scalar_subquery()
+    )
+    reserved_bytes = (
+        select(func.coalesce(func.sum(UploadSession.upload_length), 0))
+        .where(UploadSession.event_id == EventStorage.event_id)
+        .scalar_subquery()
+    )
+    file_count = select(func.count(FileMetadata.id)).where(FileMetadata.event_id == EventStorage.event_id).scalar_subquery()
+    drifted = session.exec(
+        select(EventStorage.event_id, EventStorage.used_bytes, file_bytes + reserved_bytes)
+        .where(EventStorage.event_id.in_(event_ids))
+        .where(or_(EventStorage.used_bytes != file_bytes + reserved_bytes, EventStorage.file_count != file_count))
+    ).all()
+    for event_id, counted, actual in drifted:
+        logger.warning("Storage counter for event %s was %s bytes, actual %s", event_id, counted, actual)
+    fixed = session.execute(
+        update(EventStorage)
+        .where(EventStorage.event_id.in_(event_ids))
+        .where(or_(EventStorage.used_bytes != file_bytes + reserved_bytes, EventStorage.file_count != file_count))
+        .values(used_bytes=file_bytes + reserved_bytes, file_count=file_count, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    user_ids = select(Event.user_id).where(Event.id.in_(event_ids))
+    user_bytes = (
+        select(func.coalesce(func.sum(EventStorage.used_bytes), 0))
+        .join(Event, Event.id == EventStorage.event_id)
+        .where(Event.user_id == UserStorage.user_id)
+        .scalar_subquery()
+    )
+    user_files = (
+        select(func.coalesce(func.sum(EventStorage.file_count), 0))
+        .join(Event, Event.id == EventStorage.event_id)
+        .where(Event.user_id == UserStorage.user_id)
+        .scalar_subquery()
+    )
+    fixed += session.execute(
+        update(UserStorage)
+        .where(UserStorage.user_id.in_(user_ids))
+        .where(or_(UserStorage.used_bytes != user_bytes, UserStorage.file_count != user_files))
+        .values(used_bytes=user_bytes, file_count=user_files, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    session.commit()
+    return fixed, event_ids[-1]
@@ -0,0 +1,334 @@
+import asyncio  # Periodic scheduling and throttling on the event loop
+import logging  # Retention reports
+import shutil, time  # Generated files and archive rate limiting
+from dataclasses import dataclass  # Report rows
+from datetime import datetime, timedelta, timezone  # Retention windows
+from typing import Optional  # Type hints
+from uuid import uuid4  # Scratch file names
+from sqlalchemy import delete  # Batched deletes
+from sqlmodel import Session, select  # ORM for database queries
+from app.core.config import (
+    RETENTION_MODE,
+    RETENTION_INTERVAL_SECONDS,
+    RETENTION_BATCH_FILES,
+    RETENTION_BATCH_PAUSE_SECONDS,
+    RETENTION_ARCHIVE_MB_PER_SECOND,
+    RETENTION_BLOB_GRACE_SECONDS,
+)
+from app.db.session import engine, AsyncSessionLocal  # Sessions for batches and archive building
+from app.models import BlobDeletion, Event, EventStorage, FileMetadata, Guest, GuestSession, MediaJob, Pricing, UploadSession, User  # Database models
+from app.services.event_cache import event_cache  # Guest lookups of the expiring event
+from app.services.object_store import MB, object_store  # Durable file storage
+from app.services.quota import drop_event_storage, release  # Storage usage counters
+from app.services.storage import archive_key, blob_key, derived_folder, event_folder, incoming_path, original_key, partial_upload_path  # Storage layout helpers
+from app.services.zip_stream import event_archive  # Archives of expired events
+
+logger = logging.getLogger(__name__)
+
+# ─── Retention ──────────────────────────────────────────────────────────────
+#
+# An event's files are kept for its plan's storage_duration (the event's own
+# plan, else its owner's), counted in days from the event date. Once that
+# has passed, the engine:
+# 1. marks the event expired, so guest pages and uploads answer 410,
+# 2. with RETENTION_MODE=archive, writes the event's files to one ZIP in the
+#    object store (see `archive_key`), read at a capped rate,
+# 3. deletes its files and their rows in small batches with a pause in
+#    between, leaving disk I/O to live uploads; blobs still used by another
+#    event stay,
+# 4. drops its unfinished uploads, guests and storage counter row.
+#
+# Content-addressed blobs are not deleted with their rows: an upload of the
+# same content elsewhere may have found the blob and dropped its own copy,
+# without having committed its row yet. They are queued in BlobDeletion
+# and deleted by a later run once RETENTION_BLOB_GRACE_SECONDS have passed,
+# after a last check for rows using them. Uploads cancel queued deletions
+# of their blobs before looking for them (see `reuse_blobs`), and a
+# deletion holds its queue row until the blob is gone, so either the upload
+# waits and stores the content again, or the deletion finds nothing to do.
+#
+# The event row itself stays, so the host still sees it on their dashboard.
+# An event whose archive or purge failed still has its counter row, and the
+# next run finishes it (archiving first, unless its archive was written).
+
+@dataclass
+class ExpiredEvent:
+    """
+    One event past its retention window, as listed in a run's report.
+    """
+    event_id: int
+    event_code: str
+    name: Optional[str]
+    tier: str
+    expires_at: datetime
+    file_count: int
+    used_bytes: int
+
+def expired_events(session: Session, now: datetime) -> list[tuple[Event, Pricing]]:
+    """
+    Events not yet expired whose plan's storage_duration has passed, oldest first.
+    - One pair of queries per plan, each a range seek on
+      ix_event_expired_at_pricing_id_date: events on the plan itself, and
+      events without a plan whose owner is on it.
+    - Plans with a negative storage_duration keep files forever.
+    """
+    found = []
+    for plan in session.exec(select(Pricing).where(Pricing.storage_duration >= 0)).all():
+        cutoff = now - timedelta(days=plan.storage_duration)
+        live = (Event.expired_at.is_(None), Event.date < cutoff)
+        own = select(Event).where(*live, Event.pricing_id == plan.id)
+        inherited = (
+            select(Event)
+            .join(User, User.id == Event.user_id)
+            .where(*live, Event.pricing_id.is_(None), User.pricing_id == plan.id)
+        )
+        found += [(event, plan) for event in session.exec(own).all()]
+        found += [(event, plan) for event in session.exec(inherited).all()]
+    return sorted(found, key=lambda row: (row[0].date, row[0].id))
+
+class RetentionEngine:
+    """
+    Periodically removes the files of events past their plan's retention
+    window (see the notes above).
+    - `mode` "dry-run" only reports what would be removed, "delete" removes
+      it, "archive" keeps a ZIP of each event first, "off" never runs.
+    - Files go `batch_files` at a time, `pause_seconds` apart.
+    - Blobs no file uses any more are deleted `blob_grace_seconds` later.
+    """
+
+    def __init__(
+        self,
+        mode: str = RETENTION_MODE,
+        interval_seconds: float = RETENTION_INTERVAL_SECONDS,
+        batch_files: int = RETENTION_BATCH_FILES,
+        pause_seconds: float = RETENTION_BATCH_PAUSE_SECONDS,
+        archive_mb_per_second: float = RETENTION_ARCHIVE_MB_PER_SECOND,
+        blob_grace_seconds: float = RETENTION_BLOB_GRACE_SECONDS,
+    ):
+        if mode not in ("off", "dry-run", "delete", "archive"):
+            raise ValueError(f"Unknown RETENTION_MODE '{mode}'")
+        self.mode = mode
+        self.interval_seconds = interval_seconds
+        self.batch_files = batch_files
+        self.pause_seconds = pause_seconds
+        self.archive_mb_per_second = archive_mb_per_second
+        self.blob_grace_seconds = blob_grace_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """
+        Run now and then every `interval_seconds`, unless the mode is "off".
+        """
+        if self.mode != "off":
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self, dry_run: Optional[bool] = None) -> list[ExpiredEvent]:
+        """
+        Find the expired events and, unless this is a dry run, remove their files.
+        Returns the report: one row per event, with its usage before removal.
+        - `dry_run` defaults to the engine's mode.
+        """
+        dry_run = self.mode in ("off", "dry-run") if dry_run is None else dry_run
+        now = datetime.now(timezone.utc)
+        expired, usage, unfinished = await asyncio.to_thread(self._find, now, dry_run)
+
+        report = []
+        for event, plan in expired:
+            storage = usage.get(event.id)
+            report.append(ExpiredEvent(
+                event_id=event.id,
+                event_code=event.event_code,
+                name=event.name,
+                tier=plan.tier,
+                expires_at=event.date + timedelta(days=plan.storage_duration),
+                file_count=storage.file_count if storage else 0,
+                used_bytes=storage.used_bytes if storage else 0,
+            ))
+            logger.info(
+                "Retention%s: event %s (%s plan, expired %s) with %d files, %.1f MB",
+                " (dry run)" if dry_run else "", event.event_code, plan.tier, f"{report[-1].expires_at:%Y-%m-%d}",
+                report[-1].file_count, report[-1].used_bytes / MB,
+            )
+        if dry_run:
+            return report
+
+        for event, _ in expired:
+            await asyncio.to_thread(self._mark_expired, event, now)
+        for event in unfinished + [event for event, _ in expired]:
+            try:
+                if self.mode == "archive" and not await asyncio.to_thread(object_store().exists, archive_key(event)):
+                    await self._archive(event)
+                await self._purge(event)
+            except Exception as exc:  # Stays marked with its files; the next run tries again
+                logger.warning("Retention of event %s failed: %s", event.event_code, exc)
+        await self._delete_blobs(datetime.now(timezone.utc) - timedelta(seconds=self.blob_grace_seconds))
+        return report
+
+    # ── Internals ──
+    async def _loop(self):
+        while True:
+            try:
+                await self.run()
+            except Exception as exc:
+                logger.warning("Retention run failed: %s", exc)
+            await asyncio.sleep(self.interval_seconds)
+
+    def _find(self, now: datetime, dry_run: bool) -> tuple[list, dict, list]:
+        """
+        (expired events with their plans, their counter rows by event id, events
+        whose purge was interrupted). Blocking, like the other sync helpers
+        below; `run` calls them in a thread.
+        """
+        with Session(engine) as session:
+            expired = expired_events(session, now)
+            usage = dict(session.exec(
+                select(EventStorage.event_id, EventStorage)
+                .where(EventStorage.event_id.in_([event.id for event, _ in expired]))
+            ).all()) if expired else {}
+            unfinished = [] if dry_run else session.exec(
+                select(Event).join(EventStorage, EventStorage.event_id == Event.id).where(Event.expired_at <= now)
+            ).all()
+        return expired, usage, unfinished
+
+    def _mark_expired(self, event: Event, now: datetime):
+        with Session(engine) as session:
+            row = session.get(Event, event.id)
+            row.expired_at = now
+            session.add(row)
+            session.commit()
+        event_cache.invalidate(event.event_code)  # Guests of this process get a 410 from now on
+
+    async def _archive(self, event: Event):
+        """
+        Write the event's files to one ZIP in the object store.
+        Raises (leaving the files in place) if the archive cannot be written.
+        """
+        async with AsyncSessionLocal() as session:
+            archive = await event_archive(session, event)
+        scratch = incoming_path(uuid4().hex)
+        started, written = time.monotonic(), 0
+        try:
+            with open(scratch, "wb") as out:
+                async for chunk in archive.stream():
+                    await asyncio.to_thread(out.write, chunk)
+                    written += len(chunk)
+                    if self.archive_mb_per_second > 0:
+                        ahead = written / (self.archive_mb_per_second * MB) - (time.monotonic() - started)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+            await asyncio.to_thread(object_store().put_file, archive_key(event), scratch, "application/zip")
+        finally:
+            scratch.unlink(missing_ok=True)
+        logger.info("Archived event %s to %s (%.1f MB)", event.event_code, archive_key(event), written / MB)
+
+    async def _purge(self, event: Event):
+        store = object_store()
+        while batch := await asyncio.to_thread(self._purge_rows, event):
+            keys, folders = batch
+            for key in keys:
+                await asyncio.to_thread(store.delete, key)
+            for folder in folders:
+                await asyncio.to_thread(shutil.rmtree, folder, True)
+            await asyncio.sleep(self.pause_seconds)  # Leave the disk to live uploads between batches
+
+        await asyncio.to_thread(self._drop_event_rows, event)
+        await asyncio.to_thread(shutil.rmtree, event_folder(event) / ".derived", True)
+        logger.info("Removed the files of expired event %s", event.event_code)
+
+    def _purge_rows(self, event: Event) -> Optional[tuple[set, list]]:
+        """
+        Delete the rows of the event's next `batch_files` files and return the
+        (object keys, derived folders) to remove, or None when none are left.
+        Rows first, then bytes: an interruption leaves unreferenced files,
+        never rows pointing at nothing.
+        """
+        with Session(engine) as session:
+            files = session.exec(
+                select(FileMetadata).where(FileMetadata.event_id == event.id).limit(self.batch_files)
+            ).all()
+            if not files:
+                return None
+            hashes = {meta.content_hash for meta in files if meta.content_hash and not meta.storage_key}
+            shared = set(session.exec(
+                select(FileMetadata.content_hash)
+                .where(FileMetadata.content_hash.in_(hashes), FileMetadata.event_id != event.id)
+            ).all()) if hashes else set()
+            for content_hash in hashes - shared:  # Deleted by a later run, see the notes above
+                session.merge(BlobDeletion(content_hash=content_hash))
+            keys = {original_key(event, meta) for meta in files if not meta.content_hash or meta.storage_key}
+            folders = [derived_folder(event, meta) for meta in files]
+            ids = [meta.id for meta in files]
+            session.execute(delete(MediaJob).where(MediaJob.file_id.in_(ids)))
+            session.execute(delete(FileMetadata).where(FileMetadata.id.in_(ids)))
+            release(session, event, sum(meta.file_size for meta in files), len(files))
+            session.commit()
+        return keys, folders
+
+    def _drop_event_rows(self, event: Event):
+        """
+        Drop the event's unfinished uploads, guests and storage counter row.
+        """
+        store = object_store()
+        with Session(engine) as session:
+            uploads = session.exec(select(UploadSession).where(UploadSession.event_id == event.id)).all()
+            for upload in uploads:
+                if upload.multipart_id:  # Before any write, so no lock is held across the request
+                    store.abort_multipart(upload.storage_key, upload.multipart_id)
+            for upload in uploads:
+                partial_upload_path(event, upload.id).unlink(missing_ok=True)
+                session.delete(upload)
+            session.execute(delete(GuestSession).where(GuestSession.event_id == event.id))
+            session.execute(delete(Guest).where(Guest.event_id == event.id))
+            drop_event_storage(session, event)  # Also takes back the dropped uploads' reservations
+            session.commit()
+
+    async def _delete_blobs(self, cutoff: datetime):
+        """
+        Delete the blobs queued before `cutoff`, `batch_files` at a time.
+        """
+        while True:
+            hashes = await asyncio.to_thread(self._due_blobs, cutoff)
+            if not hashes:
+                break
+            for content_hash in hashes:
+                await asyncio.to_thread(self._delete_blob, content_hash, cutoff)
+            await asyncio.sleep(self.pause_seconds)
+
+    def _due_blobs(self, cutoff: datetime) -> list[str]:
+        with Session(engine) as session:
+            return session.exec(
+                select(BlobDeletion.content_hash)
+                .where(BlobDeletion.requested_at <= cutoff)
+                .limit(self.batch_files)
+            ).all()
+
+    def _delete_blob(self, content_hash: str, cutoff: datetime):
+        """
+        Take a blob's queue row and delete the blob unless a file uses it again.
+        - Blocking; run it in a thread.
+        - The row is held until the blob is gone, so an upload of the same
+          content waits (see `reuse_blobs`); if the delete fails, the row
+          comes back for the next run.
+        """
+        with Session(engine) as session:
+            claimed = session.execute(delete(BlobDeletion).where(
+                BlobDeletion.content_hash == content_hash, BlobDeletion.requested_at <= cutoff,
+            )).rowcount
+            if not claimed:  # Cancelled by an upload meanwhile
+                return
+            used = session.exec(select(FileMetadata.id).where(FileMetadata.content_hash == content_hash).limit(1)).first()
+            if used is None:
+                object_store().delete(blob_key(content_hash))
+            session.commit()
+
+# Shared engine started from the application lifespan
+retention_engine = RetentionEngine()
@@ -0,0 +1,141 @@
+from pathlib import Path, PurePath  # File path handling
+from typing import Optional  # Type hints
+from sqlalchemy import delete  # Cancelled blob deletions
+from sqlmodel import Session, select  # ORM for database queries
+from app.models import BlobDeletion, Event, FileMetadata  # Database models
+from app.services.object_store import object_store  # Durable file storage
+import hashlib  # Content hashing
+
+# ─── Storage Layout ─────────────────────────────────────────────────────────
+#
+# Durable files live in the object store, under these keys:
+# .blobs/<sha[:2]>/<sha256>                 originals, stored once per content hash
+# <event>/.direct/<upload_id>               originals uploaded straight to object storage
+# <event>/<guest_id>/<file_name>            originals uploaded before content addressing
+# <event_code>/customisation/<banner>       event banner images
+# .archive/<event_code>-<event_id>.zip      expired events kept by RETENTION_MODE=archive
+#
+# Scratch and generated files stay on the local disk:
+# STORAGE_ROOT/.blobs/.incoming/<random>                uploads still streaming in
+# STORAGE_ROOT/<storage_path>/.derived/<file_id>/       files generated from an original
+# STORAGE_ROOT/<storage_path>/.partial/<upload_id>      resumable uploads in progress
+# STORAGE_ROOT/<storage_path>/.qr/<fingerprint>-*       QR code images for the current code/password
+#
+# <event> is the name of the event's storage folder. With the local store a
+# key is a path under STORAGE_ROOT, so moving a finished upload into the
+# blob store is a rename, never a copy.
+
+def event_folder(event: Event) -> Path:
+    """
+    Root folder holding everything stored for an event.
+    """
+    from app.core.config import STORAGE_ROOT
+    return Path(STORAGE_ROOT) / event.storage_path
+
+def event_key(event: Event) -> str:
+    """
+    Key prefix for an event's stored objects.
+    """
+    return PurePath(event.storage_path).name
+
+def original_key(event: Event, meta: FileMetadata) -> str:
+    """
+    Key of an uploaded file as the guest sent it.
+    """
+    if meta.storage_key:
+        return meta.storage_key
+    if meta.content_hash:
+        return blob_key(meta.content_hash)
+    return f"{event_key(event)}/{meta.guest_id}/{meta.file_name}"
+
+def direct_upload_key(event: Event, upload_id: str) -> str:
+    """
+    Key a direct-to-storage upload is assembled under, and then kept at.
+    """
+    return f"{event_key(event)}/.direct/{upload_id}"
+
+def banner_key(event: Event, banner_filename: str) -> str:
+    """
+    Key of an event's banner image, public as /uploads/<key>.
+    Under the event code, which is how the templates link it.
+    """
+    return f"{event.event_code}/customisation/{banner_filename}"
+
+def archive_key(event: Event) -> str:
+    """
+    Key of the ZIP an expired event's files are archived to.
+    """
+    return f".archive/{event.event_code}-{event.id}.zip"
+
+def derived_folder(event: Event, meta: FileMetadata) -> Path:
+    """
+    Folder for files generated from an upload (transcodes, previews).
+    """
+    return event_folder(event) / ".derived" / str(meta.id)
+
+def partial_upload_path(event: Event, upload_id: str) -> Path:
+    """
+    Location of the in-progress bytes for a resumable upload.
+    """
+    return event_folder(event) / ".partial" / upload_id
+
+
+# ─── Content-Addressed Blobs ────────────────────────────────────────────────
+
+def blob_key(content_hash: str) -> str:
+    """
+    Key of the single stored copy of a file with this SHA-256.
+    """
+    return f".blobs/{content_hash[:2]}/{content_hash}"
+
+def incoming_path(name: str) -> Path:
+    """
+    Scratch location for an upload whose hash is not known yet.
+    """
+    from app.core.config import STORAGE_ROOT
+    folder = Path(STORAGE_ROOT) / ".blobs" / ".incoming"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / name
+
+def store_blob(source: Path, content_hash: str, content_type: Optional[str] = None) -> bool:
+    """
+    Move a fully written file into the blob store.
+    Returns False (and removes `source`) when the content is already stored.
+    - Blocking (a network upload with object storage); run it in a thread.
+    """
+    store, key = object_store(), blob_key(content_hash)
+    if store.exists(key):
+        source.unlink()
+        return False
+    store.put_file(key, source, content_type)
+    return True
+
+def reuse_blobs(session: Session, content_hashes: set[str]):
+    """
+    Cancel pending deletions of these blobs (see `BlobDeletion`).
+    - Commit before `store_blob` checks whether they exist: a deletion
+      already under way holds its row until the blob is gone, so the check
+      waits for it and then stores the content again.
+    """
+    session.execute(delete(BlobDeletion).where(BlobDeletion.content_hash.in_(content_hashes)))
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file on disk, read in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_duplicate(session: Session, event_id: int, content_hash: str) -> Optional[FileMetadata]:
+    """
+    Return the file already uploaded to this event with the same content, if any.
+    """
+    return session.exec(
+        select(FileMetadata).where(
+            FileMetadata.event_id == event_id,
+            FileMetadata.content_hash == content_hash
+        )
+    ).first()
@@ -0,0 +1,351 @@
+import asyncio  # File reads off the event loop
+import hashlib  # Archive validators
+import re  # Folder name sanitising
+import struct  # ZIP record encoding
+import zlib  # CRC-32
+from dataclasses import dataclass  # Archive entry container
+from datetime import datetime  # Entry timestamps
+from contextlib import closing  # Store streams
+from pathlib import PurePosixPath  # Archive names
+from typing import AsyncIterator, Optional  # Type hints
+from urllib.parse import quote  # Non-ASCII download names
+from fastapi import HTTPException, Request, Response  # FastAPI utilities
+from fastapi.responses import StreamingResponse  # Archive bodies
+from sqlalchemy import update  # CRC write-back
+from sqlmodel import Session, select  # ORM for database queries
+from sqlmodel.ext.asyncio.session import AsyncSession  # Non-blocking sessions
+from app.db.session import engine  # Database engine for creating sessions
+from app.models import Event, FileMetadata, Guest, Pricing, User  # Database models
+from app.services.object_store import object_store  # Durable file storage
+from app.services.storage import original_key  # Storage layout helpers
+
+# ─── Streaming ZIP Archives ─────────────────────────────────────────────────
+#
+# Archives are built on the fly from the stored originals and never touch
+# disk. Every entry is STORED (no compression): photos and videos are
+# already compressed, and fixed entry sizes make the whole layout, and so
+# every byte offset, known before the first byte is sent. That is what lets
+# a client resume an interrupted download with a Range request.
+#
+# The one value that needs the file's bytes is its CRC-32, which sits in
+# the local header in front of the data. It is cached on FileMetadata.crc32;
+# a file without one is read once to compute it just before it is sent.
+
+READ_CHUNK_SIZE = 512 * 1024  # Bytes read from storage per step; bounds memory per download
+CRC_FLUSH_EVERY = 64  # Newly computed CRCs saved per batch while streaming
+
+ZIP64_LIMIT = 0xFFFFFFFF
+UNIX_FILE_MODE = 0o100644 << 16  # rw-r--r-- regular file, in the external attributes
+LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<4sHHHHHHIIIHHHHHII")
+END_RECORD = struct.Struct("<4sHHHHIIH")
+ZIP64_END_RECORD = struct.Struct("<4sQHHIIQQQQ")
+ZIP64_END_LOCATOR = struct.Struct("<4sIQI")
+
+@dataclass
+class ZipEntry:
+    file_id: int
+    name: str  # Path inside the archive
+    key: str  # Stored original
+    size: int
+    modified: datetime
+    crc: Optional[int] = None  # None until computed
+    offset: int = 0  # Position of the local header in the archive
+
+    @property
+    def encoded_name(self) -> bytes:
+        return self.name.encode("utf-8")
+
+    @property
+    def flags(self) -> int:
+        return 0 if self.name.isascii() else 0x800  # Bit 11: name is UTF-8
+
+    def local_header(self) -> bytes:
+        name = self.encoded_name
+        extra = b""
+        size = self.size
+        if self.size >= ZIP64_LIMIT:
+            extra = struct.pack("<HHQQ", 1, 16, self.size, self.size)
+            size = ZIP64_LIMIT
+        version = 45 if extra else 20
+        return LOCAL_HEADER.pack(
+            b"PK\x03\x04", version, self.flags, 0, *dos_time(self.modified),
+            self.crc or 0, size, size, len(name), len(extra),
+        ) + name + extra
+
+    def local_header_size(self) -> int:
+        return LOCAL_HEADER.size + len(self.encoded_name) + (20 if self.size >= ZIP64_LIMIT else 0)
+
+    def central_header(self) -> bytes:
+        name = self.encoded_name
+        fields, size, offset = [], self.size, self.offset
+        if self.size >= ZIP64_LIMIT:
+            fields += [self.size, self.size]
+            size = ZIP64_LIMIT
+        if self.offset >= ZIP64_LIMIT:
+            fields.append(self.offset)
+            offset = ZIP64_LIMIT
+        extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+        version = 45 if extra else 20
+        return CENTRAL_HEADER.pack(
+            b"PK\x01\x02", (3 << 8) | version, version, self.flags, 0, *dos_time(self.modified),
+            self.crc or 0, size, size, len(name), len(extra), 0, 0, 0, UNIX_FILE_MODE, offset,
+        ) + name + extra
+
+    def central_header_size(self) -> int:
+        overflowed = (2 if self.size >= ZIP64_LIMIT else 0) + (1 if self.offset >= ZIP64_LIMIT else 0)
+        return CENTRAL_HEADER.size + len(self.encoded_name) + (4 + 8 * overflowed if overflowed else 0)
+
+def dos_time(moment: datetime) -> tuple[int, int]:
+    """
+    (time, date) in the MS-DOS format ZIP headers use.
+    """
+    if moment.year < 1980:
+        return 0, (1 << 5) | 1  # 1980-01-01 00:00
+    return (
+        (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2),
+        ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day,
+    )
+
+def file_crc(key: str) -> int:
+    """
+    CRC-32 of a stored file, read in fixed-size chunks.
+    """
+    crc = 0
+    with closing(object_store().open(key)) as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def save_crcs(crcs: dict[int, int]):
+    """
+    Cache computed CRCs on their FileMetadata rows.
+    """
+    if not crcs:
+        return
+    with Session(engine) as session:
+        for file_id, crc in crcs.items():
+            session.execute(update(FileMetadata).where(FileMetadata.id == file_id).values(crc32=crc))
+        session.commit()
+
+# ─── Archive Layout ─────────────────────────────────────────────────────────
+
+class ZipArchive:
+    """
+    A ZIP archive whose bytes are produced on demand from its entries.
+    - `size` and `etag` are known up front; `stream(start, end)` yields any
+      byte range of the archive, reading at most READ_CHUNK_SIZE at a time.
+    - The layout only depends on the entries' names, sizes and timestamps,
+      so the same files always give the same bytes.
+    """
+
+    def __init__(self, entries: list[ZipEntry]):
+        self.entries = entries
+        offset = 0
+        for entry in entries:
+            entry.offset = offset
+            offset += entry.local_header_size() + entry.size
+        self.central_offset = offset
+        self.central_size = sum(entry.central_header_size() for entry in entries)
+        self.size = self.central_offset + self.central_size + len(self._end_records())
+        digest = hashlib.sha256()
+        for entry in entries:
+            digest.update(f"{entry.file_id}\0{entry.name}\0{entry.size}\0{entry.modified.isoformat()}\n".encode())
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+        self._new_crcs: dict[int, int] = {}
+
+    async def stream(self, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Yield bytes `start` to `end` (inclusive) of the archive.
+        """
+        end = self.size - 1 if end is None else end
+        try:
+            for entry in self.entries:
+                header_start = entry.offset
+                data_start = header_start + entry.local_header_size()
+                if data_start + entry.size <= start:
+                    continue
+                if header_start > end:
+                    break
+                if data_start > start:
+                    await self._ensure_crc(entry)
+                    yield clip(entry.local_header(), header_start, start, end)
+                async for chunk in self._read(entry, max(start - data_start, 0), min(end - data_start + 1, entry.size)):
+                    yield chunk
+
+            if end >= self.central_offset:
+                position = self.central_offset
+                for entry in self.entries:
+                    size = entry.central_header_size()
+                    if position + size > start and position <= end:
+                        await self._ensure_crc(entry)
+                        yield clip(entry.central_header(), position, start, end)
+                    position += size
+                yield clip(self._end_records(), position, start, end)
+        finally:
+            # Cache whatever was computed, even when the client went away
+            save_crcs(self._new_crcs)
+            self._new_crcs = {}
+
+    # ── Internals ──
+    async def _ensure_crc(self, entry: ZipEntry):
+        if entry.crc is None:
+            entry.crc = await asyncio.to_thread(file_crc, entry.key)
+            self._new_crcs[entry.file_id] = entry.crc
+            if len(self._new_crcs) >= CRC_FLUSH_EVERY:
+                crcs, self._new_crcs = self._new_crcs, {}
+                await asyncio.to_thread(save_crcs, crcs)
+
+    async def _read(self, entry: ZipEntry, start: int, stop: int) -> AsyncIterator[bytes]:
+        if start >= stop:
+            return
+        f = await asyncio.to_thread(object_store().open, entry.key, start)
+        try:
+            position = start
+            while position < stop:
+                chunk = await asyncio.to_thread(f.read, min(READ_CHUNK_SIZE, stop - position))
+                if not chunk:
+                    raise OSError(f"{entry.key} is shorter than the {entry.size} bytes it was listed with")
+                position += len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    def _end_records(self) -> bytes:
+        count = len(self.entries)
+        records = b""
+        if count >= 0xFFFF or self.central_size >= ZIP64_LIMIT or self.central_offset >= ZIP64_LIMIT:
+            zip64_offset = self.central_offset + self.central_size
+            records += ZIP64_END_RECORD.pack(
+                b"PK\x06\x06", ZIP64_END_RECORD.size - 12, (3 << 8) | 45, 45, 0, 0,
+                count, count, self.central_size, self.central_offset,
+            )
+            records += ZIP64_END_LOCATOR.pack(b"PK\x06\x07", 0, zip64_offset, 1)
+        return records + END_RECORD.pack(
+            b"PK\x05\x06", 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(self.central_size, ZIP64_LIMIT), min(self.central_offset, ZIP64_LIMIT), 0,
+        )
+
+def clip(data: bytes, position: int, start: int, end: int) -> bytes:
+    """
+    The part of `data` (which sits at `position` in the archive) inside [start, end].
+    """
+    return data[max(start - position, 0):max(end - position + 1, 0)]
+
+# ─── Building Archives ──────────────────────────────────────────────────────
+
+def folder_name(guest_email: Optional[str]) -> str:
+    """
+    Archive folder for a guest's uploads.
+    """
+    if not guest_email:
+        return "Unknown guest"
+    return re.sub(r"[^\w@.+-]", "_", guest_email).strip(".") or "Unknown guest"
+
+def archive_entries(event: Event, rows: list[tuple[FileMetadata, Optional[str]]], folders: bool) -> list[ZipEntry]:
+    """
+    Turn (file, guest email) rows into archive entries with unique names.
+    Files missing from storage are left out.
+    """
+    keys = [original_key(event, meta) for meta, _ in rows]
+    sizes = object_store().sizes(keys)
+    entries, taken = [], set()
+    for (meta, guest_email), key in zip(rows, keys):
+        size = sizes[key]
+        if size is None:
+            continue
+        base = PurePosixPath(meta.file_name.replace("\\", "/")).name.lstrip(".") or f"file-{meta.id}"
+        stem, dot, suffix = base.rpartition(".") if "." in base else (base, "", "")
+        folder = f"{folder_name(guest_email)}/" if folders else ""
+        name, n = f"{folder}{base}", 1
+        while name.lower() in taken:  # Case-insensitive: Windows and macOS extract into such folders
+            n += 1
+            name = f"{folder}{stem} ({n}){dot}{suffix}"
+        taken.add(name.lower())
+        entries.append(ZipEntry(meta.id, name, key, size, meta.created_date, meta.crc32))
+    return entries
+
+async def event_archive(session: AsyncSession, event: Event, guest_id: Optional[int] = None) -> ZipArchive:
+    """
+    Archive of an event's originals, or of one guest's uploads.
+    - The whole event is grouped into one folder per guest.
+    """
+    query = (
+        select(FileMetadata, Guest.guest_email)
+        .outerjoin(Guest, FileMetadata.guest_id == Guest.id)
+        .where(FileMetadata.event_id == event.id)
+        .order_by(FileMetadata.id)
+    )
+    if guest_id is not None:
+        query = query.where(FileMetadata.guest_id == guest_id)
+    rows = (await session.exec(query)).all()
+    entries = await asyncio.to_thread(archive_entries, event, rows, guest_id is None)
+    return ZipArchive(entries)
+
+async def downloads_allowed(session: AsyncSession, event: Event) -> bool:
+    """
+    Whether the event's plan (or else its owner's plan) includes downloads.
+    """
+    pricing_id = event.pricing_id
+    if pricing_id is None:
+        owner = await session.get(User, event.user_id)
+        pricing_id = owner.pricing_id if owner else None
+    pricing = await session.get(Pricing, pricing_id) if pricing_id is not None else None
+    return bool(pricing and pricing.can_download)
+
+# ─── HTTP Ranges ────────────────────────────────────────────────────────────
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    The (start, end) byte range a single-range `Range` header asks for.
+    - None means "send everything": no header, or one this ignores
+      (multiple ranges, other units, malformed), as RFC 9110 allows.
+    - Raises a 416 when the range lies outside the archive.
+    """
+    if not header or "," in header:
+        return None
+    unit, _, spec = header.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not dash:
+        return None
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = size - int(last), size - 1  # Suffix range: the last N bytes
+    except ValueError:
+        return None
+    start = max(start, 0)
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+def archive_response(request: Request, archive: ZipArchive, filename: str) -> Response:
+    """
+    Serve an archive as an attachment, honouring Range and If-Range.
+    - A resumed download sends the ETag it started with as If-Range; if the
+      event has changed since, the whole new archive is sent instead.
+    - HEAD gets the headers without reading any files.
+    """
+    quoted = quote(filename)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quoted}" if quoted != filename
+        else f'attachment; filename="{filename}"',
+    }
+    byte_range = None
+    if request.headers.get("if-range", archive.etag) == archive.etag:
+        byte_range = parse_range(request.headers.get("range"), archive.size)
+    start, end = byte_range or (0, archive.size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="application/zip")
+    return StreamingResponse(archive.stream(start, end), status_code=status_code, headers=headers,
+                             media_type="application/zip")
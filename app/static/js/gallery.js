@@ -1,6 +1,6 @@
 document.addEventListener('DOMContentLoaded', () => {
   const gallery = document.getElementById('gallery');
-  let batch = 0, totalLoaded = gallery.children.length;
+  let cursor = null, totalLoaded = gallery.children.length;
   const batchSize = 20, loading = document.getElementById('loading');
   let isLoading = false, hasMoreData = true;
 
@@ -8,11 +8,17 @@ document.addEventListener('DOMContentLoaded', () => {
     if (isLoading || !hasMoreData) return;
     isLoading = true; loading.style.display = 'block';
     try {
-      const eventId = new URLSearchParams(location.search).get('event_id');
-      const res = await fetch(`/api/photos/${eventId}?batch=${batch}&size=${batchSize}`);
+      // The host is recognised by their session; guests also pass the event password
+      const query = new URLSearchParams(location.search);
+      const access = [query.get('event_code'), query.get('password')].filter(Boolean).map(encodeURIComponent);
+      const params = new URLSearchParams({ size: batchSize });
+      if (cursor) params.set('cursor', cursor);
+      const res = await fetch(`/api/photos/${access.join('/')}?${params}`);
       if (!res.ok) throw new Error();
-      const images = await res.json();
-      if (images.length === 0) { hasMoreData = false; return; }
+      const { items: images, next_cursor } = await res.json();
+      // Keyset pagination: the server hands back where the next page starts
+      cursor = next_cursor;
+      if (!next_cursor) hasMoreData = false;
 
       images.forEach((image, idx) => {
         const item = document.createElement('div');
@@ -21,13 +27,22 @@ document.addEventListener('DOMContentLoaded', () => {
         item.className = 'gallery-item';
         item.dataset.size = (globalIndex % 3 === 0 ? 'large' : 'small');
 
+        // Grid shows the small preview; the slideshow loads the viewer size and
+        // the original is only fetched when someone downloads it
         const media = image.type === 'video'
           ? Object.assign(document.createElement('video'), {
-              src: image.url, controls: true, className: 'gallery-item-media'
+              src: image.viewer_url, controls: true, className: 'gallery-item-media'
             })
           : Object.assign(document.createElement('img'), {
-              src: image.url, alt: image.caption, className: 'gallery-item-media'
+              src: image.thumb_url, alt: image.caption, loading: 'lazy',
+              className: 'gallery-item-media'
             });
+        if (image.width && image.height) {
+          media.width = image.width;
+          media.height = image.height;
+        }
+        media.dataset.viewer = image.viewer_url;
+        media.dataset.download = image.download_url;
 
         // only append video if can play
         if (media.tagName === 'VIDEO') {
@@ -40,7 +55,6 @@ document.addEventListener('DOMContentLoaded', () => {
       });
 
       totalLoaded += images.length;
-      batch++;
     } catch (e) {
       console.error(e);
     } finally {
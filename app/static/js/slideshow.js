@@ -33,17 +33,27 @@ window.openModal = function(index) {
     if (sourceEl.tagName.toLowerCase() === "video") {
         modalMedia = document.createElement("video");
         modalMedia.controls = true;
-        modalMedia.src = sourceEl.src;
+        modalMedia.src = sourceEl.dataset.viewer || sourceEl.src;
         modalMedia.autoplay = true;
     } else {
         modalMedia = document.createElement("img");
-        modalMedia.src = sourceEl.src;
+        // Viewer-sized preview, not the full-resolution original
+        modalMedia.src = sourceEl.dataset.viewer || sourceEl.src;
     }
     modalMedia.classList.add("modal-media");
     // FIX: Insert into .modal-content, not modal
     const modalContent = modal.querySelector('.modal-content');
     modalContent.innerHTML = ''; // Clear previous
     modalContent.appendChild(modalMedia);
+
+    // Originals are only fetched on explicit download
+    if (sourceEl.dataset.download) {
+        const download = document.createElement("a");
+        download.href = sourceEl.dataset.download;
+        download.className = "modal-download";
+        download.textContent = "Download original";
+        modalContent.appendChild(download);
+    }
 }
 // --- End global openModal ---
 
@@ -1,5 +1,7 @@
 document.addEventListener('DOMContentLoaded', function() {
-    const form = document.getElementById('uploadForm');
+    const form = document.getElementById('photoUploadForm') || document.getElementById('uploadForm');
+    if (!form) return;
+
     const progressContainer = document.getElementById('progressContainer');
     const progressBar = document.getElementById('progressBar');
     const progressPercentage = document.getElementById('progressPercentage');
@@ -8,9 +10,226 @@ document.addEventListener('DOMContentLoaded', function() {
     const fileError = document.getElementById('fileError');
     const uploadBtn = form.querySelector('button[type="submit"]');
 
-    if (!form) return;
+    // Upload endpoints for this event (see app/api/v1/upload.py): straight to
+    // object storage where the server has it, resumable through the server otherwise
+    const directBase = window.location.pathname.replace(/\/$/, '') + '/direct';
+    const uploadBase = window.location.pathname.replace(/\/$/, '') + '/resumable';
+    const CHUNK_SIZE = 5 * 1024 * 1024;  // 5 MB per PATCH
+    const MAX_RETRIES = 8;
+    const HASH_LIMIT = 64 * 1024 * 1024;  // Hash files up to 64 MB so the server can skip duplicates
+    let directUploads = true;  // Until the server says it keeps files itself
+
+    // ─── Helpers ──────────────────────────────────────────────────────────
+
+    function wait(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function encodeMetadata(meta) {
+        return Object.entries(meta)
+            .filter(([, value]) => value)
+            .map(([key, value]) => key + ' ' + btoa(unescape(encodeURIComponent(value))))
+            .join(',');
+    }
+
+    // Remember upload URLs across page reloads so a guest can pick up where they left off
+    function storageKey(file, email) {
+        return ['resumable', uploadBase, email, file.name, file.size, file.lastModified].join(':');
+    }
+
+    function send(method, url, headers, body, onProgress) {
+        return new Promise((resolve, reject) => {
+            const xhr = new XMLHttpRequest();
+            xhr.open(method, url, true);
+            Object.entries(headers || {}).forEach(([key, value]) => xhr.setRequestHeader(key, value));
+            if (onProgress) {
+                xhr.upload.onprogress = e => onProgress(e.loaded);
+            }
+            xhr.onload = () => {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                    resolve(xhr);
+                } else {
+                    reject(Object.assign(new Error('HTTP ' + xhr.status), { status: xhr.status }));
+                }
+            };
+            xhr.onerror = () => reject(new Error('Network error'));
+            xhr.send(body || null);
+        });
+    }
+
+    async function sendJson(method, url, body) {
+        const headers = body ? { 'Content-Type': 'application/json' } : {};
+        const xhr = await send(method, url, headers, body ? JSON.stringify(body) : null);
+        return xhr.responseText ? JSON.parse(xhr.responseText) : null;
+    }
+
+    // SHA-256 of the file as hex, or '' where hashing isn't possible (plain http, huge files)
+    async function fileHash(file) {
+        if (!window.crypto || !crypto.subtle || file.size > HASH_LIMIT) return '';
+        try {
+            const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        } catch (err) {
+            return '';
+        }
+    }
+
+    // Returns { url, offset }; offset equals file.size when the event already has this file
+    async function createUpload(file, email, device) {
+        const xhr = await send('POST', uploadBase, {
+            'Tus-Resumable': '1.0.0',
+            'Upload-Length': String(file.size),
+            'Upload-Metadata': encodeMetadata({
+                filename: file.name,
+                filetype: file.type,
+                guest_email: email,
+                guest_device: device,
+                sha256: await fileHash(file),
+            }),
+        });
+        return {
+            url: xhr.getResponseHeader('Location'),
+            offset: parseInt(xhr.getResponseHeader('Upload-Offset') || '0', 10),
+        };
+    }
+
+    // Returns the server's offset, or null when the upload no longer exists
+    async function getOffset(url) {
+        try {
+            const xhr = await send('HEAD', url, { 'Tus-Resumable': '1.0.0' });
+            return parseInt(xhr.getResponseHeader('Upload-Offset'), 10);
+        } catch (err) {
+            if (err.status === 404 || err.status === 410) return null;
+            throw err;
+        }
+    }
+
+    // ─── Direct to object storage ─────────────────────────────────────────
+
+    // Returns false when the server does not offer direct uploads
+    async function uploadDirect(file, email, device, onProgress) {
+        const key = storageKey(file, email);
+        const saved = localStorage.getItem(key);
+        let status = null;
+        if (saved && saved.includes('/direct/')) {
+            try {
+                status = await sendJson('GET', saved);
+            } catch (err) {
+                if (err.status !== 404 && err.status !== 410) throw err;
+            }
+        }
+        if (!status) {
+            try {
+                status = await sendJson('POST', directBase, {
+                    filename: file.name,
+                    filetype: file.type,
+                    size: file.size,
+                    guest_email: email,
+                    guest_device: device,
+                    sha256: await fileHash(file),
+                });
+            } catch (err) {
+                if (err.status !== 404) throw err;
+                directUploads = false;
+                return false;
+            }
+            if (status.duplicate) {
+                onProgress(file.size);  // Nothing to send
+                return true;
+            }
+            localStorage.setItem(key, status.url);
+        }
+
+        const partStart = part => (part.part_number - 1) * status.part_size;
+        const partBytes = part => Math.min(partStart(part) + status.part_size, file.size) - partStart(part);
+        let sentBytes = status.parts.filter(p => p.etag).reduce((sum, p) => sum + partBytes(p), 0);
+        onProgress(sentBytes);
 
-    form.addEventListener('submit', function(e) {
+        for (const part of status.parts.filter(p => !p.etag)) {
+            const chunk = file.slice(partStart(part), partStart(part) + status.part_size);
+            for (let retries = 0; ; retries++) {
+                try {
+                    await send('PUT', part.url, {}, chunk, loaded => onProgress(sentBytes + loaded));
+                    break;
+                } catch (err) {
+                    if (retries >= MAX_RETRIES || (err.status && err.status < 500)) throw err;
+                    await wait(Math.min(1000 * 2 ** (retries + 1), 30000));
+                }
+            }
+            sentBytes += partBytes(part);
+            onProgress(sentBytes);
+        }
+        await sendJson('POST', status.url + '/complete');
+        localStorage.removeItem(key);
+        return true;
+    }
+
+    // ─── Resumable through the server ─────────────────────────────────────
+
+    async function uploadResumable(file, email, device, onProgress) {
+        const key = storageKey(file, email);
+        let url = localStorage.getItem(key);
+        if (url && url.includes('/direct/')) url = null;  // Started while the server offered direct uploads
+        let offset = url ? await getOffset(url) : null;
+        if (offset === null) {
+            ({ url, offset } = await createUpload(file, email, device));
+            if (!url) {
+                onProgress(file.size);  // Duplicate: nothing to send
+                return;
+            }
+            localStorage.setItem(key, url);
+        }
+        onProgress(offset);
+
+        let retries = 0;
+        do {
+            try {
+                const chunk = file.slice(offset, offset + CHUNK_SIZE);
+                const start = offset;
+                const xhr = await send('PATCH', url, {
+                    'Tus-Resumable': '1.0.0',
+                    'Upload-Offset': String(offset),
+                    'Content-Type': 'application/offset+octet-stream',
+                }, chunk, loaded => onProgress(start + loaded));
+                offset = parseInt(xhr.getResponseHeader('Upload-Offset'), 10);
+                onProgress(offset);
+                retries = 0;
+            } catch (err) {
+                if (++retries > MAX_RETRIES || (err.status && err.status < 500 && err.status !== 409)) throw err;
+                await wait(Math.min(1000 * 2 ** retries, 30000));
+                // Resume from the last byte the server acknowledged
+                try {
+                    const serverOffset = await getOffset(url);
+                    if (serverOffset === null) throw err;
+                    offset = serverOffset;
+                } catch (headErr) {
+                    if (headErr === err) throw err;
+                }
+            }
+        } while (offset < file.size);
+
+        localStorage.removeItem(key);
+    }
+
+    async function uploadFile(file, email, device, onProgress) {
+        if (directUploads && await uploadDirect(file, email, device, onProgress)) return;
+        await uploadResumable(file, email, device, onProgress);
+    }
+
+    function showProgress(percent) {
+        progressBar.style.width = percent + '%';
+        progressPercentage.textContent = percent + '%';
+    }
+
+    function showMessage(text, className) {
+        uploadMessage.style.display = 'block';
+        uploadMessage.textContent = text;
+        uploadMessage.className = 'upload-message ' + className;
+    }
+
+    // ─── Submit ───────────────────────────────────────────────────────────
+
+    form.addEventListener('submit', async function(e) {
         e.preventDefault();
 
         // Reset messages
@@ -19,7 +238,8 @@ document.addEventListener('DOMContentLoaded', function() {
         uploadMessage.style.display = 'none';
 
         const email = form.guest_email.value.trim();
-        const files = form.file_upload.files;
+        const device = form.guest_device ? form.guest_device.value : '';
+        const files = Array.from(form.file_upload.files);
         if (!email) {
             emailError.textContent = 'Please enter your email.';
             return;
@@ -29,48 +249,29 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const formData = new FormData(form);
-
         // Show progress bar and hide upload button
         progressContainer.style.display = 'block';
-        progressBar.style.width = '0%';
-        progressPercentage.textContent = '0%';
+        showProgress(0);
         uploadBtn.style.display = 'none';
 
-        const xhr = new XMLHttpRequest();
-        xhr.open('POST', window.location.pathname, true);
-
-        xhr.upload.onprogress = function(e) {
-            if (e.lengthComputable) {
-                const percent = Math.round((e.loaded / e.total) * 100);
-                progressBar.style.width = percent + '%';
-                progressPercentage.textContent = percent + '%';
-            }
-        };
+        const totalBytes = files.reduce((sum, file) => sum + file.size, 0) || 1;
+        let doneBytes = 0;
 
-        xhr.onload = function() {
-            uploadBtn.style.display = 'block';
-            if (xhr.status === 200) {
-                progressBar.style.width = '100%';
-                progressPercentage.textContent = '100%';
-                uploadMessage.style.display = 'block';
-                uploadMessage.textContent = 'Upload successful!';
-                uploadMessage.className = 'upload-message success-message';
-                form.reset();
-            } else {
-                uploadMessage.style.display = 'block';
-                uploadMessage.textContent = 'Upload failed. Please try again.';
-                uploadMessage.className = 'upload-message error-message';
+        try {
+            for (const file of files) {
+                await uploadFile(file, email, device, sent => {
+                    showProgress(Math.round(((doneBytes + sent) / totalBytes) * 100));
+                });
+                doneBytes += file.size;
             }
-        };
-
-        xhr.onerror = function() {
+            showProgress(100);
+            showMessage('Upload successful!', 'success-message');
+            form.reset();
+        } catch (err) {
+            console.error(err);
+            showMessage('Upload interrupted. Submit again to resume where you left off.', 'error-message');
+        } finally {
             uploadBtn.style.display = 'block';
-            uploadMessage.style.display = 'block';
-            uploadMessage.textContent = 'Upload failed. Please try again.';
-            uploadMessage.className = 'upload-message error-message';
-        };
-
-        xhr.send(formData);
+        }
     });
 });
@@ -1,8 +1,11 @@
-import smtplib
-from email.mime.text import MIMEText
-from app.core.config import EMAIL_FROM, EMAIL_PASSWORD, BASE_URL
+from sqlmodel import Session
+from app.core.config import BASE_URL
+from app.services.email_outbox import enqueue_email
 
-def send_verification_email(email: str, token: str):
+def queue_verification_email(session: Session, email: str, token: str):
+    """
+    Add the sign-up verification email to the outbox. The caller commits.
+    """
     verification_url = f"{BASE_URL}/auth/verify-email?token={token}"
     subject = "Verify Your Email Address"
     body = f"""
@@ -17,12 +20,4 @@ def send_verification_email(email: str, token: str):
     Thanks,
     Event Snap Team
     """
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = EMAIL_FROM
-    msg["To"] = email
-
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_FROM, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_FROM, email, msg.as_string())
\ No newline at end of file
+    enqueue_email(session, email, subject, body)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Benchmark: gallery page latency and throughput while slow queries run.
+
+Fetches gallery pages from a uvicorn server from several concurrent clients
+while a few deliberately slow queries (a self-join over every file row)
+arrive one after another, and compares the same handlers written with:
+- a sync Session queried directly inside `async def` (how the routes used
+  to work), which blocks the event loop for the whole query,
+- AsyncSessionLocal (how the upload, gallery and auth routes work now),
+  where the query runs on the driver's thread and the loop keeps serving.
+
+Each is also run without slow queries to show the cost on the fast path.
+
+Run from the repository root:
+
+    python scripts/bench_async_db.py
+"""
+import asyncio, multiprocessing, os, socket, statistics, sys, tempfile, time
+
+# Point the app at a throwaway database and storage root before importing it
+# (the server process inherits the same folder through the environment)
+WORKDIR = os.environ.setdefault("BENCH_WORKDIR", tempfile.mkdtemp(prefix="bench_async_db_"))
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.core.config as config
+config.STORAGE_ROOT = os.path.join(WORKDIR, "storage")
+os.makedirs(config.STORAGE_ROOT, exist_ok=True)
+
+from datetime import datetime, timedelta, timezone
+import httpx, uvicorn
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, select
+from app.db.session import engine, async_engine, AsyncSessionLocal
+from app.models import User, Event, FileMetadata
+
+engine.echo = async_engine.echo = False
+FILES = 8000  # Rows the slow query joins against themselves
+CLIENTS = 8  # Concurrent gallery clients
+REQUESTS = 25  # Pages fetched by each client
+SLOW_QUERIES = 4  # Slow queries sent while the clients run
+SLOW_GAP_SECONDS = 0.1  # Pause before each slow query
+SLOW_SQL = "SELECT count(*) FROM filemetadata a JOIN filemetadata b ON a.id < b.id"
+
+# ─── Bench App ──────────────────────────────────────────────────────────────
+
+bench_app = FastAPI()
+
+def page_query(event_id: int):
+    """
+    The gallery's first-page query.
+    """
+    return (
+        select(FileMetadata.id, FileMetadata.file_name)
+        .where(FileMetadata.event_id == event_id)
+        .order_by(FileMetadata.created_date.desc(), FileMetadata.id.desc())
+        .limit(21)
+    )
+
+@bench_app.get("/sync/photos/{event_id}")
+async def photos_sync(event_id: int):
+    with Session(engine) as session:
+        if not session.get(Event, event_id):
+            raise HTTPException(status_code=404)
+        rows = session.exec(page_query(event_id)).all()
+    return {"items": [{"id": row.id, "caption": row.file_name} for row in rows[:20]]}
+
+@bench_app.get("/async/photos/{event_id}")
+async def photos_async(event_id: int):
+    async with AsyncSessionLocal() as session:
+        if not await session.get(Event, event_id):
+            raise HTTPException(status_code=404)
+        rows = (await session.exec(page_query(event_id))).all()
+    return {"items": [{"id": row.id, "caption": row.file_name} for row in rows[:20]]}
+
+@bench_app.get("/sync/slow")
+async def slow_sync():
+    with Session(engine) as session:
+        return {"pairs": session.exec(text(SLOW_SQL)).one()[0]}
+
+@bench_app.get("/async/slow")
+async def slow_async():
+    async with AsyncSessionLocal() as session:
+        return {"pairs": (await session.exec(text(SLOW_SQL))).one()[0]}
+
+# ─── Scenarios ──────────────────────────────────────────────────────────────
+
+def serve(port: int):
+    uvicorn.run(bench_app, host="127.0.0.1", port=port, log_level="warning")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_for_server(base_url: str):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                await client.get("/docs")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+def seed() -> int:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(first_name="Bench", last_name="User", email="bench@example.com", hashed_password="-")
+        session.add(user)
+        session.flush()
+        event = Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path="bench",
+                      event_code="BNCH", event_password="0000")
+        session.add(event)
+        session.flush()
+        start = datetime.now(timezone.utc)
+        session.add_all(
+            FileMetadata(event_id=event.id, file_name=f"{i}.jpg", file_type="image/jpeg",
+                         file_size=1, created_date=start + timedelta(seconds=i))
+            for i in range(FILES)
+        )
+        session.commit()
+        return event.id
+
+async def scenario(base_url: str, photos_url: str, slow_url: str, with_slow: bool) -> tuple[list[float], float]:
+    latencies = []
+
+    async def client_loop(client: httpx.AsyncClient):
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            (await client.get(photos_url)).raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def slow_loop(client: httpx.AsyncClient):
+        for _ in range(SLOW_QUERIES if with_slow else 0):
+            await asyncio.sleep(SLOW_GAP_SECONDS)
+            (await client.get(slow_url)).raise_for_status()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        start = time.perf_counter()
+        slow = asyncio.create_task(slow_loop(client))
+        await asyncio.gather(*(client_loop(client) for _ in range(CLIENTS)))
+        elapsed = time.perf_counter() - start
+        await slow
+    return latencies, len(latencies) / elapsed
+
+def report(name: str, latencies: list[float], throughput: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<34} {throughput:7.0f} req/s   p50 {statistics.median(latencies):7.1f} ms"
+          f"   p95 {p95:7.1f} ms   max {latencies[-1]:7.1f} ms")
+
+async def main():
+    event_id = seed()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    await wait_for_server(base_url)
+    sync_urls = (base_url, f"/sync/photos/{event_id}", "/sync/slow")
+    async_urls = (base_url, f"/async/photos/{event_id}", "/async/slow")
+    start = time.perf_counter()
+    with Session(engine) as session:
+        session.exec(text(SLOW_SQL)).one()
+    print(f"{CLIENTS} clients x {REQUESTS} gallery pages, {FILES} files; "
+          f"one slow query takes {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    report("sync session, no slow queries", *await scenario(*sync_urls, with_slow=False))
+    report("async engine, no slow queries", *await scenario(*async_urls, with_slow=False))
+    report(f"sync session, {SLOW_QUERIES} slow queries", *await scenario(*sync_urls, with_slow=True))
+    report(f"async engine, {SLOW_QUERIES} slow queries", *await scenario(*async_urls, with_slow=True))
+    server.terminate()
+
+if __name__ == "__main__":
+    asyncio.run(main())
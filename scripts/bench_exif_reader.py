@@ -0,0 +1,90 @@
+"""
+Microbenchmark: header-only EXIF reader vs. the original Pillow lookup.
+
+Generates a corpus of JPEGs with realistic EXIF blocks (camera tags, GPS,
+a thumbnail-sized MakerNote) and times reading the capture time from each
+file with both implementations.
+
+Run from the repository root:
+
+    python scripts/bench_exif_reader.py [--images 200] [--repeat 5]
+"""
+import argparse, os, random, sys, tempfile, time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ExifTags
+from app.services.exif_reader import read_image_header
+from app.services.media import extract_photo_time
+
+def pillow_photo_time(path: str) -> datetime | None:
+    # The implementation guest_upload used to run inline for every photo
+    try:
+        img = Image.open(path)
+        exif = img._getexif() or {}
+        tag_map = {ExifTags.TAGS.get(k, k): v for k, v in exif.items()}
+        dt = tag_map.get("DateTimeOriginal") or tag_map.get("DateTime")
+        return datetime.strptime(dt, "%Y:%m:%d %H:%M:%S") if dt else None
+    except:
+        return None
+
+def build_corpus(folder: str, count: int) -> list[str]:
+    rng = random.Random(42)
+    paths = []
+    for i in range(count):
+        width, height = rng.choice([(4032, 3024), (3024, 4032), (1920, 1080), (800, 600)])
+        img = Image.new("RGB", (width // 8, height // 8), (rng.randrange(256), 90, 160))
+        exif = Image.Exif()
+        exif[ExifTags.Base.Make] = "BenchCam"
+        exif[ExifTags.Base.Model] = f"Model {i % 7}"
+        exif[ExifTags.Base.Orientation] = rng.choice([1, 3, 6, 8])
+        exif[ExifTags.Base.DateTime] = "2024:06:01 12:00:00"
+        exif[ExifTags.Base.Software] = "bench 1.0"
+        sub = exif.get_ifd(ExifTags.IFD.Exif)
+        sub[ExifTags.Base.DateTimeOriginal] = f"2024:06:01 {rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+        sub[ExifTags.Base.ExifImageWidth] = width
+        sub[ExifTags.Base.ExifImageHeight] = height
+        sub[ExifTags.Base.MakerNote] = os.urandom(16 * 1024)
+        path = os.path.join(folder, f"IMG_{i:04d}.jpg")
+        img.save(path, "JPEG", quality=85, exif=exif.tobytes())
+        paths.append(path)
+    return paths
+
+def time_reader(reader, paths: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            reader(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_exif_") as folder:
+        paths = build_corpus(folder, args.images)
+
+        # Both readers must agree before their speed means anything
+        for path in paths:
+            assert read_image_header(path).capture_time == pillow_photo_time(path), path
+
+        readers = [
+            ("Pillow _getexif (old)", pillow_photo_time),
+            ("header-only reader", lambda p: read_image_header(p).capture_time),
+            ("extract_photo_time (new)", extract_photo_time),
+        ]
+        baseline = None
+        print(f"{len(paths)} JPEGs, best of {args.repeat} runs")
+        for name, reader in readers:
+            elapsed = time_reader(reader, paths, args.repeat)
+            baseline = baseline or elapsed
+            per_image = elapsed / len(paths) * 1e6
+            print(f"{name:<26} {elapsed * 1000:8.1f} ms total  {per_image:8.1f} µs/image  {baseline / elapsed:5.1f}x")
+
+if __name__ == "__main__":
+    main()
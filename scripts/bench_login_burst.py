@@ -0,0 +1,97 @@
+"""
+Benchmark: guest upload latency while a burst of logins runs.
+
+Sends small guest uploads one after another through the ASGI app while a
+burst of concurrent logins is processed, and reports upload latency:
+- alone (no logins),
+- with bcrypt called inline on the event loop (the old behaviour),
+- with bcrypt offloaded to the bounded executor in app.services.passwords.
+
+Run from the repository root:
+
+    python scripts/bench_login_burst.py
+"""
+import asyncio, os, statistics, sys, tempfile, time
+
+# Point the app at a throwaway database and storage root before importing it
+WORKDIR = tempfile.mkdtemp(prefix="bench_logins_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.core.config as config
+config.STORAGE_ROOT = os.path.join(WORKDIR, "storage")
+os.makedirs(config.STORAGE_ROOT)
+
+from datetime import datetime, timezone
+import bcrypt, httpx
+from sqlmodel import Session, SQLModel
+from app.db.session import engine, async_engine
+from app.models import User, Event
+import app.api.v1.auth as auth_routes
+from app.services.passwords import verify_password
+from app.main import app
+
+engine.echo = async_engine.echo = False
+LOGINS = 16  # Concurrent logins in the burst
+UPLOADS = 40  # Uploads timed per scenario
+PASSWORD = "Bench123!"
+
+async def verify_inline(password: str, hashed: str) -> bool:
+    """
+    The old behaviour: bcrypt on the event loop thread.
+    """
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+def seed():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(first_name="Bench", last_name="User", email="bench@example.com", verified=True,
+                    hashed_password=bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(config.BCRYPT_ROUNDS)).decode())
+        session.add(user)
+        session.flush()
+        session.add(Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path="bench",
+                          event_code="BNCH", event_password="0000"))
+        session.commit()
+
+async def upload_latencies(client: httpx.AsyncClient) -> list[float]:
+    latencies = []
+    for i in range(UPLOADS):
+        start = time.perf_counter()
+        response = await client.post(
+            "/upload/BNCH/0000",
+            data={"guest_email": "guest@example.com"},
+            files={"file_upload": (f"{i}.bin", os.urandom(64 * 1024), "application/octet-stream")},
+        )
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+    return latencies
+
+async def login(client: httpx.AsyncClient):
+    await client.post("/auth/login", data={"email": "bench@example.com", "password": PASSWORD})
+
+async def scenario(verify, with_logins: bool) -> list[float]:
+    auth_routes.verify_password = verify
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as uploader, \
+               httpx.AsyncClient(transport=transport, base_url="http://bench") as logins:
+        burst = [asyncio.create_task(login(logins)) for _ in range(LOGINS if with_logins else 0)]
+        latencies = await upload_latencies(uploader)
+        await asyncio.gather(*burst)
+    return latencies
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<28} p50 {statistics.median(latencies):8.1f} ms   p95 {p95:8.1f} ms   max {latencies[-1]:8.1f} ms")
+
+async def main():
+    seed()
+    print(f"{LOGINS} concurrent logins at {config.BCRYPT_ROUNDS} rounds, "
+          f"{config.PASSWORD_HASH_CONCURRENCY} bcrypt threads\n")
+    report("uploads alone", await scenario(verify_password, with_logins=False))
+    report("logins, bcrypt inline", await scenario(verify_inline, with_logins=True))
+    report("logins, bcrypt offloaded", await scenario(verify_password, with_logins=True))
+
+if __name__ == "__main__":
+    asyncio.run(main())
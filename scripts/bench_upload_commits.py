@@ -0,0 +1,109 @@
+"""
+Benchmark: database cost of recording a multi-file guest upload.
+
+Compares the old per-file pattern (commit + refresh for the guest, then one
+commit per FileMetadata row) with `save_uploads`, which writes the guest,
+all rows and their media jobs in a single transaction.
+
+Run from the repository root:
+
+    python scripts/bench_upload_commits.py
+"""
+import os, sys, tempfile, time
+
+# Point the app at a throwaway database and storage root before importing it
+WORKDIR = tempfile.mkdtemp(prefix="bench_commits_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.core.config as config
+config.STORAGE_ROOT = os.path.join(WORKDIR, "storage")
+
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy import event as sa_event
+from sqlmodel import Session, SQLModel
+from app.db.session import engine
+from app.models import User, Event, Guest, FileMetadata
+from app.services.ingest import IngestedFile
+from app.services.storage import incoming_path
+from app.services.quota import ensure_storage
+from app.api.v1.upload import save_uploads
+
+engine.echo = False
+BATCH_SIZES = [1, 50, 500]
+
+commits = 0
+
+@sa_event.listens_for(engine, "commit")
+def _count_commit(conn):
+    global commits
+    commits += 1
+
+def setup_event(session: Session, code: str) -> Event:
+    user = User(first_name="Bench", last_name="User", email=f"{code}@bench", hashed_password="x")
+    session.add(user)
+    session.commit()
+    event = Event(
+        user_id=user.id, date=datetime.now(timezone.utc), storage_path=code,
+        event_code=code, event_password="0000",
+    )
+    session.add(event)
+    session.commit()
+    session.refresh(event)
+    ensure_storage(event)  # Storage counter row the uploads are charged to
+    return event
+
+def make_files(count: int, tag: str) -> list[IngestedFile]:
+    files = []
+    for i in range(count):
+        path = incoming_path(f"{tag}-{i}")
+        path.write_bytes(b"x")
+        digest = f"{tag}-{i}".encode().hex().ljust(64, "0")[:64]
+        files.append(IngestedFile("file_upload", f"IMG_{i:04d}.jpg", "image/jpeg", path, 1, digest))
+    return files
+
+def per_file_commits(session: Session, event: Event, files: list[IngestedFile]):
+    # The guest_upload loop as it was before the batching change
+    guest = Guest(guest_email="old@bench", event_id=event.id)
+    session.add(guest)
+    session.commit()
+    session.refresh(guest)
+    for f in files:
+        session.add(FileMetadata(
+            file_name=f.filename, file_type=f.content_type, guest_id=guest.id,
+            event_id=event.id, file_size=f.size, content_hash=f.sha256,
+        ))
+        session.commit()
+
+def single_transaction(session: Session, event: Event, files: list[IngestedFile]):
+    guest = Guest(guest_email="new@bench", event_id=event.id)
+    session.add(guest)
+    session.flush()
+    save_uploads(session, event, guest, files, guest_device=None)
+    session.commit()
+
+def measure(strategy, count: int, tag: str) -> tuple[int, float]:
+    global commits
+    with Session(engine) as session:
+        event = setup_event(session, tag)
+        files = make_files(count, tag)
+        commits = 0
+        start = time.perf_counter()
+        strategy(session, event, files)
+        elapsed = time.perf_counter() - start
+    return commits, elapsed
+
+def main():
+    SQLModel.metadata.create_all(engine)
+    print(f"{'files':>6} | {'per-file commits':>16} {'ms':>9} | {'single transaction':>18} {'ms':>9} | speed-up")
+    for count in BATCH_SIZES:
+        old_commits, old_time = measure(per_file_commits, count, f"old{count}")
+        new_commits, new_time = measure(single_transaction, count, f"new{count}")
+        print(
+            f"{count:>6} | {old_commits:>16} {old_time * 1000:>9.1f} | "
+            f"{new_commits:>18} {new_time * 1000:>9.1f} | {old_time / new_time:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Check: email outbox delivery against a local SMTP stand-in.
+
+Runs the contact form and the background sender against `SMTPSink` on a
+throwaway database and checks that:
+- the request only enqueues (no SMTP traffic while it runs),
+- a backlog is delivered over a single pooled connection,
+- deferred (4xx) messages are retried and rejected (5xx) ones fail,
+- messages queued while the server is down go out once it is back,
+- only messages whose sender's lease has expired are re-queued.
+
+Run from the repository root:
+
+    python scripts/check_email_outbox.py
+"""
+import asyncio, tempfile, time
+
+from harness import check, throwaway_app
+
+# Point the app at a throwaway database before importing it
+throwaway_app(tempfile.mkdtemp(prefix="check_outbox_"), database="outbox.db", storage=False)
+
+import httpx
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session, SQLModel, select
+from app.db.session import engine
+from app.models import OutboxEmail
+from app.services.email_outbox import EmailOutbox, SMTPConnection, enqueue_email
+from app.main import app
+from smtp_sink import SMTPSink
+
+def statuses() -> dict[str, int]:
+    with Session(engine) as session:
+        rows = session.exec(select(OutboxEmail.status)).all()
+    return {status: rows.count(status) for status in sorted(set(rows))}
+
+def queue(count: int, prefix: str, to: str = "guest@example.com"):
+    with Session(engine) as session:
+        for i in range(count):
+            enqueue_email(session, to, f"{prefix} {i}", "Hello")
+        session.commit()
+
+async def main():
+    SQLModel.metadata.create_all(engine)
+    sink = SMTPSink()
+    await sink.start()
+    outbox = EmailOutbox(
+        SMTPConnection(host=sink.host, port=sink.port, starttls=False, password="", timeout=5),
+        batch_size=20,
+        retry_seconds=0,  # Retries are due at once so the check runs straight through
+    )
+
+    # The contact form only writes two outbox rows
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+        start = time.perf_counter()
+        response = await client.post("/contact-us", data={
+            "full_name": "Check", "email": "check@example.com", "topic": "Test", "message": "Hi",
+        })
+        elapsed = (time.perf_counter() - start) * 1000
+    check("contact form enqueues without SMTP", response.status_code == 200 and sink.connections == 0
+          and statuses() == {"pending": 2}, f"{elapsed:.1f} ms")
+
+    # A backlog goes out in batches over one connection
+    queue(48, "Backlog")
+    delivered = await outbox.drain()
+    check("backlog delivered on one connection", delivered == 50 and sink.connections == 1
+          and outbox.connection.connects == 1, f"{delivered} sent, {sink.connections} connection")
+
+    # 4xx is retried, 5xx fails the message
+    sink.defer, sink.refuse = 2, {"nobody@example.com"}
+    queue(3, "Deferred")
+    queue(1, "Refused", to="nobody@example.com")
+    await outbox.drain()
+    check("deferred messages wait for a retry", statuses().get("pending") == 2, str(statuses()))
+    await outbox.drain()
+    check("deferred messages sent on retry, refused one failed",
+          statuses() == {"failed": 1, "sent": 53}, str(statuses()))
+
+    # Server down: messages stay queued and go out once it is back
+    await sink.stop()
+    outbox.connection.close()
+    queue(5, "Outage")
+    await outbox.drain()
+    check("outage leaves messages pending", statuses().get("pending") == 5, str(statuses()))
+    sink = SMTPSink(port=sink.port)
+    await sink.start()
+    await outbox.drain()
+    check("queued messages delivered after the outage", statuses() == {"failed": 1, "sent": 58},
+          str(statuses()))
+
+    # Leases: a message another sender is still on is left alone
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        for subject, claimed_at in (("Live lease", now), ("Expired lease", now - timedelta(hours=1))):
+            session.add(OutboxEmail(to_address="guest@example.com", subject=subject, body="Hello", status="sending",
+                                    claimed_by="other-sender", claimed_at=claimed_at))
+        session.commit()
+    outbox._requeue_stale()
+    await outbox.drain()
+    check("only messages with an expired lease are re-sent", statuses() == {"failed": 1, "sending": 1, "sent": 59},
+          str(statuses()))
+
+    await asyncio.to_thread(outbox.connection.close)
+    await sink.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+"""
+Check: signed, cacheable delivery of previews and originals.
+
+Runs the app on a throwaway database and storage root (local store) and
+checks that:
+- the photo listing is only given to guests with the event password (or
+  the host), found by event code and never by id, and so is a file's
+  processing status,
+- it hands out signed links, stable within a window, and unsigned, forged
+  or expired links are refused,
+- originals and generated previews carry an immutable Cache-Control that
+  lasts until the link expires, and a strong ETag answered with 304,
+- a video original can be read with Range (and If-Range) for seeking,
+- with MEDIA_SENDFILE set, large files are left to the proxy (X-Accel-Redirect
+  or X-Sendfile) while small ones are still sent by the app,
+- /uploads serves event banners (revalidated) and nothing else.
+
+Run from the repository root:
+
+    python scripts/check_media_delivery.py
+"""
+import io, os, tempfile, time
+
+from harness import check, throwaway_app
+
+# Point the app at a throwaway database and storage root before importing it
+os.environ["STORAGE_BACKEND"] = "local"
+throwaway_app(tempfile.mkdtemp(prefix="check_media_"))
+
+import app.core.config as config
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session, SQLModel, select
+from app.db.session import engine
+from app.models import Event, FileMetadata, Guest, MediaJob, Pricing, User
+from app.services.media_delivery import sign_url
+from app.services.object_store import object_store
+from app.services.storage import banner_key
+
+VIDEO_SIZE = 8 * 1024 * 1024
+
+def seed() -> Event:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        plan = Pricing(tier="Check", price=0, event_limit=1, storage_limit_mb=64, can_download=True,
+                       storage_duration=30, allow_video=True)
+        session.add(plan)
+        session.flush()
+        user = User(first_name="Check", last_name="Host", email="host@example.com", hashed_password="-",
+                    pricing_id=plan.id)
+        session.add(user)
+        session.flush()
+        event = Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path="media",
+                      event_code="MDIA", event_password="0000", pricing_id=plan.id)
+        session.add(event)
+        session.flush()
+        guest = Guest(event_id=event.id, guest_email="guest@example.com")
+        session.add(guest)
+        session.flush()
+        # A video original stored under its own key, as a direct upload would be
+        key = "media/.direct/clip"
+        object_store().put_bytes(key, os.urandom(VIDEO_SIZE))
+        session.add(FileMetadata(event_id=event.id, guest_id=guest.id, file_name="clip.mp4", file_type="video/mp4",
+                                 file_size=VIDEO_SIZE, storage_key=key))
+        session.commit()
+        session.refresh(event)
+        return event
+
+def photo() -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (1600, 1200), (40, 120, 200)).save(out, "JPEG")
+    return out.getvalue()
+
+def wait_for_jobs(seconds: float = 60):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with Session(engine) as session:
+            if all(job.status in ("done", "failed") for job in session.exec(select(MediaJob)).all()):
+                return
+        time.sleep(0.2)
+
+def max_age(response) -> int:
+    directives = dict(part.strip().partition("=")[::2] for part in response.headers["cache-control"].split(","))
+    return int(directives.get("max-age") or 0)
+
+def main():
+    event = seed()
+    from app.main import app
+    with TestClient(app) as client:
+        data = photo()
+        client.post(f"/upload/{event.event_code}/{event.event_password}", data={"guest_email": "guest@example.com"},
+                    files={"file_upload": ("IMG_0001.jpg", data, "image/jpeg")}).raise_for_status()
+        gallery = f"/api/photos/{event.event_code}/{event.event_password}"
+        listing = client.get(gallery).json()["items"]
+        video = next(item for item in listing if item["type"] == "video")
+        image = next(item for item in listing if item["type"] == "image")
+
+        # ── Gallery access ──
+        refused = [client.get(url).status_code for url in (
+            f"/api/photos/{event.id}", f"/api/photos/{event.event_code}", f"/api/photos/{event.event_code}/9999",
+        )]
+        check("listing needs the event code and password (or the host)", refused == [404] * 3, str(refused))
+        jobs = client.get(f"{gallery}/{image['id']}/jobs").json()
+        refused = [client.get(url).status_code for url in (
+            f"/api/files/{image['id']}/jobs", f"/api/photos/{event.event_code}/{image['id']}/jobs",
+            f"{gallery}/999/jobs",
+        )]
+        check("processing status needs the event too, and keeps errors to the log", refused == [404] * 3
+              and jobs and not any("last_error" in job for job in jobs), str(refused))
+
+        # ── Signed links ──
+        query = parse_qs(urlsplit(image["download_url"]).query)
+        again = client.get(gallery).json()["items"]
+        check("listing hands out signed links", {"expires", "sig"} <= query.keys())
+        check("links are stable within a window", again == listing)
+        path = urlsplit(image["download_url"]).path
+        forged = image["download_url"].replace(f"files/{image['id']}/", f"files/{video['id']}/")
+        expired = sign_url(path, now=time.time() - config.MEDIA_URL_TTL_SECONDS - config.MEDIA_URL_WINDOW_SECONDS)
+        refused = [client.get(url).status_code for url in (path, forged, expired, path + "?expires=9999999999&sig=x")]
+        check("unsigned, forged and expired links refused", refused == [403] * 4, str(refused))
+
+        # ── Originals: immutable caching, ETag, 304 ──
+        response = client.get(image["download_url"])
+        etag = response.headers.get("etag", "")
+        remaining = int(query["expires"][0]) - time.time()
+        check("original cached until its link expires", response.content == data
+              and "immutable" in response.headers["cache-control"] and abs(max_age(response) - remaining) < 5,
+              response.headers["cache-control"])
+        check("strong ETag", etag.startswith('"') and not etag.startswith("W/"), etag)
+        cached = client.get(image["download_url"], headers={"If-None-Match": etag})
+        check("matching If-None-Match gets an empty 304", cached.status_code == 304 and not cached.content
+              and cached.headers.get("etag") == etag and "immutable" in cached.headers.get("cache-control", ""))
+
+        # ── Range for seeking ──
+        with open(object_store().path("media/.direct/clip"), "rb") as f:
+            f.seek(3 * 1024 * 1024)
+            expected = f.read(65536)
+        seek = {"Range": f"bytes={3 * 1024 * 1024}-{3 * 1024 * 1024 + 65535}"}
+        response = client.get(video["viewer_url"], headers=seek)
+        check("video seeks with Range", response.status_code == 206 and response.content == expected,
+              response.headers.get("content-range", ""))
+        video_etag = client.head(video["download_url"]).headers["etag"]
+        resumed = client.get(video["download_url"], headers={**seek, "If-Range": video_etag})
+        stale = client.get(video["download_url"], headers={**seek, "If-Range": '"stale"'})
+        check("If-Range resumes on a match, restarts on a stale tag", resumed.status_code == 206
+              and stale.status_code == 200 and len(stale.content) == VIDEO_SIZE)
+
+        # ── Previews ──
+        wait_for_jobs()
+        response = client.get(image["thumb_url"], headers={"Accept": "image/webp,*/*"})
+        check("generated preview is immutable and varies on Accept", response.headers["content-type"] == "image/webp"
+              and "immutable" in response.headers["cache-control"] and response.headers.get("vary") == "Accept",
+              f"{len(response.content)} bytes")
+        cached = client.get(image["thumb_url"], headers={"Accept": "image/webp,*/*",
+                                                         "If-None-Match": response.headers["etag"]})
+        fallback = client.get(video["thumb_url"])
+        check("preview revalidates; fallback to the original is not cached", cached.status_code == 304
+              and fallback.headers["cache-control"] == "no-cache")
+
+        # ── Offloading to the proxy ──
+        config.MEDIA_SENDFILE = "x-accel"
+        response = client.get(video["download_url"])
+        small = client.get(image["download_url"])
+        check("large file left to nginx", not response.content
+              and response.headers.get("x-accel-redirect") == "/_stored/media/.direct/clip"
+              and response.headers["etag"] == video_etag and "clip.mp4" in response.headers["content-disposition"],
+              response.headers.get("x-accel-redirect", ""))
+        check("small file still sent by the app", small.content == data and "x-accel-redirect" not in small.headers)
+        config.MEDIA_SENDFILE = "x-sendfile"
+        response = client.get(video["download_url"])
+        check("X-Sendfile names the file", response.headers.get("x-sendfile")
+              == str(object_store().path("media/.direct/clip").resolve()))
+        config.MEDIA_SENDFILE = ""
+
+        # ── Public files ──
+        object_store().put_bytes(banner_key(event, "banner.png"), b"banner", "image/png")
+        banner = client.get(f"/uploads/{event.event_code}/customisation/banner.png")
+        revalidated = client.get(f"/uploads/{event.event_code}/customisation/banner.png",
+                                 headers={"If-None-Match": banner.headers["etag"]})
+        check("banner served and revalidated", banner.content == b"banner"
+              and banner.headers["cache-control"] == "no-cache" and revalidated.status_code == 304)
+        hidden = [client.get(url).status_code for url in (
+            "/uploads/media/.direct/clip", "/media/media/.direct/clip", f"/uploads/{event.storage_path}/1/IMG_0001.jpg",
+        )]
+        check("uploads are not public", hidden == [404] * 3, str(hidden))
+
+if __name__ == "__main__":
+    main()
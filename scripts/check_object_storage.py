@@ -0,0 +1,241 @@
+"""
+Check: uploads and downloads against an S3-compatible object store.
+
+Runs the app with STORAGE_BACKEND=s3 on a throwaway database, pointed at a
+local S3 stand-in, and checks that:
+- the store's basic operations work (put, size, ranged reads, local copies),
+- a direct upload sends its parts straight to the bucket (the app only
+  hands out presigned URLs), can be resumed part-way, and is saved with
+  its storage reserved and then counted once,
+- a direct upload whose parts do not add up is refused and released,
+- one completed after the event's storage was dropped gets a 410 and is
+  removed,
+- an upload through the app still lands in the bucket's blob store,
+- downloads and banners redirect to presigned bucket URLs,
+- the media worker processes an original that only exists in the bucket.
+
+Start a local MinIO first (any S3-compatible server will do), e.g.
+
+    docker run -p 9000:9000 minio/minio server /data
+
+then run from the repository root:
+
+    python scripts/check_object_storage.py
+
+S3_ENDPOINT_URL, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY and S3_BUCKET
+point it elsewhere; the bucket is created if missing.
+"""
+import hashlib, io, os, tempfile, time
+
+from harness import check, throwaway_app
+
+# Point the app at a throwaway database, storage root and the local bucket before importing it
+WORKDIR = tempfile.mkdtemp(prefix="check_s3_")
+os.environ["STORAGE_BACKEND"] = "s3"
+os.environ.setdefault("S3_ENDPOINT_URL", "http://127.0.0.1:9000")
+os.environ.setdefault("S3_ACCESS_KEY_ID", "minioadmin")
+os.environ.setdefault("S3_SECRET_ACCESS_KEY", "minioadmin")
+os.environ.setdefault("S3_BUCKET", "eventsnap-check")
+os.environ["S3_PREFIX"] = f"{os.path.basename(WORKDIR)}/"  # Keeps runs apart in a shared bucket
+os.environ["S3_PART_SIZE_MB"] = "5"  # S3's minimum, so a few MB make several parts
+throwaway_app(WORKDIR)
+
+import asyncio
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import httpx
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session, SQLModel, select
+from app.db.session import engine
+from app.models import Event, EventStorage, FileMetadata, MediaJob, Pricing, UploadSession, User
+from app.services.media_delivery import sign_url
+from app.services.object_store import MB, local_copy, object_store
+from app.services.storage import banner_key, blob_key
+
+
+def seed() -> Event:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        plan = Pricing(tier="Check", price=0, event_limit=1, storage_limit_mb=64, can_download=True,
+                       storage_duration=30, allow_video=True)
+        session.add(plan)
+        session.flush()
+        user = User(first_name="Check", last_name="Host", email="host@example.com", hashed_password="-",
+                    pricing_id=plan.id)
+        session.add(user)
+        session.flush()
+        event = Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path="s3check",
+                      event_code="S3CK", event_password="0000", pricing_id=plan.id)
+        session.add(event)
+        session.commit()
+        session.refresh(event)
+        return event
+
+def usage(event_id: int) -> tuple[int, int]:
+    with Session(engine) as session:
+        storage = session.exec(select(EventStorage).where(EventStorage.event_id == event_id)).one()
+        return storage.used_bytes, storage.file_count
+
+def photo(width: int, height: int, padding: int = 0) -> bytes:
+    """
+    A real JPEG (so the media worker can read it), padded to span several parts.
+    """
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(out, "JPEG")
+    return out.getvalue() + b"\0" * padding  # Trailing bytes after the JPEG end marker are ignored
+
+def ensure_bucket():
+    store = object_store()
+    try:
+        store.client.head_bucket(Bucket=store.bucket)
+    except Exception:
+        store.client.create_bucket(Bucket=store.bucket)
+
+def check_store():
+    store = object_store()
+    store.put_bytes("check/hello.txt", b"0123456789", "text/plain")
+    with store.open("check/hello.txt", 4) as body:
+        tail = body.read()
+    check("store: put, size and ranged read", store.size("check/hello.txt") == 10 and tail == b"456789")
+    source = os.path.join(WORKDIR, "big.bin")
+    with open(source, "wb") as f:
+        f.write(os.urandom(12 * MB))
+    digest = hashlib.sha256(open(source, "rb").read()).hexdigest()
+    store.put_file("check/big.bin", source)
+    path, temporary = store.fetch("check/big.bin")
+    fetched = hashlib.sha256(path.read_bytes()).hexdigest()
+    os.remove(path)
+    check("store: multipart put_file and fetch", fetched == digest and temporary and not os.path.exists(source))
+    store.delete("check/hello.txt")
+    check("store: delete and missing sizes", store.sizes(["check/hello.txt", "check/big.bin"])
+          == {"check/hello.txt": None, "check/big.bin": 12 * MB})
+
+def put_parts(status: dict, data: bytes, only: list[int] = None) -> int:
+    """
+    PUT parts straight to their presigned URLs, as the browser does; returns bytes sent.
+    """
+    sent = 0
+    with httpx.Client(timeout=60) as bucket:
+        for part in status["parts"]:
+            if part["etag"] or (only and part["part_number"] not in only):
+                continue
+            start = (part["part_number"] - 1) * status["part_size"]
+            chunk = data[start:start + status["part_size"]]
+            bucket.put(part["url"], content=chunk).raise_for_status()
+            sent += len(chunk)
+    return sent
+
+def wait_for_jobs(file_id: int, seconds: float = 60) -> list[MediaJob]:
+    deadline = time.monotonic() + seconds
+    while True:
+        with Session(engine) as session:
+            jobs = session.exec(select(MediaJob).where(MediaJob.file_id == file_id)).all()
+        if all(job.status in ("done", "failed") for job in jobs) or time.monotonic() > deadline:
+            return jobs
+        time.sleep(0.2)
+
+def main():
+    ensure_bucket()
+    check_store()
+    event = seed()
+    base = f"/upload/{event.event_code}/{event.event_password}"
+    app_host = "testserver"
+    endpoint_host = urlsplit(os.environ["S3_ENDPOINT_URL"]).netloc
+
+    from app.main import app
+    with TestClient(app) as client:
+        # Direct upload, interrupted after the first part and resumed
+        data = photo(640, 480, padding=11 * MB)  # Three 5 MB parts
+        response = client.post(f"{base}/direct", json={
+            "filename": "IMG_0001.jpg", "filetype": "image/jpeg", "size": len(data), "guest_email": "guest@example.com",
+        })
+        status = response.json()
+        hosts = {urlsplit(part["url"]).netloc for part in status["parts"]}
+        check("direct upload starts with presigned part URLs", response.status_code == 201
+              and len(status["parts"]) == 3 and hosts == {endpoint_host}, f"{len(status['parts'])} parts on {hosts}")
+        check("storage reserved up front", usage(event.id) == (len(data), 0))
+
+        put_parts(status, data, only=[1])
+        early = client.post(f"{status['url']}/complete")
+        check("completing with parts missing is refused", early.status_code == 409)
+
+        resumed = client.get(status["url"]).json()
+        done = [part["part_number"] for part in resumed["parts"] if part["etag"]]
+        check("status lists stored parts for resuming", done == [1])
+        sent = put_parts(resumed, data)
+        check("remaining parts go straight to the bucket", sent == len(data) - status["part_size"])
+        complete = client.post(f"{status['url']}/complete")
+        with Session(engine) as session:
+            meta = session.exec(select(FileMetadata).where(FileMetadata.file_name == "IMG_0001.jpg")).one()
+            leftover = session.exec(select(UploadSession)).all()
+        stored = object_store().size(meta.storage_key)
+        check("completed upload is saved and counted once", complete.status_code == 204 and stored == len(data)
+              and not leftover and usage(event.id) == (len(data), 1), meta.storage_key)
+
+        # Parts that do not add up to the announced size
+        short = client.post(f"{base}/direct", json={
+            "filename": "short.jpg", "filetype": "image/jpeg", "size": 2 * MB, "guest_email": "guest@example.com",
+        }).json()
+        put_parts(short, b"x" * MB)
+        response = client.post(f"{short['url']}/complete")
+        check("size mismatch refused and released", response.status_code == 400
+              and usage(event.id) == (len(data), 1), response.json()["detail"])
+
+        # The event's storage dropped while the parts were uploading
+        late = client.post(f"{base}/direct", json={
+            "filename": "late.jpg", "filetype": "image/jpeg", "size": MB, "guest_email": "guest@example.com",
+        }).json()
+        put_parts(late, b"x" * MB)
+        with Session(engine) as session:
+            counter = session.exec(select(EventStorage).where(EventStorage.event_id == event.id)).one()
+            kept = (counter.path, counter.used_bytes, counter.file_count)
+            session.delete(counter)
+            session.commit()
+            late_key = session.exec(select(UploadSession.storage_key)).one()
+        response = client.post(f"{late['url']}/complete")
+        with Session(engine) as session:
+            leftover = session.exec(select(UploadSession)).all()
+            session.add(EventStorage(event_id=event.id, path=kept[0], used_bytes=kept[1] - MB, file_count=kept[2]))
+            session.commit()
+        check("completing after the event's storage was dropped is a 410", response.status_code == 410
+              and not leftover and object_store().size(late_key) is None, str(response.status_code))
+
+        # Through the app: the blob still ends up in the bucket
+        small = photo(320, 240)
+        response = client.post(base, data={"guest_email": "guest@example.com"},
+                               files={"file_upload": ("small.jpg", small, "image/jpeg")})
+        content_hash = hashlib.sha256(small).hexdigest()
+        check("upload through the app stored in the bucket", response.status_code == 200
+              and object_store().size(blob_key(content_hash)) == len(small))
+
+        # Downloads and banners come from the bucket
+        response = client.get(sign_url(f"/api/files/{meta.id}/download"), follow_redirects=False)
+        location = response.headers.get("location", "")
+        with httpx.Client() as bucket:
+            body = bucket.get(location).content if location else b""
+        check("download redirects to a presigned URL", response.status_code == 307
+              and urlsplit(location).netloc == endpoint_host and body == data)
+        object_store().put_bytes(banner_key(event, "banner.png"), b"banner", "image/png")
+        response = client.get(f"/uploads/{event.event_code}/customisation/banner.png", follow_redirects=False)
+        with httpx.Client() as bucket:
+            banner = bucket.get(response.headers["location"]).content
+        hidden = client.get(f"/uploads/{blob_key(content_hash)}", follow_redirects=False)
+        check("banner served from the bucket, blobs are not", banner == b"banner" and hidden.status_code == 404
+              and app_host not in response.headers["location"])
+
+        # The worker reads the original from the bucket
+        jobs = wait_for_jobs(meta.id)
+        with Session(engine) as session:
+            meta = session.get(FileMetadata, meta.id)
+        check("media jobs ran on the bucket's copy", all(job.status == "done" for job in jobs)
+              and (meta.width, meta.height) == (640, 480), ", ".join(f"{j.kind} {j.status}" for j in jobs))
+
+    async def copy_is_temporary():
+        async with local_copy(meta.storage_key) as path:
+            inside = path.exists()
+        return inside and not path.exists()
+    check("local copies are removed after use", asyncio.run(copy_is_temporary()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Check: every hot-path query is answered from an index.
+
+Builds a throwaway SQLite database from the models, runs the app's lookup
+queries against it and asks SQLite for each one's plan (EXPLAIN QUERY PLAN).
+Exits non-zero if a query scans a whole table or needs a temporary sort, so
+a dropped or mis-ordered index shows up before it reaches production.
+
+Run from the repository root:
+
+    python scripts/check_query_plans.py
+"""
+import asyncio, os, sys, tempfile
+
+# Point the app at a throwaway database before importing it
+WORKDIR = tempfile.mkdtemp(prefix="check_plans_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/plans.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event as sa_event
+from sqlmodel import Session, SQLModel, select
+from app.db.session import engine, async_engine, AsyncSessionLocal
+from app.models import User, UserSession, Event, EventCodePool, Guest, FileMetadata, MediaJob, Pricing
+from app.api.v1.upload import find_event, get_or_create_guest
+from app.services.event_cache import event_cache
+from app.api.v1.gallery import photo_page, encode_cursor
+from app.services.storage import find_duplicate
+from app.services.quota import event_quota
+from app.services.retention import retention_engine
+from app.services.auth import RevocationList
+from app.services.event_codes import allocate_event_code, code_space_usage
+
+engine.echo = async_engine.echo = False
+
+# ─── Plan Capture ───────────────────────────────────────────────────────────
+
+captured: list[tuple[str, tuple]] = []
+
+@sa_event.listens_for(engine, "before_cursor_execute")
+@sa_event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        captured.append((statement, parameters))
+
+def plans_for(run) -> list[tuple[str, list[str]]]:
+    """
+    Run `run()` and return (statement, plan lines) for each SELECT it issued.
+    """
+    captured.clear()
+    run()
+    queries = list(captured)
+    with engine.connect() as conn:
+        return [
+            (statement, [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)])
+            for statement, parameters in queries
+        ]
+
+def problems(plan: list[str]) -> list[str]:
+    """
+    Plan lines that mean the query does not scale with table size.
+    """
+    bad = []
+    for line in plan:
+        if line.startswith("SCAN pricing"):
+            continue  # The plan catalogue: a handful of rows
+        if line.startswith("SCAN") and "USING" not in line:
+            bad.append(line)  # Full table scan
+        elif "TEMP B-TREE" in line:
+            bad.append(line)  # Rows sorted after the fact
+    return bad
+
+# ─── Fixtures ───────────────────────────────────────────────────────────────
+
+def seed() -> dict:
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        session.add(Pricing(tier="Free", price=0, event_limit=1, storage_limit_mb=100, can_download=False,
+                            storage_duration=30, allow_video=False))
+        user = User(first_name="Plan", last_name="Check", email="plans@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        event = Event(user_id=user.id, date=now, storage_path="plans", event_code="PLAN", event_password="0000")
+        session.add(event)
+        session.flush()
+        guest = Guest(event_id=event.id, guest_email="guest@example.com")
+        session.add(guest)
+        session.add(UserSession(user_id=user.id, session_token="token", expires_at=now + timedelta(days=1)))
+        session.add_all(EventCodePool(code=f"C{i:03d}", length=4) for i in range(50))
+        session.flush()
+        files = [
+            FileMetadata(event_id=event.id, guest_id=guest.id, file_name=f"{i}.jpg", file_size=1,
+                         file_type="image/jpeg", content_hash=f"{i:064x}", created_date=now - timedelta(minutes=i))
+            for i in range(50)
+        ]
+        session.add_all(files)
+        session.flush()
+        session.add_all(MediaJob(file_id=f.id, kind="metadata") for f in files)
+        session.commit()
+        return {"event_id": event.id, "last_file": (files[9].created_date, files[9].id)}
+
+# ─── Hot Queries ────────────────────────────────────────────────────────────
+
+def hot_queries(ids: dict) -> dict:
+    """
+    Name → callable that issues the query exactly as the app does.
+    """
+    def with_session(fn):
+        def run():
+            with Session(engine) as session:
+                fn(session)
+        return run
+
+    def in_loop(fn):
+        async def run():
+            try:
+                await fn()
+            finally:
+                await async_engine.dispose()  # Pooled connections belong to this loop
+        return lambda: asyncio.run(run())
+
+    async def event_by_code():
+        event_cache.clear()
+        await find_event("PLAN", "0000")
+
+    async def upload_quota():
+        async with AsyncSessionLocal() as session:
+            await event_quota(session, await session.get(Event, event_id))
+
+    event_id = ids["event_id"]
+    return {
+        "event by code (cache miss)": in_loop(event_by_code),
+        "event by code (code generation)": with_session(
+            lambda s: s.exec(select(Event).where(Event.event_code == "PLAN")).first()),
+        "events of a user": with_session(
+            lambda s: s.exec(select(Event).where(Event.user_id == 1).order_by(Event.date)).all()),
+        "code space in use": with_session(lambda s: code_space_usage(s, 4)),
+        "event code from the pool": with_session(allocate_event_code),  # Rolled back with the session
+        "user by email": with_session(
+            lambda s: s.exec(select(User).where(User.email == "plans@example.com")).first()),
+        "session by token": with_session(
+            lambda s: s.exec(select(UserSession).where(UserSession.session_token == "token")).first()),
+        "sessions of a user": with_session(
+            lambda s: s.exec(select(UserSession).where(UserSession.user_id == 1)).all()),
+        "guest by email and event": with_session(
+            lambda s: get_or_create_guest(s, s.get(Event, event_id), "guest@example.com")),
+        "duplicate by content hash": with_session(lambda s: find_duplicate(s, event_id, "0" * 64)),
+        "upload quota of an event": in_loop(upload_quota),
+        "expired events, half-purged events, queued blobs": in_loop(lambda: retention_engine.run(dry_run=False)),  # Nothing has expired
+        "gallery first page": in_loop(lambda: photo_page(event_id, None, 20)),
+        "gallery later page": in_loop(lambda: photo_page(event_id, encode_cursor(*ids["last_file"]), 20)),
+        "revocations since the last refresh": lambda: RevocationList()._fetch(),
+        "jobs of a file": with_session(
+            lambda s: s.exec(select(MediaJob).where(MediaJob.file_id == 1).order_by(MediaJob.id)).all()),
+        "pending media jobs": with_session(
+            lambda s: s.exec(select(MediaJob.id).where(
+                MediaJob.status == "pending", MediaJob.run_after <= datetime.now(timezone.utc)
+            ).order_by(MediaJob.run_after, MediaJob.id).limit(4)).all()),
+    }
+
+# ─── Main ───────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    ids = seed()
+    failures = 0
+    for name, run in hot_queries(ids).items():
+        bad = []
+        for statement, plan in plans_for(run):
+            if "sqlite_master" in statement:
+                continue
+            bad += problems(plan)
+        print(f"{'FAIL' if bad else 'ok  '}  {name}")
+        for line in bad:
+            print(f"        {line}")
+        failures += bool(bad)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
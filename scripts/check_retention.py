@@ -0,0 +1,198 @@
+"""
+Check: expiry of events past their plan's storage_duration.
+
+Runs the app on a throwaway database and storage root (local store) with a
+few events around their retention window and checks that:
+- a dry run reports exactly the expired events (on their own plan or their
+  owner's) and touches nothing,
+- a real run archives each expired event to one ZIP, then removes its
+  files, generated previews, unfinished uploads, guests and counters, while
+  a blob shared with a live event stays,
+- unused blobs are only queued for deletion, and a later run deletes them
+  unless an upload has reused them meanwhile,
+- the owner's usage drops by what was removed and guests get a 410,
+- an event whose purge was interrupted is finished by the next run,
+- files go in throttled batches.
+
+Run from the repository root:
+
+    python scripts/check_retention.py
+"""
+import asyncio, base64, io, os, tempfile, time, zipfile
+
+from harness import check, throwaway_app
+
+# Point the app at a throwaway database and storage root before importing it
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["RETENTION_MODE"] = "off"  # Runs are started by the checks below
+throwaway_app(tempfile.mkdtemp(prefix="check_retention_"))
+
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session, SQLModel, func, select
+from app.db.session import engine
+from app.models import (BlobDeletion, Event, EventStorage, FileMetadata, Guest, MediaJob, Pricing, UploadSession, User,
+                        UserStorage)
+from app.services.object_store import object_store
+from app.services.retention import RetentionEngine
+from app.services.storage import archive_key, blob_key, derived_folder
+
+def seed() -> dict[str, Event]:
+    """
+    Free plan keeps files 30 days, Forever keeps them always.
+    """
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        free = Pricing(tier="Free", price=0, event_limit=5, storage_limit_mb=64, can_download=True,
+                       storage_duration=30, allow_video=True)
+        forever = Pricing(tier="Forever", price=99, event_limit=5, storage_limit_mb=64, can_download=True,
+                          storage_duration=-1, allow_video=True)
+        session.add_all([free, forever])
+        session.flush()
+        alice = User(first_name="Alice", last_name="Free", email="alice@example.com", hashed_password="-",
+                     pricing_id=free.id)
+        bob = User(first_name="Bob", last_name="Forever", email="bob@example.com", hashed_password="-",
+                   pricing_id=forever.id)
+        session.add_all([alice, bob])
+        session.flush()
+        events = {
+            "OLD1": Event(user_id=alice.id, date=now - timedelta(days=60), storage_path="old1",
+                          event_code="OLD1", event_password="0000"),  # Expired on the owner's plan
+            "NEW1": Event(user_id=alice.id, date=now - timedelta(days=10), storage_path="new1",
+                          event_code="NEW1", event_password="0000"),  # Still inside the window
+            "KEEP": Event(user_id=bob.id, date=now - timedelta(days=400), storage_path="keep",
+                          event_code="KEEP", event_password="0000"),  # Owner's plan keeps files forever
+            "OWN1": Event(user_id=bob.id, date=now - timedelta(days=45), storage_path="own1",
+                          event_code="OWN1", event_password="0000", pricing_id=free.id),  # Expired on its own plan
+            "HALF": Event(user_id=alice.id, date=now - timedelta(days=90), storage_path="half",
+                          event_code="HALF", event_password="0000"),  # Purge interrupted earlier
+        }
+        session.add_all(events.values())
+        session.commit()
+        for event in events.values():
+            session.refresh(event)
+            session.expunge(event)
+        return events
+
+def photo(color: tuple) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(out, "JPEG")
+    return out.getvalue()
+
+def upload(client: TestClient, event: Event, name: str, data: bytes):
+    client.post(f"/upload/{event.event_code}/{event.event_password}", data={"guest_email": "guest@example.com"},
+                files={"file_upload": (name, data, "image/jpeg")}).raise_for_status()
+
+def wait_for_jobs(seconds: float = 60):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with Session(engine) as session:
+            if all(job.status in ("done", "failed") for job in session.exec(select(MediaJob)).all()):
+                return
+        time.sleep(0.2)
+
+def rows(event: Event) -> dict[str, int]:
+    with Session(engine) as session:
+        count = lambda model: session.exec(select(func.count()).select_from(model).where(model.event_id == event.id)).one()
+        return {"files": count(FileMetadata), "guests": count(Guest), "uploads": count(UploadSession),
+                "counters": count(EventStorage)}
+
+def user_usage(user_id: int) -> tuple[int, int]:
+    with Session(engine) as session:
+        storage = session.get(UserStorage, user_id)
+        return storage.used_bytes, storage.file_count
+
+def event_usage(event: Event) -> tuple[int, int]:
+    with Session(engine) as session:
+        storage = session.exec(select(EventStorage).where(EventStorage.event_id == event.id)).one()
+        return storage.used_bytes, storage.file_count
+
+def main():
+    events = seed()
+    old, new, keep, own, half = (events[code] for code in ("OLD1", "NEW1", "KEEP", "OWN1", "HALF"))
+    shared, unique = photo((10, 20, 30)), photo((200, 10, 10))
+
+    from app.main import app
+    with TestClient(app) as client:
+        upload(client, old, "shared.jpg", shared)
+        upload(client, old, "unique.jpg", unique)
+        upload(client, keep, "shared.jpg", shared)
+        upload(client, new, "new.jpg", photo((0, 200, 0)))
+        for i in range(3):
+            upload(client, own, f"own{i}.jpg", photo((80 * i, 0, 200)))
+            upload(client, half, f"half{i}.jpg", photo((80 * i, 200, 80)))
+        metadata = base64.b64encode(b"guest@example.com").decode(), base64.b64encode(b"big.jpg").decode()
+        client.post(f"/upload/{old.event_code}/{old.event_password}/resumable", headers={
+            "Upload-Length": "5000", "Upload-Metadata": f"guest_email {metadata[0]},filename {metadata[1]}",
+        }).raise_for_status()
+        wait_for_jobs()
+        with Session(engine) as session:
+            old_files = session.exec(select(FileMetadata).where(FileMetadata.event_id == old.id)).all()
+            hashes = {meta.file_name: meta.content_hash for meta in old_files}
+            purged = set(session.exec(select(FileMetadata.content_hash).where(
+                FileMetadata.event_id.in_([own.id, half.id]))).all())
+            folders = [derived_folder(old, meta) for meta in old_files]
+            session.get(Event, half.id).expired_at = datetime.now(timezone.utc) - timedelta(days=1)
+            session.commit()
+        live_usage = event_usage(new)
+        before = rows(old)
+        batches = sum(rows(event)["files"] for event in (old, own, half))
+
+        # ── Dry run ──
+        report = asyncio.run(RetentionEngine(mode="dry-run").run())
+        check("dry run reports the expired events", [(r.event_code, r.tier) for r in report]
+              == [("OLD1", "Free"), ("OWN1", "Free")], ", ".join(f"{r.event_code}: {r.file_count} files" for r in report))
+        check("dry run touches nothing", rows(old) == before and client.get(
+            f"/upload/{old.event_code}/{old.event_password}").status_code == 200, str(before))
+
+        # ── Real run ──
+        retention = RetentionEngine(mode="archive", batch_files=1, pause_seconds=0.2, blob_grace_seconds=3600)
+        started = time.monotonic()
+        report = asyncio.run(retention.run())
+        elapsed = time.monotonic() - started
+        with Session(engine) as session:
+            expired = {event.event_code for event in session.exec(select(Event).where(Event.expired_at.is_not(None)))}
+        check("expired events marked", expired == {"OLD1", "OWN1", "HALF"}, ", ".join(sorted(expired)))
+        check("rows and counters removed", rows(old) == rows(own) == rows(half)
+              == {"files": 0, "guests": 0, "uploads": 0, "counters": 0}, str(before))
+        store = object_store()
+        with Session(engine) as session:
+            queued = set(session.exec(select(BlobDeletion.content_hash)).all())
+        check("files removed, unused blobs queued, a blob shared with a live event kept",
+              queued == purged | {hashes["unique.jpg"]} and store.exists(blob_key(hashes["unique.jpg"]))
+              and folders and not any(folder.exists() for folder in folders), f"{len(queued)} queued")
+        with zipfile.ZipFile(store.path(archive_key(old))) as archive:
+            names = sorted(archive.namelist())
+            intact = archive.testzip() is None
+        check("event archived first", intact and names == ["guest@example.com/shared.jpg",
+                                                              "guest@example.com/unique.jpg"], ", ".join(names))
+        check("owner's usage is the live event's only", user_usage(new.user_id) == live_usage
+              and event_usage(new) == live_usage, f"{user_usage(new.user_id)}")
+        response = client.get(f"/upload/{old.event_code}/{old.event_password}")
+        check("guests of an expired event get a 410", response.status_code == 410
+              and client.get(f"/upload/{keep.event_code}/{keep.event_password}").status_code == 200)
+        check("files removed in throttled batches", batches == 8 and elapsed >= 0.2 * batches,
+              f"{elapsed:.1f} s for {batches} files")
+        check("interrupted purge finished", rows(half)["files"] == 0 and store.exists(archive_key(half))
+              and [r.event_code for r in report] == ["OLD1", "OWN1"])
+
+        again = asyncio.run(retention.run())
+        check("nothing left for the next run", again == [])
+
+        # ── Deferred blob deletion ──
+        upload(client, new, "unique.jpg", unique)  # Reuses a queued blob
+        with Session(engine) as session:
+            session.add(BlobDeletion(content_hash=hashes["shared.jpg"]))  # Queued, but still in use
+            session.commit()
+        asyncio.run(RetentionEngine(mode="archive", pause_seconds=0, blob_grace_seconds=0).run())
+        with Session(engine) as session:
+            left = session.exec(select(BlobDeletion)).all()
+        check("queued blobs deleted after the grace period", not left
+              and not any(store.exists(blob_key(content_hash)) for content_hash in purged))
+        check("blobs reused or still in use kept", store.exists(blob_key(hashes["unique.jpg"]))
+              and store.exists(blob_key(hashes["shared.jpg"])))
+
+if __name__ == "__main__":
+    main()
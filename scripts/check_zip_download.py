@@ -0,0 +1,173 @@
+"""
+Check: streaming ZIP download of an event against a real server.
+
+Starts the app under uvicorn on a throwaway database and storage root,
+stores a few large originals for one event and checks that:
+- the archive streams with a known Content-Length and is a valid ZIP
+  (read back with `zipfile` through HTTP Range requests only),
+- the server's peak memory stays flat while hundreds of MB stream out,
+- a download cut off halfway resumes with Range + If-Range into the same
+  bytes as an uninterrupted one,
+- a stale If-Range gets the whole archive again.
+
+Run from the repository root:
+
+    python scripts/check_zip_download.py
+"""
+import hashlib, multiprocessing, os, socket, tempfile, time, zipfile
+
+from harness import check, throwaway_app
+
+# Point the app at a throwaway database and storage root before importing it
+# (the server process inherits the same folder through the environment)
+throwaway_app(os.environ.setdefault("CHECK_WORKDIR", tempfile.mkdtemp(prefix="check_zip_")))
+
+import app.core.config as config
+from datetime import datetime, timezone
+import bcrypt, httpx, uvicorn
+from sqlmodel import Session, SQLModel
+from app.db.session import engine
+from app.models import User, Event, Guest, FileMetadata, Pricing
+
+FILES = 6
+FILE_SIZE = 128 * 1024 * 1024  # Each original; sparse on disk, so cheap to create
+CHUNK = 1024 * 1024
+
+def serve(port: int):
+    from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def seed() -> int:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        plan = Pricing(tier="Check", price=0, event_limit=1, storage_limit_mb=10_000, can_download=True,
+                       storage_duration=30, allow_video=True)
+        session.add(plan)
+        session.flush()
+        user = User(first_name="Check", last_name="Host", email="host@example.com", verified=True,
+                    hashed_password=bcrypt.hashpw(b"check", bcrypt.gensalt(4)).decode(), pricing_id=plan.id)
+        session.add(user)
+        session.flush()
+        event = Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path="check",
+                      event_code="CHEK", event_password="0000", pricing_id=plan.id)
+        session.add(event)
+        session.flush()
+        guest = Guest(event_id=event.id, guest_email="guest@example.com")
+        session.add(guest)
+        session.flush()
+        folder = os.path.join(config.STORAGE_ROOT, "check", str(guest.id))
+        os.makedirs(folder)
+        for i in range(FILES):
+            with open(os.path.join(folder, f"clip{i}.mp4"), "wb") as f:
+                f.write(f"clip {i}".encode())
+                f.truncate(FILE_SIZE)
+            session.add(FileMetadata(event_id=event.id, guest_id=guest.id, file_name=f"clip{i}.mp4",
+                                     file_type="video/mp4", file_size=FILE_SIZE))
+        session.commit()
+        return event.id
+
+class HTTPRangeFile:
+    """
+    Read-only, seekable file over HTTP Range requests, for `zipfile`.
+    """
+
+    def __init__(self, client: httpx.Client, url: str, size: int):
+        self.client, self.url, self.size, self.position = client, url, size, 0
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset: int, whence: int = 0):
+        self.position = (offset, self.position + offset, self.size + offset)[whence]
+        return self.position
+
+    def read(self, n: int = -1) -> bytes:
+        end = self.size if n < 0 else min(self.position + n, self.size)
+        if end <= self.position:
+            return b""
+        response = self.client.get(self.url, headers={"Range": f"bytes={self.position}-{end - 1}"})
+        response.raise_for_status()
+        self.position = end
+        return response.content
+
+def download(client: httpx.Client, url: str, headers: dict = None, stop_after: int = None) -> tuple:
+    """
+    Stream a download into a SHA-256; returns (response, running digest, bytes read).
+    """
+    digest, received = hashlib.sha256(), 0
+    with client.stream("GET", url, headers=headers or {}) as response:
+        for chunk in response.iter_bytes(CHUNK):
+            digest.update(chunk)
+            received += len(chunk)
+            if stop_after and received >= stop_after:
+                break
+    return response, digest, received
+
+def main():
+    event_id = seed()
+    port = free_port()
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None)
+    for _ in range(100):
+        try:
+            client.post("/auth/login", data={"email": "host@example.com", "password": "check"})
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+    url = f"/api/events/{event_id}/download"
+    baseline = peak_rss_mb(server.pid)
+
+    # Full download: first pass also computes and caches every CRC
+    start = time.perf_counter()
+    response, digest, received = download(client, url)
+    first = time.perf_counter() - start
+    size, etag = int(response.headers["content-length"]), response.headers["etag"]
+    full_digest = digest.hexdigest()
+    check("archive streamed with its Content-Length", response.status_code == 200 and received == size,
+          f"{size / 2**20:.0f} MiB in {first:.1f} s")
+    growth = peak_rss_mb(server.pid) - baseline
+    check("server memory stays flat", growth < 64, f"peak RSS +{growth:.1f} MiB")
+
+    start = time.perf_counter()
+    _, digest, _ = download(client, url)
+    check("second download uses cached CRCs", digest.hexdigest() == full_digest,
+          f"{time.perf_counter() - start:.1f} s vs {first:.1f} s")
+
+    # Interrupted halfway, then resumed from the last byte received
+    _, digest, received = download(client, url, stop_after=size // 2)
+    with client.stream("GET", url, headers={"Range": f"bytes={received}-", "If-Range": etag}) as response:
+        for chunk in response.iter_bytes(CHUNK):
+            digest.update(chunk)
+    check("resumed download matches the full one", response.status_code == 206
+          and digest.hexdigest() == full_digest, response.headers.get("content-range", ""))
+
+    response = client.get(url, headers={"Range": "bytes=0-99", "If-Range": '"stale"'})
+    check("stale If-Range sends the whole archive", response.status_code == 200
+          and len(response.content) == size)
+
+    archive = zipfile.ZipFile(HTTPRangeFile(client, url, size))
+    names = archive.namelist()
+    member = archive.read(names[-1])  # zipfile checks the CRC as it reads
+    check("valid ZIP with every file", len(names) == FILES and len(member) == FILE_SIZE,
+          f"{names[0]} … {names[-1]}")
+
+    server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Shared scaffolding for the check_* scripts.
+
+A check runs the app on a throwaway database (and storage root) in a
+temporary folder, prints one line per check and stops at the first failure:
+
+    WORKDIR = throwaway_app(tempfile.mkdtemp(prefix="check_media_"))
+    ...
+    check("banner served", response.status_code == 200, response.headers["etag"])
+"""
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def throwaway_app(workdir: str, database: str = "check.db", storage: bool = True) -> str:
+    """
+    Point the app at `workdir` and return it.
+    - Call before importing anything else from `app`, once the environment
+      variables the check needs are set.
+    - `storage` also moves STORAGE_ROOT into the folder.
+    - SQL echo is turned off.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/{database}"
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import app.core.config as config
+    if storage:
+        config.STORAGE_ROOT = os.path.join(workdir, "storage")
+        os.makedirs(config.STORAGE_ROOT, exist_ok=True)
+    from app.db.session import engine, async_engine
+    engine.echo = async_engine.echo = False
+    return workdir
+
+def check(name: str, ok: bool, detail: str = ""):
+    """
+    Report one check; exits non-zero if it failed.
+    """
+    print(f"{'ok' if ok else 'FAIL':<5} {name}{'  (' + detail + ')' if detail else ''}")
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""
+Local SMTP stand-in for developing and checking email delivery.
+
+Accepts every message (no TLS, no authentication) and prints it, so the
+app can be pointed at it instead of a real mail server:
+
+    python scripts/smtp_sink.py --port 1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_PASSWORD= uvicorn app.main:app
+
+`SMTPSink` can also be started inside another script; it records the
+messages it received and how many connections were opened, and can be told
+to reject recipients (550) or defer messages (451).
+"""
+import argparse, asyncio
+from email import message_from_bytes
+from email.message import Message
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, echo: bool = False):
+        self.host = host
+        self.port = port
+        self.echo = echo
+        self.messages: list[Message] = []
+        self.connections = 0
+        self.refuse: set[str] = set()  # Recipients answered with 550
+        self.defer = 0  # Next N messages answered with 451
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-sink ready")
+        recipients: list[str] = []
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250 smtp-sink")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    address = command.partition(":")[2].strip().strip("<>")
+                    if address in self.refuse:
+                        await reply("550 No such user")
+                    else:
+                        recipients.append(address)
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    if self.defer > 0:
+                        self.defer -= 1
+                        await reply("451 Try again later")
+                        continue
+                    message = message_from_bytes(data[:-5].replace(b"\r\n..", b"\r\n."))
+                    self.messages.append(message)
+                    if self.echo:
+                        print(f"--- to {', '.join(recipients)}: {message['Subject']}\n{message.get_payload()}")
+                    await reply("250 OK queued")
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    sink = SMTPSink(args.host, args.port, echo=True)
+    await sink.start()
+    print(f"SMTP sink listening on {args.host}:{sink.port}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
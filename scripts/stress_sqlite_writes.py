@@ -0,0 +1,201 @@
+"""
+Stress test: concurrent upload writes against SQLite without lock errors.
+
+Simulates an event at its peak. Several processes, like uvicorn workers,
+each run many threads that commit guest uploads in the shape
+`save_uploads` writes: a guest lookup, a batch of FileMetadata rows and
+their MediaJob rows in one transaction. Meanwhile other threads read
+gallery pages and claim media jobs the way the worker does.
+
+The default load is 40 uploads/s of 5 files each (200 files/s). A
+300-guest event where everyone sends 150 photos within ten minutes
+averages 75 files/s, so this leaves headroom for bursts.
+
+Runs twice, each on a fresh database:
+- "default": a plain create_engine(DATABASE_URL), i.e. the rollback
+  journal with pysqlite's 5 s lock wait,
+- "tuned": the app's engine profile from app.db.session.
+Exits non-zero if the tuned run hit any "database is locked" error or fell
+short of the target rate.
+
+Run from the repository root:
+
+    python scripts/stress_sqlite_writes.py [--processes 4] [--threads 8] [--rate 40] [--seconds 10]
+"""
+import argparse, multiprocessing, os, statistics, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+from app.models import User, Event, Guest, FileMetadata, MediaJob
+
+FILES_PER_UPLOAD = 5
+EVENTS = 10
+READERS = 2  # Gallery readers per process
+
+# ─── Worker Process ─────────────────────────────────────────────────────────
+
+def make_engine(profile: str, url: str):
+    if profile == "tuned":
+        from app.db.session import engine  # Built from DATABASE_URL, inherited from the parent
+        return engine
+    return create_engine(url)
+
+def run_process(profile: str, url: str, index: int, threads: int, interval: float, seconds: float, results):
+    engine = make_engine(profile, url)
+    stats = {"latencies": [], "locked": 0, "errors": 0, "reads": 0, "claims": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def record_error(exc: Exception):
+        with lock:
+            stats["locked" if "locked" in str(exc) else "errors"] += 1
+
+    def writer(thread: int):
+        next_at = time.monotonic() + interval * thread / threads  # Spread the threads' first writes
+        n = 0
+        while next_at < deadline:
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at += interval
+            n += 1
+            event_id = (index * threads + thread + n) % EVENTS + 1
+            email = f"guest{index}-{thread}-{n % 20}@example.com"
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    guest = session.exec(
+                        select(Guest).where(Guest.event_id == event_id, Guest.guest_email == email)
+                    ).first()
+                    if not guest:
+                        guest = Guest(event_id=event_id, guest_email=email)
+                        session.add(guest)
+                        session.flush()
+                    rows = [
+                        FileMetadata(event_id=event_id, guest_id=guest.id, file_name=f"{n}-{i}.jpg",
+                                     file_type="image/jpeg", file_size=1)
+                        for i in range(FILES_PER_UPLOAD)
+                    ]
+                    session.add_all(rows)
+                    session.flush()
+                    session.add_all(MediaJob(file_id=row.id, kind=kind) for row in rows for kind in ("metadata", "renditions"))
+                    session.commit()
+                with lock:
+                    stats["latencies"].append((time.perf_counter() - start) * 1000)
+            except OperationalError as exc:
+                record_error(exc)
+
+    def reader(thread: int):
+        while time.monotonic() < deadline:
+            try:
+                with Session(engine) as session:
+                    session.exec(
+                        select(FileMetadata.id, FileMetadata.file_name)
+                        .where(FileMetadata.event_id == thread % EVENTS + 1)
+                        .order_by(FileMetadata.created_date.desc(), FileMetadata.id.desc())
+                        .limit(21)
+                    ).all()
+                with lock:
+                    stats["reads"] += 1
+            except OperationalError as exc:
+                record_error(exc)
+            time.sleep(0.01)
+
+    def claimer():
+        while time.monotonic() < deadline:
+            try:
+                with Session(engine) as session:
+                    ids = session.exec(
+                        select(MediaJob.id).where(MediaJob.status == "pending").order_by(MediaJob.run_after, MediaJob.id).limit(4)
+                    ).all()
+                    for job_id in ids:
+                        claimed = session.execute(
+                            update(MediaJob).where(MediaJob.id == job_id, MediaJob.status == "pending").values(status="done")
+                        ).rowcount
+                        with lock:
+                            stats["claims"] += claimed
+                    session.commit()
+            except OperationalError as exc:
+                record_error(exc)
+            time.sleep(0.02)
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    workers += [threading.Thread(target=reader, args=(t,)) for t in range(READERS)]
+    workers.append(threading.Thread(target=claimer))
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results.put(stats)
+
+# ─── Runner ─────────────────────────────────────────────────────────────────
+
+def seed(url: str):
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(first_name="Stress", last_name="Test", email="stress@example.com", hashed_password="-")
+        session.add(user)
+        session.flush()
+        session.add_all(
+            Event(user_id=user.id, date=datetime.now(timezone.utc), storage_path=f"stress{i}",
+                  event_code=f"ST{i:02d}", event_password="0000")
+            for i in range(EVENTS)
+        )
+        session.commit()
+    engine.dispose()
+
+def run_profile(profile: str, args) -> dict:
+    url = f"sqlite:///{tempfile.mkdtemp(prefix='stress_sqlite_')}/stress.db"
+    seed(url)
+    os.environ["DATABASE_URL"] = url  # Inherited by the spawned processes
+    writers = args.processes * args.threads
+    interval = writers / args.rate  # Seconds between one writer thread's uploads
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_process, args=(profile, url, i, args.threads, interval, args.seconds, results))
+        for i in range(args.processes)
+    ]
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.monotonic() - start
+
+    latencies = sorted(l for s in stats for l in s["latencies"])
+    total = {key: sum(s[key] for s in stats) for key in ("locked", "errors", "reads", "claims")}
+    total["uploads"] = len(latencies)
+    total["rate"] = len(latencies) / args.seconds
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(f"{profile:<8} {total['uploads']:6d} uploads ({total['rate']:5.1f}/s, "
+          f"{total['rate'] * FILES_PER_UPLOAD:6.1f} files/s)   "
+          f"commit p50 {statistics.median(latencies) if latencies else 0:7.1f} ms   p99 {p99:8.1f} ms   "
+          f"locked {total['locked']:4d}   other errors {total['errors']:3d}   "
+          f"reads {total['reads']:6d}   jobs claimed {total['claims']:6d}   ({elapsed:.1f} s)")
+    return total
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent SQLite write stress test")
+    parser.add_argument("--processes", type=int, default=4, help="Simulated app worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="Writer threads per process")
+    parser.add_argument("--rate", type=float, default=40, help="Target uploads per second across all writers")
+    parser.add_argument("--seconds", type=float, default=10, help="Test duration")
+    args = parser.parse_args()
+    print(f"{args.processes} processes x {args.threads} writers, target {args.rate:g} uploads/s "
+          f"({FILES_PER_UPLOAD} files + {2 * FILES_PER_UPLOAD} jobs each) for {args.seconds:g} s\n")
+
+    run_profile("default", args)
+    tuned = run_profile("tuned", args)
+    ok = tuned["locked"] == 0 and tuned["errors"] == 0 and tuned["rate"] >= 0.95 * args.rate
+    print(f"\n{'PASS' if ok else 'FAIL'}: tuned profile {'sustained' if ok else 'did not sustain'} "
+          f"the target rate without lock errors")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())